@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Idle Clicker — suite de benchmarks reproductible (économie + rendu, sans écran)
+- Économie : format_num, upgrade_cost / max_affordable_qty, achat max à très gros or,
+  check_achievements, recalc_cps, partie simulée de 24 h (10 Hz, achats au conseiller),
+  rejeu headless de 6 h d'entrées enregistrées (idle_replay).
+- Rendu : `IdleGame` construit sur `FakeTk`, un faux interpréteur Tcl qui enregistre chaque appel.
+  Les vraies classes tkinter tournent au-dessus, donc `_update_particles`, `FancyTap._draw` et
+  `_update_upgrade_visibility` s'exécutent sans display ; on mesure le temps et le nombre d'appels Tk.
+- Sortie JSON ; `--save` écrit la référence, `--check` échoue (code 1) au-delà du seuil de régression.
+Usage : python idle_bench.py [--save | --check] [--baseline bench_baseline.json] [--threshold 0.25] [--only nom,...]
+"""
+import json, os, random, sys, tempfile, time
+from collections import Counter
+
+BASELINE_FILE = "bench_baseline.json"
+THRESHOLD = 0.25   # allowed relative slow-down before --check fails
+REPEATS = 5        # each benchmark keeps its best run (least disturbed by the machine)
+
+
+class FakeTk:
+    """Stand-in for the `_tkinter` app object: records every Tcl call, returns plausible values,
+    and keeps `after` callbacks in a queue that `run_after()` drains."""
+    def __init__(self, width: int = 760, height: int = 860):
+        self.width = width; self.height = height
+        self.calls = 0; self.by_cmd = Counter()
+        self.vars = {}; self.commands = {}; self.after_queue = {}   # id -> (due_ms, command name)
+        self.now_ms = 0; self._next_item = 0; self._next_after = 0
+
+    def call(self, *args):
+        if len(args) == 1 and isinstance(args[0], tuple): args = args[0]
+        self.calls += 1; cmd = str(args[0])
+        sub = str(args[1]) if len(args) > 1 else ""
+        self.by_cmd[sub if cmd.startswith(".") else (f"{cmd} {sub}" if sub.isalpha() else cmd)] += 1
+        if cmd == "after":
+            if sub == "info": return tuple(self.after_queue)
+            if sub == "cancel": self.after_queue.pop(args[2], None); return ""
+            if sub == "idle": return self._schedule(0, args[2])
+            return self._schedule(int(sub), args[2])
+        if cmd == "winfo":
+            if sub in ("width", "reqwidth"): return self.width
+            if sub in ("height", "reqheight"): return self.height // 6
+            return 0
+        if cmd == "font":
+            return 14 if sub in ("measure", "metrics") else (args[2] if sub == "create" else "")
+        if cmd.startswith(".") and sub == "create":
+            self._next_item += 1; return self._next_item
+        if cmd.startswith(".") and sub == "bbox": return (0, 0, self.width, self.height)
+        if cmd.startswith(".") and sub in ("find", "coords", "gettags"): return ()
+        if cmd == "image" and sub == "create": return args[3] if len(args) > 3 else "pyimage"
+        if cmd in ("canvas", "frame", "label", "button", "scrollbar", "checkbutton", "toplevel") or cmd.startswith("ttk::"):
+            return sub
+        return ""
+
+    def _schedule(self, ms: int, name: str) -> str:
+        self._next_after += 1; aid = f"after#{self._next_after}"
+        self.after_queue[aid] = (self.now_ms + ms, name); return aid
+
+    def run_after(self, ms: int):
+        """Advance the fake clock by `ms` and fire every callback that came due, in order."""
+        end = self.now_ms + ms
+        while True:
+            due = [(t, aid) for aid, (t, _) in self.after_queue.items() if t <= end]
+            if not due: break
+            t, aid = min(due); _, name = self.after_queue.pop(aid)
+            self.now_ms = max(self.now_ms, t); self.commands[name]()
+        self.now_ms = end
+
+    # tkapp API used by tkinter
+    def createcommand(self, name, func): self.commands[name] = func
+    def deletecommand(self, name): self.commands.pop(name, None)
+    def globalsetvar(self, name, value): self.calls += 1; self.vars[name] = value
+    setvar = globalsetvar
+    def globalgetvar(self, name): return self.vars.get(name, "")
+    getvar = globalgetvar
+    def globalunsetvar(self, name): self.vars.pop(name, None)
+    unsetvar = globalunsetvar
+    def getint(self, v): return int(v) if v not in ("", None) else 0
+    def getdouble(self, v): return float(v) if v not in ("", None) else 0.0
+    def getboolean(self, v): return bool(int(v)) if isinstance(v, str) and v.isdigit() else bool(v)
+    def splitlist(self, v): return v if isinstance(v, tuple) else tuple(str(v).split())
+    split = splitlist
+    def wantobjects(self): return 1
+    def eval(self, script): self.calls += 1; return ""
+    def mainloop(self, n=0): pass
+    def quit(self): pass
+
+
+def fake_root(width: int = 760, height: int = 860):
+    """A `tk.Tk` whose interpreter is a FakeTk (no display needed). Becomes tkinter's default root."""
+    import tkinter as tk
+    root = tk.Tk.__new__(tk.Tk)
+    root.master = None; root.children = {}; root._tkloaded = True; root.tk = FakeTk(width, height)
+    tk._default_root = root
+    return root
+
+
+def make_game(tmp: str, **kw):
+    """IdleGame on a fake root, with saves redirected into `tmp`. Returns (game, fake_tk)."""
+    import idle_clicker_v6_6_4 as ui
+    ui.SAVE_DIR = tmp; ui.SAVE_DB = os.path.join(tmp, "bench.db")
+    ui.SAVE_FILE = os.path.join(tmp, "idle_save.json"); ui.SAVE_BASE = os.path.join(tmp, "idle_save")
+    kw.setdefault("staged", False)   # run the startup stages inline
+    root = fake_root(); game = ui.IdleGame(root, **kw)
+    return game, root.tk
+
+
+# ---------------- benchmarks ----------------
+def _best(fn, repeats: int = REPEATS) -> float:
+    """Best wall time of `fn()` over `repeats` runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_format_num(n: int = 20_000):
+    from idle_numbers import format_num
+    rng = random.Random(1); values = [10 ** rng.uniform(0, 60) for _ in range(200)]
+    stream = [values[i % 200] * (1.0 + (i // 200) * 1e-3) for i in range(n)]
+    t = _best(lambda: [format_num(v) for v in stream])
+    return {"us_per_call": t / n * 1e6}
+
+
+def bench_costs(n: int = 20_000):
+    from idle_core import GameState
+    g = GameState(); rng = random.Random(2); names = g.economy.names
+    for name in names: g.upgrades[name] = rng.randint(0, 300)
+    g.gold = 1e40; picks = [rng.choice(names) for _ in range(n)]
+    t_cost = _best(lambda: [g.upgrade_cost(nm) for nm in picks])
+    t_max = _best(lambda: [g.max_affordable_qty(nm) for nm in picks])
+    return {"upgrade_cost_us": t_cost / n * 1e6, "max_affordable_us": t_max / n * 1e6}
+
+
+def bench_buy_max(golds=(1e12, 1e60, 1e250)):
+    from idle_core import GameState
+    from idle_numbers import BigNum
+    out = {}
+    for gold in tuple(golds) + (BigNum(1.0, 400),):
+        def run():
+            g = GameState(); g.gold = gold
+            for name in g.economy.names: g.buy(name, None)
+        key = f"buy_max_{'big' if isinstance(gold, BigNum) else f'{gold:.0e}'}_us"
+        out[key.replace("+", "")] = _best(run) * 1e6
+    return out
+
+
+def bench_check_achievements(taps: int = 5000):
+    from idle_core import bench_achievements
+    return {"tap_check_us": min(bench_achievements(0, taps) for _ in range(3)),
+            "tap_check_10k_defs_us": min(bench_achievements(10_000, taps) for _ in range(3))}
+
+
+def bench_recalc_cps(n: int = 20_000):
+    from idle_core import GameState
+    g = GameState()
+    for i, name in enumerate(g.economy.names): g.upgrades[name] = 50 + i
+    return {"us_per_call": _best(lambda: [g.recalc_cps() for _ in range(n)]) / n * 1e6}
+
+
+def bench_sim_24h(hz: int = 10, hours: float = 24.0, buy_every: float = 60.0):
+    """A day of play at `hz` logic ticks, the buy advisor spending every `buy_every` seconds."""
+    from idle_core import GameState, BuyAdvisor
+    dt = 1.0 / hz; ticks = int(hours * 3600 * hz); every = int(buy_every * hz); result = {}
+    def run():
+        g = GameState(); adv = BuyAdvisor(g); g.gold = 50.0
+        for i in range(ticks):
+            g.advance(dt)
+            if i % every == 0:
+                while True:
+                    best = adv.best()
+                    if best is None or not g.buy(best, 1): break
+        result["gold"] = g.total_earned
+    t = _best(run, repeats=1)
+    return {"seconds": t, "ticks_per_s": ticks / t, "total_earned_log10": round(__import__("math").log10(max(1.0, float(result["gold"]))), 3)}
+
+
+def bench_replay(hours: float = 6.0):
+    """Headless replay of `hours` of recorded play (idle_replay.synthesize: taps, purchases, prestige)."""
+    from idle_replay import synthesize, replay
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.rec"); synthesize(path, hours, seed=1); result = {}
+        def run():
+            c = time.process_time(); result["res"] = replay(path); result["cpu"] = time.process_time() - c
+        t = _best(run, repeats=3)
+    res = result["res"]
+    if not res["identical"]: raise RuntimeError("replay diverged from the recording")
+    return {"seconds": t, "cpu_seconds": result["cpu"], "events_per_s": res["events"] / t}
+
+
+def bench_render(frames: int = 300):
+    """Rendering paths on the fake Tk layer: time per call and Tk calls per call."""
+    with tempfile.TemporaryDirectory() as tmp:
+        game, fake = make_game(tmp); out = {}
+        try:
+            game.state.gold = 1e9; game.state.total_earned = 1e12; game.state.prestige_shards = 40
+            game._sync_particles_to_shards()
+
+            def measure(key, fn, n):
+                c0 = fake.calls; t = _best(lambda: [fn() for _ in range(n)]) / n
+                out[f"{key}_us"] = t * 1e6; out[f"{key}_tk_calls"] = (fake.calls - c0) / (n * REPEATS)
+
+            measure("update_particles", lambda: game._update_particles(1 / 30), frames)
+            tap = game.tap_btn; sizes = iter(range(10**9))
+            measure("tap_draw_hover", lambda: tap._draw(hover=bool(next(sizes) & 1)), frames)
+            def resize():
+                fake.width = 600 + (next(sizes) % 40) * 4; tap._draw()
+            measure("tap_draw_resize", resize, 40); fake.width = 760
+            for name in game.state.economy.names[:12]: game.state.upgrades[name] = 10
+            game._recompute_discovery(from_save=True)
+            measure("upgrade_visibility", lambda: (game._update_upgrade_visibility(), game.binder.flush()), frames)
+            def buy_and_refresh():   # a purchase changes counts, costs and affordability: rows must re-render
+                game.state.gold = 1e9; game.state.buy(names[next(sizes) % 12], 1)
+                game._update_upgrade_visibility(); game.binder.flush()
+            names = game.state.economy.names
+            measure("upgrade_visibility_dirty", buy_and_refresh, frames)
+            def tap_burst():   # 30 taps inside one frame (auto-clicker), then that frame's flush
+                for _ in range(30): game.on_tap()
+                game._flush_taps(); game.binder.flush()
+            measure("tap_burst_30", tap_burst, 40)
+            c0 = fake.calls; fake.run_after(10_000)   # ten seconds of the real after() loops
+            out["loop_10s_tk_calls"] = fake.calls - c0
+        finally:
+            game.store.close(timeout=2.0)
+    return out
+
+
+BENCHMARKS = {
+    "format_num": bench_format_num, "costs": bench_costs, "buy_max": bench_buy_max,
+    "check_achievements": bench_check_achievements, "recalc_cps": bench_recalc_cps,
+    "sim_24h": bench_sim_24h, "replay_6h": bench_replay, "render": bench_render,
+}
+# Metrics where smaller is better; anything else (ticks_per_s) is compared the other way, a few are informative only.
+HIGHER_IS_BETTER = ("ticks_per_s", "events_per_s")
+INFORMATIVE = ("total_earned_log10",)
+
+
+def run(only=None) -> dict:
+    random.seed(0)
+    results = {}
+    for name, fn in BENCHMARKS.items():
+        if only and name not in only: continue
+        results[name] = fn(); print(f"{name:20s} " + "  ".join(f"{k}={v:.4g}" for k, v in results[name].items()), flush=True)
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float = THRESHOLD):
+    """[(bench, metric, baseline, current, ratio)] for every metric worse than baseline by more than `threshold`."""
+    worse = []
+    for bench, metrics in current.items():
+        for key, value in metrics.items():
+            ref = baseline.get(bench, {}).get(key)
+            if ref is None or key in INFORMATIVE or not ref: continue
+            ratio = (ref / value if value else float("inf")) if key in HIGHER_IS_BETTER else value / ref
+            if ratio > 1.0 + threshold: worse.append((bench, key, ref, value, ratio))
+    return worse
+
+
+def main(argv) -> int:
+    def opt(flag, default):
+        return argv[argv.index(flag) + 1] if flag in argv[:-1] else default
+    path = opt("--baseline", BASELINE_FILE); threshold = float(opt("--threshold", THRESHOLD))
+    only = set(opt("--only", "").split(",")) - {""}
+    results = run(only)
+    if "--json" in argv: print(json.dumps(results, indent=1))
+    if "--save" in argv:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "created": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results}, f, indent=1)
+        print(f"référence écrite : {path}")
+    if "--check" in argv:
+        if not os.path.exists(path): print(f"pas de référence ({path}) : lancer d'abord --save"); return 2
+        with open(path, "r", encoding="utf-8") as f: baseline = json.load(f)["results"]
+        worse = compare(results, baseline, threshold)
+        for bench, key, ref, value, ratio in worse:
+            print(f"RÉGRESSION {bench}.{key}: {ref:.4g} -> {value:.4g} (x{ratio:.2f})")
+        print("ok" if not worse else f"{len(worse)} régression(s) au-delà de {threshold:.0%}")
+        return 1 if worse else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
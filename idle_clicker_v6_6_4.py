@@ -5,141 +5,548 @@ Idle Clicker v6.6.4 — CPC coût dynamique + TAP visible immédiatement
 - Le coût d'**Améliorer le TAP (+1)** se met à jour en temps réel.
 - Le bouton **TAPER !** s'affiche dès le lancement (redraw sur <Configure> + after(0)).
 - Sauvegarde robuste (schéma v670), anti-jiggle conservé.
+- Démarrage par étapes : chips + TAP d'abord ; sauvegarde, lignes, particules (NumPy) et thème ensuite.
+- Taps appliqués immédiatement, affichage regroupé une fois par frame (« +X ×N ») ; auto-tap : --autotap [HZ].
+- Une seule boucle `after` (FrameScheduler) : tâches par frame avec priorités, budget mesuré ; au-delà,
+  le gouverneur de qualité réduit particules, étiquettes flottantes et ondulations, puis les rétablit.
+- Enregistrement des entrées (--record fichier [--seed N]) et rejeu au rythme enregistré
+  (--replay fichier [--speed X]) ; effets visuels tirés d'un aléa à graine (RNG), voir idle_replay.py.
 """
+import time
+_T_START = time.perf_counter()   # --startup-trace origin
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk
 from tkinter import font as tkfont
-import time, json, os, math, random, sys, shutil
+import json, os, math, random, sys, shutil, heapq, tempfile
+from array import array
+
+from idle_numbers import BigNum, log10, format_num, format_duration, FORMAT_MODES
+from idle_core import Economy, GameState, LogicClock, BuyAdvisor, PrestigePlanner, SCHEMA_VERSION, OFFLINE_HOURS_CAP, BUY_MODES
+from idle_storage import SaveStore, SqliteStore
+from idle_perf import PerfRecorder
+from idle_replay import Recorder, ReplayDriver, open_log, TAP, TAPS, PRESTIGE, RESET, AUTOPILOT, FORMAT, END
+
+# Heavy optional imports are resolved during staged startup, after the first paint.
+tb = None; THEME_AVAILABLE = None    # ttkbootstrap, see _load_theme()
+np = None; NUMPY_AVAILABLE = False   # numpy, see _load_numpy()
+
+def _load_theme() -> bool:
+    global tb, THEME_AVAILABLE
+    if THEME_AVAILABLE is None:
+        try:
+            import ttkbootstrap as tb
+            THEME_AVAILABLE = True
+        except Exception:
+            THEME_AVAILABLE = False
+    return THEME_AVAILABLE
 
-try:
-    import ttkbootstrap as tb
-    THEME_AVAILABLE = True
-except Exception:
-    THEME_AVAILABLE = False
+def _load_numpy() -> bool:
+    global np, NUMPY_AVAILABLE
+    if np is None and not NUMPY_AVAILABLE:
+        try:
+            import numpy as np
+            NUMPY_AVAILABLE = True
+        except Exception:
+            NUMPY_AVAILABLE = False
+    return NUMPY_AVAILABLE
 
 APP_TITLE = "Idle Clicker v6.6.4 — Python"
-SAVE_FILE = "idle_save.json"
-SCHEMA_VERSION = 670
-OFFLINE_HOURS_CAP = 12
+SAVE_FILE = "idle_save.json"   # legacy v670 JSON save (working directory), imported once
+SAVE_BASE = "idle_save"        # journal backend: idle_save.snap + idle_save.journal
+SAVE_DIR = os.environ.get("IDLE_CLICKER_HOME") or os.path.join(os.path.expanduser("~"), ".idle_clicker")
+SAVE_DB = os.path.join(SAVE_DIR, "idle_saves.db")   # sqlite backend: every profile + snapshot history
+SAVE_BACKEND = "sqlite"        # "sqlite" | "journal"
+SAVE_FSYNC = "interval"        # "always" | "interval" | "never"
+PERF_TRACE = os.environ.get("IDLE_PROFILE", "")   # "1" or an output prefix; also --profile [prefix]
+AUTOSAVE_SECONDS = 5.0         # periodic gold checkpoint into the journal
+STARTUP_KICK_MS = 250          # staged startup begins at first paint, or after this at the latest
+AUTOTAP_HZ = 20.0              # in-process auto-tap rate (--autotap [HZ])
 BASE_PARTICLE_CAP = 120
-
-def format_num(n: float) -> str:
-    try: n = float(n)
-    except Exception: return "0"
-    suffixes = ["", "K", "M", "B", "T", "Qa", "Qi", "Sx", "Sp", "Oc", "No", "De"]
-    if abs(n) < 1000:
-        if abs(n - int(n)) < 1e-6: return str(int(n))
-        return f"{n:.1f}"
-    magnitude = int(math.log(max(abs(n), 1), 1000))
-    magnitude = min(magnitude, len(suffixes)-1)
-    value = n / (1000 ** magnitude)
-    if value >= 100: return f"{value:.0f}{suffixes[magnitude]}"
-    if value >= 10:  return f"{value:.1f}{suffixes[magnitude]}"
-    return f"{value:.2f}{suffixes[magnitude]}"
+CONFETTI_CAP = 50
+LOGIC_HZ = 10     # fixed-timestep income ticks
+DISPLAY_HZ = 1    # chips / rows / "+X" pulse
+BUY_MODE_LABELS = {"x10": "x10", "x100": "x100", "max": "Max", "palier": "Palier"}
+UPGRADE_ROW_H = 76   # fixed row pitch of the virtualised lists (px, gap included)
+ACH_ROW_H = 34
+FORMAT_LABELS = {"suffix": "Suffixes", "scientific": "Scientifique", "engineering": "Ingénieur"}
+FRAME_MS = 33            # FrameScheduler period (~30 fps)
+FRAME_BUDGET_MS = 12.0   # per-frame work above which the quality governor steps down
+# Quality governor levels, lowest first: particle cap factor, float labels spawned every N frames,
+# ripples (max live, speed factor; 0 = none).
+QUALITY_PRESETS = (
+    {"particles": 0.0, "float_every": 6, "ripples": (0, 1.0)},
+    {"particles": 0.35, "float_every": 3, "ripples": (1, 2.5)},
+    {"particles": 0.7, "float_every": 2, "ripples": (3, 1.5)},
+    {"particles": 1.0, "float_every": 1, "ripples": (8, 1.0)},
+)
+
+RNG = random.Random()   # every visual random draw (particles, confetti, float jitter); seeded by --seed / a replay
 
 def clamp01(x: float) -> float:
     try: return max(0.0, min(1.0, float(x)))
     except Exception: return 0.0
 
 class FancyTap(tk.Canvas):
-    """Canvas button with ripple click animation (pure paint, no geometry change)."""
-    def __init__(self, master, text, command, **kw):
+    """Canvas button with ripple click animation (pure paint, no geometry change).
+
+    Retained mode: the gradient is prerendered once per (size, state) into a cached PhotoImage, and the
+    border, label and ripple ovals are persistent items that are only moved or re-imaged. Only a real
+    resize rebuilds the item set."""
+    STATE_BASE = {"idle": 105, "hover": 120, "pressed": 95}
+
+    def __init__(self, master, text, command, scheduler, **kw):
         super().__init__(master, width=200, height=56, highlightthickness=0, bg=kw.get("bg","#0b0f24"))
-        self.command = command; self.text = text; self._pressed = False
+        self.command = command; self.text = text; self._pressed = False; self._hover = False
+        self._size = None; self._state = None; self._bg_item = None
+        self._gradients = {}  # (w, h, state) -> PhotoImage, for the current size only
+        self._ripples = []  # [item, r, maxr, alpha]
+        self._ripple_pool = []; self.scheduler = scheduler
+        self.ripple_limit = 8; self.ripple_speed = 1.0   # ripple detail, lowered by the quality governor
         self.bind("<Button-1>", self._on_press); self.bind("<ButtonRelease-1>", self._on_release)
         self.bind("<Enter>", lambda e: self._draw(hover=True)); self.bind("<Leave>", lambda e: self._draw(hover=False))
-        self.bind("<Configure>", lambda e: self._draw())  # redraw when getting real size
-        self._ripples = []  # (r, maxr, alpha)
+        self.bind("<Configure>", lambda e: self._draw())  # rebuilds only if the size really changed
         self._draw()
         self.after(0, self._draw)  # ensure first paint after layout
 
+    def _dims(self):
+        w = self.winfo_width(); h = self.winfo_height()
+        return (w if w > 1 else 200), (h if h > 1 else 56)
+
     def _rounded_rect(self, x1,y1,x2,y2,r, **kw):
         self.create_arc(x1, y1, x1+2*r, y1+2*r, start=90, extent=90, style="pieslice", **kw)
         self.create_arc(x2-2*r, y1, x2, y1+2*r, start=0, extent=90, style="pieslice", **kw)
         self.create_arc(x1, y2-2*r, x1+2*r, y2, start=180, extent=90, style="pieslice", **kw)
         self.create_arc(x2-2*r, y2-2*r, x2, y2, start=270, extent=90, style="pieslice", **kw)
         self.create_rectangle(x1+r, y1, x2-r, y2, **kw); self.create_rectangle(x1, y1+r, x2, y2-r, **kw)
-    def _draw(self, hover=False):
-        self.delete("all")
-        w = self.winfo_width() or 200; h = self.winfo_height() or 56; r = 16
-        for i in range(h):
-            t = i/max(1,h-1)
-            base = 95 if self._pressed else (120 if hover else 105)
-            rcol = 20 + int(20*t); gcol = 30 + int(30*t); bcol = base + int(60*t)
-            self.create_line(6, i+6, w-6, i+6, fill=f"#{rcol:02x}{gcol:02x}{bcol:02x}")
-        self._rounded_rect(4,4,w-4,h-4,r, outline="#7c83ff", width=2)
+
+    def _gradient(self, w, h, state):
+        img = self._gradients.get((w, h, state))
+        if img is None:
+            img = tk.PhotoImage(master=self, width=w, height=h)
+            base = self.STATE_BASE[state]
+            for i in range(max(0, h-6)):
+                t = i/max(1,h-1)
+                rcol = 20 + int(20*t); gcol = 30 + int(30*t); bcol = base + int(60*t)
+                img.put(f"#{rcol:02x}{gcol:02x}{bcol:02x}", to=(6, i+6, max(7, w-6), i+7))
+            self._gradients[(w, h, state)] = img
+        return img
+
+    def _layout(self, w, h):
+        self.delete("all"); self._gradients.clear()
+        self._ripples = []; self._ripple_pool = []
+        self._size = (w, h); self._state = None
+        self._bg_item = self.create_image(0, 0, anchor="nw")
+        self._rounded_rect(4,4,w-4,h-4,16, outline="#7c83ff", width=2)
         self.create_text(w//2, h//2, text=self.text, fill="#e6e9ff", font=("Arial", 15, "bold"))
-        if self._ripples:
-            cx, cy = w//2, h//2
-            for r_now, r_max, a in list(self._ripples):
-                self.create_oval(cx-r_now, cy-r_now, cx+r_now, cy+r_now, outline="#7c83ff", width=2)
+
+    def _draw(self, hover=None):
+        if hover is not None: self._hover = hover
+        w, h = self._dims()
+        if self._size != (w, h): self._layout(w, h)
+        state = "pressed" if self._pressed else ("hover" if self._hover else "idle")
+        if state != self._state:
+            self.itemconfigure(self._bg_item, image=self._gradient(w, h, state)); self._state = state
+
     def _on_press(self, e): self._pressed = True; self._draw(hover=True)
     def _on_release(self, e):
         if self._pressed and self.command:
             self._spawn_ripple()
             self.command()
         self._pressed = False; self._draw(hover=True)
+
     def _spawn_ripple(self):
-        w = self.winfo_width() or 200; h = self.winfo_height() or 56
+        if self.ripple_limit <= 0: return
+        if len(self._ripples) >= self.ripple_limit:   # at the cap: restart the oldest ring
+            item = self._ripples.pop(0)[0]
+        else:
+            item = self._ripple_pool.pop() if self._ripple_pool else self.create_oval(0, 0, 0, 0, outline="#7c83ff", width=2)
+            self.itemconfigure(item, state="normal")
+        w, h = self._dims()
         maxr = int(min(w, h)/2)-6
-        self._ripples.append((6, maxr, 1.0))
-        def step():
-            new = []
-            for r_now, r_max, a in self._ripples:
-                r_now += max(2, r_max/10.0); a -= 0.12
-                if a > 0 and r_now < r_max: new.append((r_now, r_max, a))
-            self._ripples[:] = new
-            self._draw(hover=True)
-            if new: self.after(16, step)
-        self.after(0, step)
+        self.coords(item, w//2-6, h//2-6, w//2+6, h//2+6)
+        self._ripples.append([item, 6, maxr, 1.0])
+        self.scheduler.add(str(self), self._step_ripples, 30)   # task named after the widget path
+
+    def _step_ripples(self, dt: float) -> bool:
+        """Frame task shared by every live ripple (paced as the former 16 ms steps); False once none is left."""
+        w, h = self._dims(); cx, cy = w//2, h//2
+        k = min(dt, 0.05) / 0.016 * self.ripple_speed
+        alive = []
+        for rp in self._ripples:
+            item, r_now, r_max, a = rp
+            r_now += max(2, r_max/10.0) * k; a -= 0.12 * k
+            if a > 0 and r_now < r_max:
+                rp[1] = r_now; rp[3] = a; alive.append(rp)
+                self.coords(item, cx-r_now, cy-r_now, cx+r_now, cy+r_now)
+            else:
+                self.itemconfigure(item, state="hidden"); self._ripple_pool.append(item)
+        self._ripples = alive
+        return bool(alive)
+
+class ParticleField:
+    """Retained-mode particles for the shard canvas.
+
+    Canvas ovals are created once per slot and then only moved (`coords`) or hidden, never
+    deleted/recreated. Positions, velocities and lifetimes live in contiguous arrays (NumPy when
+    available, array('d') otherwise) and advance in one vectorized step; only ovals whose rounded
+    position changed are sent to Tk. Slots come from a free pool shared by shard particles
+    (respawn forever) and confetti (released when their life ends)."""
+
+    def __init__(self, canvas, capacity: int, fill="#8aa5ff"):
+        self.canvas = canvas; self.capacity = capacity; self.fill = fill
+        self.vec = NUMPY_AVAILABLE   # backend chosen once, at construction
+        self.x, self.y, self.vx, self.vy, self.life = (self._zeros() for _ in range(5))
+        self.px, self.py = self._zeros(), self._zeros()   # last drawn (rounded) position
+        self.items = [None] * capacity
+        self.kind = bytearray(capacity)                  # 0 = free, 1 = shard, 2 = confetti
+        self.free = list(range(capacity - 1, -1, -1))
+        self.ambient = []                                 # slots held by shard particles
+        self.coords_calls = 0
+
+    def _zeros(self):
+        return np.zeros(self.capacity) if self.vec else array("d", bytes(8 * self.capacity))
+
+    @property
+    def active(self) -> int:
+        return self.capacity - len(self.free)
+
+    # Pool ---------------------------------------------
+    def _acquire(self, kind: int):
+        if not self.free: return None
+        i = self.free.pop(); self.kind[i] = kind
+        self.px[i] = self.py[i] = -1.0
+        if self.items[i] is None:
+            self.items[i] = self.canvas.create_oval(0, 0, 0, 0, fill=self.fill, outline="", tags="p")
+        else:
+            self.canvas.itemconfigure(self.items[i], state="normal")
+        return i
+
+    def _release(self, i: int):
+        self.kind[i] = 0; self.life[i] = 0.0; self.free.append(i)
+        self.canvas.itemconfigure(self.items[i], state="hidden")
+
+    def _spawn(self, i, w, h):
+        self.x[i] = RNG.randint(10, max(20, w-10)); self.y[i] = RNG.randint(6, max(12, h-6))
+        self.vx[i] = RNG.uniform(-0.2, 0.2); self.vy[i] = RNG.uniform(-0.1, 0.1); self.life[i] = RNG.uniform(1.0, 3.0)
+
+    def set_ambient(self, n: int, w: int, h: int):
+        while len(self.ambient) < n:
+            i = self._acquire(1)
+            if i is None: break
+            self._spawn(i, w, h); self.ambient.append(i)
+        while len(self.ambient) > n:
+            self._release(self.ambient.pop())
+
+    def burst(self, n: int, w: int):
+        for _ in range(n):
+            i = self._acquire(2)
+            if i is None: break
+            self.x[i] = RNG.randint(0, w); self.y[i] = 0
+            self.vx[i] = RNG.uniform(-1.0, 1.0); self.vy[i] = RNG.uniform(1.0, 2.5); self.life[i] = RNG.uniform(0.8, 1.8)
+
+    # Step ---------------------------------------------
+    def step(self, dt: float, w: int, h: int):
+        if self.active == 0: return
+        k = 60 * dt
+        if self.vec:
+            live = np.frombuffer(self.kind, dtype=np.uint8) != 0
+            self.life[live] -= dt
+            dead = np.flatnonzero(live & (self.life <= 0)).tolist()
+        else:
+            live = None; dead = []
+            for i in range(self.capacity):
+                if self.kind[i]:
+                    self.life[i] -= dt
+                    if self.life[i] <= 0: dead.append(i)
+        for i in dead:
+            if self.kind[i] == 1: self._spawn(i, w, h)
+            else: self._release(i)
+        if self.vec:
+            live = np.frombuffer(self.kind, dtype=np.uint8) != 0
+            self.x += self.vx * k; self.y += self.vy * k
+            rx = np.rint(self.x); ry = np.rint(self.y)
+            moved = np.flatnonzero(live & ((rx != self.px) | (ry != self.py)))
+            self.px[moved] = rx[moved]; self.py[moved] = ry[moved]
+            size = 2 + (self.y[moved] / h) * 2.5
+            rows = zip(moved.tolist(), (self.x[moved] - size).tolist(), (self.y[moved] - size).tolist(),
+                       (self.x[moved] + size).tolist(), (self.y[moved] + size).tolist())
+        else:
+            rows = []
+            for i in range(self.capacity):
+                if not self.kind[i]: continue
+                x = self.x[i] = self.x[i] + self.vx[i] * k; y = self.y[i] = self.y[i] + self.vy[i] * k
+                rx = float(round(x)); ry = float(round(y))
+                if rx == self.px[i] and ry == self.py[i]: continue
+                self.px[i] = rx; self.py[i] = ry; size = 2 + (y/h)*2.5
+                rows.append((i, x-size, y-size, x+size, y+size))
+        coords = self.canvas.coords; items = self.items
+        for i, x0, y0, x1, y1 in rows:
+            coords(items[i], x0, y0, x1, y1); self.coords_calls += 1
+
+class FloatPool:
+    """Fixed-size pool of reusable floating "+X" labels.
+
+    Spawns are queued and flushed by the shared float frame task (IdleGame._float_step): several spawns
+    within one step merge into a single "+X" label (shown as "+X ×N", X per unit, when `counted`),
+    and when every label is busy the oldest one is recycled. The anchor is cached by the owner and
+    only refreshed on <Configure>."""
+
+    def __init__(self, parent, size: int, steps: int, jitter: int = 0, counted: bool = False, rise: int = 3, **label_kw):
+        self.parent = parent; self.size = size; self.steps = steps; self.jitter = jitter; self.counted = counted; self.rise = rise
+        self.label_kw = label_kw
+        self.labels = []; self.idle = []; self.active = []  # active: [label, x, y, step]
+        self.anchor = (0, 0); self.pending = 0.0; self.pending_n = 0; self.merged = 0
+
+    def add(self, value: float, n: int = 1):
+        """Queue `value`, worth `n` units (taps) for the "×N" suffix."""
+        self.pending += value; self.pending_n += n
+
+    def _acquire(self):
+        if self.idle: return self.idle.pop()
+        if len(self.labels) < self.size:
+            lbl = tk.Label(self.parent, **self.label_kw); self.labels.append(lbl); return lbl
+        return self.active.pop(0)[0]   # pool exhausted: recycle the oldest
+
+    def step(self, spawn: bool = True) -> bool:
+        """Spawn the merged pending value (unless `spawn` is False: it keeps merging), advance every
+        live label; True while anything is on screen or pending."""
+        if spawn and self.pending_n:
+            self.merged += self.pending_n - 1
+            n = self.pending_n
+            text = f"+{format_num(self.pending / n)} ×{n}" if self.counted and n > 1 else f"+{format_num(self.pending)}"
+            lbl = self._acquire(); lbl.configure(text=text)
+            x = self.anchor[0] + (RNG.randint(-self.jitter, self.jitter) if self.jitter else 0)
+            self.active.append([lbl, x, self.anchor[1], 0])
+            self.pending = 0.0; self.pending_n = 0
+        still = []
+        for slot in self.active:
+            lbl, x, y, i = slot
+            if i >= self.steps: lbl.place_forget(); self.idle.append(lbl); continue
+            lbl.place(x=x, y=y - i*self.rise); slot[3] = i + 1; still.append(slot)
+        self.active = still
+        return bool(self.active) or self.pending_n > 0
+
+class VirtualList:
+    """Scrolling list that only materialises the rows in the viewport (plus `margin` on each side).
+
+    Rows have a fixed height and live as canvas windows; rows leaving the viewport go back to a pool
+    and are re-bound to whichever index scrolls in. `make_row(parent)` builds one row and returns its
+    handle (a dict with at least "frame"); `bind_row(handle, index)` fills it for item `index`."""
+
+    def __init__(self, parent, row_height: int, make_row, bind_row, bg: str, margin: int = 2, gap: int = 6, **canvas_kw):
+        self.row_height = row_height; self.make_row = make_row; self.bind_row = bind_row; self.margin = margin; self.gap = gap
+        self.canvas = tk.Canvas(parent, bg=bg, highlightthickness=0, **canvas_kw)
+        self.scrollbar = tk.Scrollbar(parent, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_view)
+        self.canvas.bind("<Configure>", self._on_resize)
+        self.count = 0; self.width = 1; self.live = {}; self.pool = []   # live: index -> handle
+        self.made = 0; self.bound = 0
+
+    def pack(self):
+        self.canvas.pack(side="left", fill="both", expand=True); self.scrollbar.pack(side="right", fill="y")
+
+    def set_count(self, n: int, rebind: bool = False):
+        """New item count; `rebind` also re-fills the live rows (items changed under them)."""
+        self.count = n
+        self.canvas.configure(scrollregion=(0, 0, self.width, n * self.row_height))
+        if rebind:
+            for i in list(self.live): self._release(i)
+        self.refresh()
+
+    def visible(self):
+        """(index, handle) pairs currently materialised."""
+        return self.live.items()
+
+    def refresh(self):
+        top = max(0, int(self.canvas.canvasy(0))); h = max(self.row_height, self.canvas.winfo_height())
+        first = max(0, top // self.row_height - self.margin)
+        last = min(self.count, (top + h) // self.row_height + 1 + self.margin)
+        for i in [i for i in self.live if i < first or i >= last]: self._release(i)
+        for i in range(first, last):
+            if i not in self.live: self._acquire(i)
+
+    def _acquire(self, i: int):
+        if self.pool: handle = self.pool.pop()
+        else:
+            handle = self.make_row(self.canvas); self.made += 1
+            handle["_item"] = self.canvas.create_window(0, 0, window=handle["frame"], anchor="nw",
+                                                        width=self.width, height=self.row_height - self.gap)
+        self.canvas.coords(handle["_item"], 0, i * self.row_height + self.gap // 2)
+        self.canvas.itemconfigure(handle["_item"], state="normal")
+        self.live[i] = handle; self.bind_row(handle, i); self.bound += 1
+
+    def _release(self, i: int):
+        handle = self.live.pop(i); self.canvas.itemconfigure(handle["_item"], state="hidden"); self.pool.append(handle)
+
+    def _on_view(self, first, last):
+        self.scrollbar.set(first, last); self.refresh()
+
+    def _on_resize(self, e):
+        if e.width != self.width:
+            self.width = e.width
+            for handle in list(self.live.values()) + self.pool: self.canvas.itemconfigure(handle["_item"], width=e.width)
+            self.canvas.configure(scrollregion=(0, 0, self.width, self.count * self.row_height))
+        self.refresh()
+
+    def scroll(self, units: int):
+        self.canvas.yview_scroll(units, "units")
+
+class FrameScheduler:
+    """The single `after` chain behind every animation and the logic pump.
+
+    Subsystems register per-frame tasks `fn(dt)` with a priority (lower runs first); a task that
+    returns False is dropped until it registers again. `later(seconds, fn)` runs one-shots on the
+    first frame after they are due. Each frame's work is timed: while its moving average stays
+    above the budget the quality governor steps down one level (listeners then shed particles,
+    float labels and ripples), and after a few seconds of ample headroom it steps back up."""
+    __slots__ = ("root", "period_ms", "budget_ms", "tasks", "_order", "timers", "_seq", "job", "_last",
+                 "levels", "quality", "avg_ms", "_over", "_under", "listeners", "frames")
+    DOWN_FRAMES = 10    # consecutive over-budget frames before a step down
+    UP_FRAMES = 90      # consecutive frames under HEADROOM × budget before a step up
+    HEADROOM = 0.5
+
+    def __init__(self, root, period_ms: int = FRAME_MS, budget_ms: float = FRAME_BUDGET_MS, levels: int = len(QUALITY_PRESETS)):
+        self.root = root; self.period_ms = period_ms; self.budget_ms = budget_ms
+        self.tasks = {}; self._order = None; self.timers = []; self._seq = 0; self.job = None; self._last = None
+        self.levels = levels; self.quality = levels - 1; self.avg_ms = 0.0; self._over = self._under = 0
+        self.listeners = []; self.frames = 0   # listeners: callables(quality) told on every level change
+
+    def add(self, name: str, fn, priority: int = 50):
+        """Run `fn(dt)` every frame (re-adding an existing name just keeps it)."""
+        if name not in self.tasks: self.tasks[name] = (priority, fn); self._order = None
+
+    def remove(self, name: str):
+        if self.tasks.pop(name, None) is not None: self._order = None
+
+    def later(self, seconds: float, fn):
+        heapq.heappush(self.timers, (time.monotonic() + seconds, self._seq, fn)); self._seq += 1
+
+    def start(self):
+        if self.job is None: self._last = time.monotonic(); self.job = self.root.after(self.period_ms, self._frame)
+
+    def _frame(self):
+        t0 = time.perf_counter(); now = time.monotonic(); dt = now - self._last; self._last = now
+        try:
+            timers = self.timers
+            while timers and timers[0][0] <= now: heapq.heappop(timers)[2]()
+            if self._order is None: self._order = sorted(self.tasks.items(), key=lambda kv: kv[1][0])
+            for name, (_prio, fn) in self._order:
+                if fn(dt) is False: self.remove(name)
+        finally:
+            work = (time.perf_counter() - t0) * 1e3; self.frames += 1
+            self._govern(work)
+            self.job = self.root.after(max(1, self.period_ms - int(work)), self._frame)
+
+    def _govern(self, work_ms: float):
+        self.avg_ms += (work_ms - self.avg_ms) * 0.2
+        if self.avg_ms > self.budget_ms: self._over += 1; self._under = 0
+        elif self.avg_ms < self.budget_ms * self.HEADROOM: self._under += 1; self._over = 0
+        else: self._over = self._under = 0
+        if self._over >= self.DOWN_FRAMES and self.quality > 0: self.set_quality(self.quality - 1)
+        elif self._under >= self.UP_FRAMES and self.quality < self.levels - 1: self.set_quality(self.quality + 1)
+
+    def set_quality(self, level: int):
+        self.quality = max(0, min(self.levels - 1, level)); self._over = self._under = 0
+        for cb in self.listeners: cb(self.quality)
+
+class Binder:
+    """Diffing layer in front of Tk: each (widget, property) keeps its last value, so only real
+    changes cost a Tk call. Layout flushes requested during a frame collapse into one."""
+    __slots__ = ("root", "_last", "_layout_dirty", "tk_calls", "skipped", "frame_calls")
+
+    def __init__(self, root):
+        self.root = root; self._last = {}; self._layout_dirty = False
+        self.tk_calls = 0; self.skipped = 0; self.frame_calls = 0
+
+    def set(self, var, value):
+        key = str(var)
+        if self._last.get(key) == value: self.skipped += 1; return
+        self._last[key] = value; var.set(value); self.tk_calls += 1; self.frame_calls += 1
+
+    def configure(self, widget, **opts):
+        path = str(widget); changed = {}
+        for opt, value in opts.items():
+            key = (path, opt)
+            if self._last.get(key) == value: self.skipped += 1; continue
+            self._last[key] = value; changed[opt] = value
+        if changed:
+            widget.configure(**changed); self.tk_calls += 1; self.frame_calls += 1
+
+    def forget(self, widget, *opts):
+        """Drop cached values after a direct Tk write (e.g. a flash animation) so the next set goes through."""
+        path = str(widget)
+        for opt in opts: self._last.pop((path, opt), None)
+
+    def request_layout(self): self._layout_dirty = True
+
+    def flush(self):
+        """Once per frame: run pending geometry work if anything asked for it."""
+        if self._layout_dirty:
+            self._layout_dirty = False
+            try: self.root.update_idletasks()
+            except Exception: pass
+            self.tk_calls += 1; self.frame_calls += 1
+
+    def take_frame_calls(self) -> int:
+        n = self.frame_calls; self.frame_calls = 0
+        return n
+
+def _state_attr(name):
+    """Expose a GameState field as an IdleGame attribute (the UI reads/writes the headless core)."""
+    return property(lambda self: getattr(self.state, name), lambda self, v: setattr(self.state, name, v))
 
 class IdleGame:
-    def __init__(self, root: tk.Tk):
+    gold = _state_attr("gold"); total_earned = _state_attr("total_earned")
+    cpc = _state_attr("cpc"); cpc_level = _state_attr("cpc_level"); cps = _state_attr("cps")
+    prestige_shards = _state_attr("prestige_shards"); prestige_spent_levels = _state_attr("prestige_spent_levels")
+    upgrades = _state_attr("upgrades"); discovered = _state_attr("discovered")
+    achievements = _state_attr("achievements"); last_time = _state_attr("last_time")
+
+    def __init__(self, root: tk.Tk, logic_hz: float = LOGIC_HZ, display_hz: float = DISPLAY_HZ, player: str = "default",
+                 perf: PerfRecorder = None, perf_prefix: str = "idle_profile", staged: bool = True, startup_trace: bool = False,
+                 economy: Economy = None, autotap: bool = False, autotap_hz: float = AUTOTAP_HZ,
+                 record: str = None, replay: str = None, replay_speed: float = 1.0, seed: int = None):
         self.root = root
-        self.root.title(APP_TITLE)
+        self.startup_trace = startup_trace; self._t_init = time.perf_counter(); self._stage_times = []; self._t_first_paint = None
+        self.perf = perf; self.perf_prefix = perf_prefix   # opt-in instrumentation (None = nothing patched)
+        self.player = player; self.root.title(APP_TITLE if player == "default" else f"{APP_TITLE} — {player}")
         self.root.geometry("760x860"); self.root.minsize(660, 740)
 
-        # --- State ---
-        self.gold = 0.0; self.total_earned = 0.0
-        self.cpc = 1.0; self.cpc_level = 0
-        self.prestige_shards = 0; self.prestige_spent_levels = 0
-        self.achievements = set(); self.last_time = time.time()
+        # --- Input recording / replay (idle_replay) ---
+        self.replay = open_log(replay) if replay else None   # (header, events): inputs come from the file
+        self.replay_speed = replay_speed; self.replayer = None   # ReplayDriver, set by the "loops" stage
+        if self.replay is not None: economy = Economy.from_dict(self.replay[0]["economy"]); seed = self.replay[0]["seed"]
+        if seed is None and record: seed = random.SystemRandom().randrange(1 << 32)
+        self.seed = seed
+        if seed is not None: RNG.seed(seed)
+        self.recorder = Recorder(record) if record else None   # started with the LogicClock
+
+        # --- State (headless core) ---
+        self.state = GameState(economy)   # economy: upgrade definitions (None = built-in, see --upgrades)
+        self.advisor = BuyAdvisor(self.state)   # best payback pick, highlighted in the list
+        self.planner = PrestigePlanner(self.state)   # next shard ETA + best prestige moment (shard_info_var)
+        self._shard_plan = ""   # planner text, rebuilt by the display pulse only (a purchase changes CPS)
+        if self.replay is not None:   # a replay never touches the player's saves
+            self.store = SaveStore(os.path.join(tempfile.mkdtemp(prefix="idle_replay_"), SAVE_BASE), fsync="never")
+        else:
+            self.store = (SqliteStore(SAVE_DB, profile=player, fsync=SAVE_FSYNC) if SAVE_BACKEND == "sqlite"
+                          else SaveStore(os.path.join(SAVE_DIR, SAVE_BASE), fsync=SAVE_FSYNC))
+        self._next_autosave = time.monotonic() + AUTOSAVE_SECONDS
+        self.binder = Binder(root); self.tk_calls_last_tick = 0
+        self.frames = FrameScheduler(root)   # one after() chain: logic pump, animations, timers
+        self._quality = QUALITY_PRESETS[-1]; self._flashing = {}; self._float_frame = 0
+        self.frames.listeners.append(self._apply_quality)
 
         # Display values
         self._disp_gold = 0.0; self._disp_cps  = 0.0; self._disp_cpc  = 1.0; self._disp_pb = 0.0
         self._decay = {"active": False, "dur": 3.0, "t": 0.0, "start": {}, "target": {}}
 
-        # Upgrades
-        self.upgrade_defs = [
-            ("Assistant", 15, 1.15, 0.1), ("Mine", 150, 1.15, 1.0), ("Usine", 1200, 1.15, 8.0),
-            ("Ville", 15000, 1.15, 50.0), ("Fusée", 250000, 1.15, 350.0), ("Station Orbitale", 2_500_000, 1.15, 2_000.0),
-            ("Colonies Lunaires", 20_000_000, 1.15, 12_000.0), ("Réacteur à Fusion", 150_000_000, 1.15, 75_000.0),
-            ("IA Générative", 1_200_000_000, 1.15, 520_000.0), ("Ascenseur Spatial", 9_500_000_000, 1.15, 3_600_000.0),
-            ("Terraformeur", 75_000_000_000, 1.15, 24_000_000.0), ("Portail Interstellaire", 620_000_000_000, 1.15, 170_000_000.0),
-            ("Essaim Dyson", 5_000_000_000_000, 1.15, 1_250_000_000.0), ("Matériau Exotique", 40_000_000_000_000, 1.15, 9_500_000_000.0),
-            ("Fonderie Quantique", 320_000_000_000_000, 1.15, 70_000_000_000.0), ("Ancrage Dimensionnel", 2_600_000_000_000_000, 1.15, 520_000_000_000.0),
-            ("Chantier d'Étoiles", 21_000_000_000_000_000, 1.15, 3_900_000_000_000.0), ("Moteur d'Alcubierre", 170_000_000_000_000_000, 1.15, 29_000_000_000_000.0),
-            ("Oracle Chronique", 1_350_000_000_000_000_000, 1.15, 220_000_000_000_000.0), ("Forge Cosmique", 10_800_000_000_000_000_000, 1.15, 1_650_000_000_000_000.0),
-        ]
-        self.upgrades = {name: 0 for (name, *_rest) in self.upgrade_defs}
-        self.cps = 0.0
-        self.discovered = set()
-
-        # Achievements
-        self.ach_defs = {
-            "first_click": {"name": "Premier Tap", "desc": "Fais ton premier clic.", "check": lambda g: g.total_earned >= 1},
-            "cpc5": {"name": "Doigt musclé", "desc": "Atteins CPC ≥ 5.", "check": lambda g: g.cpc >= 5},
-            "cpc20": {"name": "Index d'acier", "desc": "Atteins CPC ≥ 20.", "check": lambda g: g.cpc >= 20},
-            "cps100": {"name": "Ça tourne tout seul", "desc": "Atteins CPS ≥ 100.", "check": lambda g: g.cps >= 100},
-            "cps10k": {"name": "Usine à or", "desc": "Atteins CPS ≥ 10K.", "check": lambda g: g.cps >= 10_000},
-            "mine10": {"name": "Mineur confirmé", "desc": "Avoir 10 Mines.", "check": lambda g: g.upgrades.get("Mine",0) >= 10},
-            "fusion1": {"name": "Allumage Fusion", "desc": "Acheter 1 Réacteur à Fusion.", "check": lambda g: g.upgrades.get("Réacteur à Fusion",0) >= 1},
-            "billionaire": {"name": "Milliardaire", "desc": "Gagner 1B au total.", "check": lambda g: g.total_earned >= 1_000_000_000},
-            "shard1": {"name": "Renaissance", "desc": "Gagner 1 shard.", "check": lambda g: g.prestige_shards >= 1},
-            "shard5": {"name": "Conquérant du temps", "desc": "Gagner 5 shards.", "check": lambda g: g.prestige_shards >= 5},
-            "shard10": {"name": "Seigneur des runs", "desc": "Gagner 10 shards.", "check": lambda g: g.prestige_shards >= 10},
-        }
+        # Upgrades & achievements come from the core
+        self.upgrade_defs = self.state.economy.defs
+        self.ach_defs = self.state.ach_defs
+        self.buy_mode = "max"   # second button of each upgrade row: x10 / x100 / max / palier
+        self.autotap_hz = autotap_hz
 
         # UI
         self._build_ui()
@@ -147,26 +554,88 @@ class IdleGame:
         # Trackers BEFORE any UI updates
         self._last_values = {"gold": self.gold, "cps": self.cps, "cpc": self.cpc, "mult": self.prestige_multiplier}
         self._last_upgrade_counts = dict(self.upgrades)
-        self._gold_float_labels = []
+        self._tap_gain = 0.0; self._tap_n = 0   # taps already credited, UI side effects pending (_flush_taps)
+        self._autotap_t0 = None; self._autotap_done = 0
+        if autotap: self.autotap_var.set(True); self._toggle_autotap()
+        self._particles = None; self._loaded = False   # set by the startup stages below
+        self._refresh_all_labels(); self._t_shell = time.perf_counter()
+        self.tap_btn.bind("<Expose>", self._on_first_paint, add="+")
+
+        # Staged startup: the shell above paints first; the rest runs one stage per event-loop turn,
+        # starting at the first <Expose> of the TAP button (or STARTUP_KICK_MS, whichever comes first).
+        self.logic_hz = logic_hz; self.display_period = 1.0 / display_hz
+        self._stages = [("load", self._stage_load), ("offline", self._stage_offline), ("rows", self._stage_rows),
+                        ("loops", self._stage_loops), ("particles", self._stage_particles), ("theme", self._stage_theme)]
+        self._staged = staged; self._stage_job = None
+        if staged: self._stage_job = self.root.after(STARTUP_KICK_MS, self._run_next_stage)
+        else:
+            while self._stages: self._run_next_stage()
 
-        # Load & init
-        self.load()
-        self._recompute_discovery(from_save=True)
-        self._snap_display()
-        self._update_ach_btn()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    # Startup stages -----------------------------------
+    def _on_first_paint(self, e=None):
+        if self._t_first_paint is not None: return
+        self._t_first_paint = time.perf_counter()
+        if self._stage_job is not None and not self._stage_times:   # still waiting on the fallback kick
+            self.root.after_cancel(self._stage_job); self._stage_job = self.root.after(1, self._run_next_stage)
+
+    def _run_next_stage(self):
+        self._stage_job = None
+        if not self._stages: return
+        name, fn = self._stages.pop(0); t0 = time.perf_counter()
+        fn(); self._stage_times.append((name, t0, time.perf_counter() - t0))
+        if not self._stages:
+            self._t_interactive = time.perf_counter()
+            if self.startup_trace: self._report_startup()
+        elif self._staged:
+            self._stage_job = self.root.after(1, self._run_next_stage)   # Tk redraws / handles input between stages
+
+    def _stage_load(self):
+        if self.replay is None: self._load_save(); return
+        self._restored = None; self.state.load_dict(self.replay[0]["state"]); self._loaded = True
+        self.autopilot_var.set(self.state.autopilot); self._apply_number_format()
+
+    def _stage_offline(self):
+        self._apply_offline_gain()
+
+    def _stage_rows(self):
+        self._recompute_discovery(from_save=True); self._plan_shards(); self._snap_numbers(); self._update_ach_btn()
+
+    def _stage_loops(self):
+        if self.replay is not None:
+            self.clock = self.replayer = ReplayDriver(self.state, *self.replay, speed=self.replay_speed, on_event=self._replay_event)
+        else:
+            self.clock = LogicClock(self.state, self.logic_hz)
+            if self.recorder is not None: self.recorder.start(self.state, self.clock, self.seed)
+        self._next_pulse = time.monotonic(); self._pulse_gain = 0.0
+        f = self.frames
+        f.add("logic", self._logic_tick, 0); f.add("taps", self._flush_taps, 10); f.add("anim", self._anim_tick, 20)
+        f.add("flash", self._flash_step, 50); f.add("binder", lambda dt: self.binder.flush(), 90)
+        if self.perf is not None:
+            f.add("perf", lambda dt: self.perf.frame(), 100); f.later(1.0, self._perf_tick)
+        self._logic_tick(); f.start()
+
+    def _stage_particles(self):
+        _load_numpy()
+        self._particles = ParticleField(self.anim_canvas, int(BASE_PARTICLE_CAP * 1.5) + CONFETTI_CAP)
         self._sync_particles_to_shards()
 
-        # Loops
-        self._last_anim_time = time.time()
-        self._logic_tick()
-        self._anim_tick_30fps()
-        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+    def _stage_theme(self):
+        if _load_theme():
+            try: tb.Style("superhero")
+            except Exception: pass
+
+    def _report_startup(self):
+        ms = lambda t: (t - _T_START) * 1e3
+        paint = f"{ms(self._t_first_paint):.0f} ms" if self._t_first_paint is not None else "n/a"
+        print(f"startup: imports {ms(self._t_init):.0f} ms, shell built {ms(self._t_shell):.0f} ms, "
+              f"first paint {paint}, interactive {ms(self._t_interactive):.0f} ms", file=sys.stderr)
+        for name, t0, dur in self._stage_times:
+            print(f"  stage {name:10s} at {ms(t0):7.1f} ms  took {dur * 1e3:6.1f} ms", file=sys.stderr)
 
     # ---------------- UI ----------------
     def _build_ui(self):
-        if THEME_AVAILABLE:
-            try: tb.Style("superhero")
-            except Exception: pass
         self.root.configure(bg="#0b0f24")
         self.accent="#7c83ff"; self.fg_primary="#e6e9ff"; self.fg_muted="#b8bdff"
         self.card_bg="#111635"; self.btn_bg="#171d43"; self.btn_active="#222a5b"
@@ -192,7 +661,7 @@ class IdleGame:
 
         info = tk.Frame(self.root, bg="#0b0f24"); info.pack(fill="x", padx=16)
         self.total_var=tk.StringVar(value="Gagné au total : 0")
-        self.shard_info_var=tk.StringVar(value="Shards : 0  |  Prochain palier : 10^7")
+        self.shard_info_var=tk.StringVar(value="Shards : 0  |  10^7 dans ∞")
         tk.Label(info, textvariable=self.total_var, font=("Arial", 10), fg=self.fg_muted, bg="#0b0f24").pack(side="left")
         tk.Label(info, textvariable=self.shard_info_var, font=("Arial", 10), fg=self.fg_muted, bg="#0b0f24").pack(side="right")
         pb_frame=tk.Frame(self.root, bg="#0b0f24"); pb_frame.pack(fill="x", padx=16, pady=(4,6))
@@ -210,7 +679,7 @@ class IdleGame:
         self.prestige_btn.pack(side="right", padx=(0,8))
 
         self.anim_canvas=tk.Canvas(self.root, height=52, bg="#0b0f24", highlightthickness=0)
-        self.anim_canvas.pack(fill="x", padx=0, pady=(0,4)); self._particles=[]
+        self.anim_canvas.pack(fill="x", padx=0, pady=(0,4))
 
         first_row=tk.Frame(self.root, bg="#0b0f24"); first_row.pack(fill="x", padx=16, pady=(0,8))
         self.cpc_cost_var=tk.StringVar(value="Améliorer le TAP (+1) — Coût : 10")
@@ -218,64 +687,54 @@ class IdleGame:
                                fg=self.fg_primary, bg=self.btn_bg, activebackground=self.btn_active,
                                relief="flat", bd=0, padx=12, pady=8, command=self.buy_cpc, cursor="hand2")
         self.cpc_btn.pack(side="left")
-        self.tap_btn=FancyTap(first_row, "TAPER !", command=self.on_tap, bg="#0b0f24"); self.tap_btn.pack(side="right")
+        self.tap_btn=FancyTap(first_row, "TAPER !", command=self.on_tap, scheduler=self.frames, bg="#0b0f24"); self.tap_btn.pack(side="right")
 
         list_container=tk.Frame(self.root, bg="#0b0f24"); list_container.pack(fill="both", expand=True, padx=16, pady=(0, 12))
-        tk.Label(list_container, text="Améliorations Passives (CPS)", font=("Arial", 14, "bold"), fg=self.fg_primary, bg="#0b0f24").pack(anchor="w", pady=(0,8))
+        list_hdr=tk.Frame(list_container, bg="#0b0f24"); list_hdr.pack(fill="x", pady=(0,8))
+        tk.Label(list_hdr, text="Améliorations Passives (CPS)", font=("Arial", 14, "bold"), fg=self.fg_primary, bg="#0b0f24").pack(side="left")
+        self.buy_mode_var=tk.StringVar(value=f"Achat : {BUY_MODE_LABELS[self.buy_mode]}")
+        tk.Button(list_hdr, textvariable=self.buy_mode_var, font=("Arial", 10, "bold"), fg=self.fg_primary, bg=self.btn_bg, activebackground=self.btn_active,
+                  relief="flat", bd=0, padx=10, pady=4, cursor="hand2", command=self.cycle_buy_mode).pack(side="right")
 
-        canvas=tk.Canvas(list_container, bg="#0b0f24", highlightthickness=0)
-        scrollbar=tk.Scrollbar(list_container, orient="vertical", command=canvas.yview)
-        self.scroll_frame=tk.Frame(canvas, bg="#0b0f24")
-        self.scroll_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0, 0), window=self.scroll_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        canvas.pack(side="left", fill="both", expand=True); scrollbar.pack(side="right", fill="y")
+        self.upgrade_list = VirtualList(list_container, UPGRADE_ROW_H, self._make_upgrade_row, self._bind_upgrade_row, bg="#0b0f24")
+        self.upgrade_list.pack(); self._upgrade_items = []   # names shown (discovered + next), in definition order
 
         def _on_mousewheel(event):
             if sys.platform.startswith("darwin"): delta = -1 * int(event.delta)
             else: delta = -1 * int(event.delta/120) if event.delta else 0
-            canvas.yview_scroll(delta, "units")
-        canvas.bind_all("<MouseWheel>", _on_mousewheel)
-        canvas.bind_all("<Button-4>", lambda e: canvas.yview_scroll(-1, "units"))
-        canvas.bind_all("<Button-5>", lambda e: canvas.yview_scroll(1, "units"))
-
-        self.upgrade_widgets={}
-        for name, base_cost, mult, unit_cps in self.upgrade_defs:
-            row=tk.Frame(self.scroll_frame, bg=self.card_bg, padx=12, pady=10, bd=0)
-            left=tk.Frame(row, bg=self.card_bg); left.pack(side="left", fill="x", expand=True)
-            tk.Label(left, text=name, font=("Arial", 12, "bold"), fg=self.fg_primary, bg=self.card_bg).pack(anchor="w")
-            tk.Label(left, text=f"+{format_num(unit_cps)} CPS par {name.lower()}", font=("Arial", 10), fg="#9fb1ff", bg=self.card_bg).pack(anchor="w")
-            right=tk.Frame(row, bg=self.card_bg); right.pack(side="right")
-
-            count_var=tk.StringVar(value="x0"); line_cps_var=tk.StringVar(value="+0 CPS"); cost_var=tk.StringVar(value=f"Coût : {format_num(base_cost)}")
-            count_lbl = tk.Label(right, textvariable=count_var, width=6, font=("Arial", 11, "bold"), fg=self.accent, bg=self.card_bg)
-            count_lbl.pack(side="left", padx=(0,8))
-            tk.Label(right, textvariable=line_cps_var, width=12, font=("Arial", 10, "bold"), fg=self.fg_muted, bg=self.card_bg, anchor="e").pack(side="left", padx=(0,8))
-
-            buy_btn=tk.Button(right, textvariable=cost_var, font=("Arial", 11, "bold"), fg=self.fg_primary, bg=self.btn_bg, activebackground=self.btn_active,
-                              relief="flat", bd=0, padx=10, pady=6, cursor="hand2", command=lambda n=name: self.buy_upgrade_one(n), state="disabled", disabledforeground="#6b6f99")
-            buy_btn.pack(side="left", padx=(0,6))
-            max_label = tk.StringVar(value="Max (0)")
-            max_btn=tk.Button(right, textvariable=max_label, font=("Arial", 11, "bold"), fg=self.fg_primary, bg=self.btn_bg, activebackground=self.btn_active,
-                              relief="flat", bd=0, padx=10, pady=6, cursor="hand2", command=lambda n=name: self.buy_upgrade_max(n), state="disabled", disabledforeground="#6b6f99")
-            max_btn.pack(side="left")
-
-            for b in (buy_btn, max_btn):
-                b.bind("<Enter>", lambda e, b=b: b.configure(bg=self.btn_active if str(b['state'])=='normal' else self.btn_bg))
-                b.bind("<Leave>", lambda e, b=b: b.configure(bg=self.btn_bg))
-
-            self.upgrade_widgets[name]={"row": row,"count_var": count_var,"count_lbl":count_lbl,"line_cps_var": line_cps_var,"cost_var": cost_var,
-                                        "buy_btn": buy_btn,"max_btn": max_btn,"max_label": max_label,
-                                        "base_cost": base_cost, "mult": mult, "unit_cps": unit_cps}
+            self.upgrade_list.scroll(delta)
+        self.root.bind_all("<MouseWheel>", _on_mousewheel)
+        self.root.bind_all("<Button-4>", lambda e: self.upgrade_list.scroll(-1))
+        self.root.bind_all("<Button-5>", lambda e: self.upgrade_list.scroll(1))
 
         # Footer
         footer=tk.Frame(self.root, bg="#0b0f24"); footer.pack(fill="x", pady=(0,10))
         tk.Button(footer, text="Sauvegarder", command=self.save, font=("Arial", 10, "bold"), fg=self.fg_primary, bg=self.btn_bg,
                   activebackground=self.btn_active, relief="flat", bd=0, padx=10, pady=6, cursor="hand2").pack(side="left", padx=16)
+        self.format_btn_var=tk.StringVar(value=f"Nombres : {FORMAT_LABELS[format_num.mode]}")
+        tk.Button(footer, textvariable=self.format_btn_var, command=self.cycle_number_format, font=("Arial", 10, "bold"), fg=self.fg_primary, bg=self.btn_bg,
+                  activebackground=self.btn_active, relief="flat", bd=0, padx=10, pady=6, cursor="hand2").pack(side="left", padx=(0,12))
+        self.autopilot_var=tk.BooleanVar(value=False)
+        tk.Checkbutton(footer, text="Achats auto hors-ligne", variable=self.autopilot_var, command=self._toggle_autopilot,
+                       font=("Arial", 10), fg=self.fg_muted, bg="#0b0f24", selectcolor=self.card_bg,
+                       activebackground="#0b0f24", activeforeground=self.fg_primary, bd=0, highlightthickness=0).pack(side="left")
+        self.autotap_var=tk.BooleanVar(value=False)
+        tk.Checkbutton(footer, text=f"Auto-tap ({self.autotap_hz:g}/s)", variable=self.autotap_var, command=self._toggle_autotap,
+                       font=("Arial", 10), fg=self.fg_muted, bg="#0b0f24", selectcolor=self.card_bg,
+                       activebackground="#0b0f24", activeforeground=self.fg_primary, bd=0, highlightthickness=0).pack(side="left", padx=(12,0))
         tk.Button(footer, text="Réinitialiser", command=self.reset_confirm, font=("Arial", 10, "bold"), fg="#ffb3b3", bg=self.btn_bg,
                   activebackground=self.btn_active, relief="flat", bd=0, padx=10, pady=6, cursor="hand2").pack(side="right", padx=16)
 
+        # Floating "+X" labels: two fixed pools, anchors cached and refreshed on <Configure>
+        self._gold_floats=FloatPool(self.root, 8, 8, rise=6, font=("Arial", 10, "bold"), fg="#cfe3ff", bg="#0b0f24")
+        self._tap_floats=FloatPool(self.tap_btn, 8, 7, jitter=20, counted=True, rise=6, font=("Arial", 11, "bold"), fg="#e6e9ff", bg="#0b0f24")
+        for wdg in (self.gold_chip_frame, self.gold_chip_hdr, self.tap_btn):
+            wdg.bind("<Configure>", self._refresh_float_anchors, add="+")
+
         self.banner=tk.Label(self.root, text="", font=("Arial", 14, "bold"), fg="#0b0f24", bg="#b5ffb8")
+        if self.perf is not None:   # F3 toggles the frame-time overlay
+            self.perf_lbl = tk.Label(self.root, text="", font=("Courier", 9), justify="left", anchor="nw", fg="#7CFC00", bg="#000000")
+            self.perf_visible = False; self.root.bind("<F3>", self._toggle_perf_overlay)
         self.banner.place_forget()
 
         self._refresh_all_labels()
@@ -283,95 +742,106 @@ class IdleGame:
     # ---------------- Logic ----------------
     @property
     def prestige_multiplier(self) -> float:
-        return 1.0 + 0.25 * float(self.prestige_shards)
+        return self.state.prestige_multiplier
+
+    def _input_ok(self) -> bool:
+        """Player inputs reach the state: save decoded, not replaying, recorder (if any) running."""
+        return self._loaded and self.replay is None and (self.recorder is None or self.recorder.started)
 
     def on_tap(self):
-        gain = self.cpc * (1.0 + 0.05 * self.prestige_shards)
-        self.gold += gain; self.total_earned += gain
+        """Credit the tap now; labels, floats, achievements and rows catch up once per frame."""
+        if not self._input_ok(): return   # the save is still being decoded
+        self._tap_gain += self.state.tap(); self._tap_n += 1
+        if self.recorder is not None: self.recorder.tap()
+
+    def _flush_taps(self, dt: float = 0.0):
+        """UI side effects of every tap since the last frame, applied once ("+X ×N")."""
+        n = self._tap_n
+        if not n: return
+        gain = self._tap_gain; self._tap_gain = 0.0; self._tap_n = 0
         self._snap_numbers()
-        self._floating_text_btn(f"+{format_num(gain)}")
-        self._float_over_gold(f"+{format_num(gain)}")
+        self._floating_text_btn(gain, n)
+        self._float_over_gold(gain)
         self._check_achievements(); self._update_upgrade_visibility()
 
+    def _toggle_autotap(self):
+        self._autotap_t0 = time.monotonic() if self.autotap_var.get() else None; self._autotap_done = 0
+
+    def _pump_autotap(self):
+        """Auto-taps due since the last logic tick, credited in one GameState.tap(n) (no widget work)."""
+        due = int((time.monotonic() - self._autotap_t0) * self.autotap_hz) - self._autotap_done
+        if due <= 0 or not self._input_ok(): return
+        self._autotap_done += due; due = min(due, int(self.autotap_hz) + 1)   # a stalled mainloop does not bank taps
+        self._tap_gain += self.state.tap(due); self._tap_n += due
+        if self.recorder is not None: self.recorder.tap(due)
+
     def buy_cpc(self):
-        cost=self._cpc_cost()
-        if self.gold >= cost:
-            self.gold -= cost; self.cpc_level += 1; self.cpc = 1.0 + self.cpc_level * 1.0
-            self._recalc_cps(); self._snap_numbers()
+        if not self._input_ok(): return
+        done = self.state.buy_cpc()
+        if self.recorder is not None: self.recorder.buy_cpc()
+        if done:
+            self._snap_numbers(); self._journal()
             self._show_banner("TAP amélioré !"); self._check_achievements()
         else: self._show_banner("Pas assez d'or.", ok=False)
         self._update_upgrade_visibility()
 
     def buy_upgrade_one(self, name: str):
-        c = self._upgrade_cost(name)
-        if self.gold >= c:
-            self.gold -= c; self.upgrades[name] += 1; self.discovered.add(name)
-            self._recalc_cps(); self._snap_numbers(); self._check_achievements()
-            self._flash_label(self.upgrade_widgets[name]["count_lbl"])
+        if not self._input_ok(): return
+        done = self.state.buy(name, 1)
+        if self.recorder is not None: self.recorder.buy(name, 1)
+        if done:
+            self._snap_numbers(); self._check_achievements(); self._journal()
+            self._flash_upgrade_count(name)
         else: self._show_banner("Pas assez d'or.", ok=False)
         self._update_upgrade_visibility()
 
-    def buy_upgrade_max(self, name: str):
-        bought = 0
-        while True:
-            c = self._upgrade_cost(name)
-            if self.gold >= c:
-                self.gold -= c; self.upgrades[name] += 1; bought += 1
-            else: break
-        if bought > 0:
-            self.discovered.add(name); self._recalc_cps(); self._snap_numbers(); self._check_achievements()
-            self._flash_label(self.upgrade_widgets[name]["count_lbl"])
+    def buy_upgrade_bulk(self, name: str):
+        if not self._input_ok(): return
+        done = self.state.buy_mode(name, self.buy_mode)
+        if self.recorder is not None: self.recorder.buy_mode(name, self.buy_mode)
+        if done:
+            self._snap_numbers(); self._check_achievements(); self._journal()
+            self._flash_upgrade_count(name)
         else: self._show_banner("Pas assez d'or.", ok=False)
         self._update_upgrade_visibility()
 
+    def cycle_buy_mode(self):
+        modes = [m for m in BUY_MODES if m in BUY_MODE_LABELS]
+        self.buy_mode = modes[(modes.index(self.buy_mode) + 1) % len(modes)]
+        self.buy_mode_var.set(f"Achat : {BUY_MODE_LABELS[self.buy_mode]}")
+        self._update_upgrade_visibility()
+
     def _recalc_cps(self):
-        cps = 0.0
-        for name, data in getattr(self, "upgrade_widgets", {}).items():
-            cps += self.upgrades.get(name, 0) * data["unit_cps"]
-        self.cps = cps * self.prestige_multiplier
+        self.state.recalc_cps()
 
     def _cpc_cost(self) -> int:
-        try: return int(round(10 * (1.5 ** int(self.cpc_level))))
-        except Exception: return 10
+        return self.state.cpc_cost()
 
     def _upgrade_cost(self, name: str) -> int:
-        data = self.upgrade_widgets[name]; count = self.upgrades.get(name, 0)
-        try: return int(round(data["base_cost"] * (data["mult"] ** count)))
-        except Exception: return int(data["base_cost"])
+        return self.state.upgrade_cost(name)
 
     def _max_affordable_qty(self, name: str) -> int:
-        data = self.upgrade_widgets[name]; count = self.upgrades.get(name, 0)
-        base = data["base_cost"] * (data["mult"] ** count); m = data["mult"]
-        g = self.gold
-        if g < base: return 0
-        if abs(m - 1.0) < 1e-9:
-            return int(g // base)
-        k = int(math.floor(math.log(1 + (m - 1) * (g / base), m)))
-        return max(0, k)
+        return self.state.max_affordable_qty(name)
 
     # Prestige -----------------------------------------
     def _current_level(self) -> int:
-        t = max(1.0, float(self.total_earned))
-        try: lv = int(max(0, math.floor(math.log10(t)) - 6))
-        except Exception: lv = 0
-        return lv
+        return self.state.current_level()
     def _potential_shards_gain(self) -> int:
-        return max(0, self._current_level() - int(self.prestige_spent_levels))
+        return self.state.potential_shards_gain()
     def try_prestige(self):
         gain = self._potential_shards_gain()
-        if gain <= 0: return
-        nxt = 6 + self.prestige_spent_levels + 1
+        if gain <= 0 or not self._input_ok(): return
+        eco = self.state.economy; nxt = eco.prestige_base_exp + self.prestige_spent_levels + 1
         if messagebox.askyesno("Prestige", f"Confirmer ? Vous gagnerez +{gain} shard(s).\n"
-                                           f"Multiplicateur CPS +25% par shard.\n"
+                                           f"Multiplicateur CPS +{eco.shard_cps_bonus:.0%} par shard.\n"
                                            f"Reset : or, upgrades, CPC.\n\n"
                                            f"Palier suivant à 10^{int(nxt)} de total gagné."):
-            self._do_prestige(gain)
-    def _do_prestige(self, gain: int):
-        self.prestige_shards += gain; self.prestige_spent_levels += gain
-        self.gold = 0.0; self.cpc = 1.0; self.cpc_level = 0
-        self.upgrades = {name: 0 for (name, *_rest) in self.upgrade_defs}
-        self.discovered = set()
-        self._confetti(); self._show_banner(f"+{gain} shard(s) ! Mult x{self.prestige_multiplier:.2f}")
+            self._do_prestige()
+    def _do_prestige(self):
+        gain = self.state.prestige()
+        if gain <= 0: return
+        if self.recorder is not None: self.recorder.prestige(self.state)
+        self._journal(); self._confetti(); self._show_banner(f"+{gain} shard(s) ! Mult x{self.prestige_multiplier:.2f}")
         self._start_decay({"gold":0.0,"cps":0.0,"cpc":1.0,"pb":0.0}, dur=3.0)
         self._sync_particles_to_shards(); self._refresh_all_labels(); self._update_upgrade_visibility()
 
@@ -390,96 +860,152 @@ class IdleGame:
         self._disp_pb   = lerp(self._decay["start"]["pb"],   self._decay["target"]["pb"],   t)
         if t >= 1.0: self._decay["active"] = False
     def _update_progress_disp(self):
-        cur = max(0.0, math.log10(max(self.total_earned, 1)) - 6.0)
+        cur = max(0.0, log10(max(self.total_earned, 1)) - self.state.economy.prestige_base_exp)
         self._disp_pb = clamp01(cur - self.prestige_spent_levels)
 
     # ---- Achievements ----
     def _check_achievements(self):
-        unlocked = 0
-        for aid, a in self.ach_defs.items():
-            try:
-                if aid not in self.achievements and a["check"](self):
-                    self.achievements.add(aid); unlocked += 1
-                    self._show_banner(f"Succès : {a['name']} ✓", ok=True)
-            except Exception:
-                continue
-        if unlocked: self._update_ach_btn()
+        unlocked = self.state.check_achievements()
+        for aid in unlocked:
+            self._show_banner(f"Succès : {self.ach_defs[aid]['name']} ✓", ok=True)
+        if unlocked:
+            self._update_ach_btn()
+            if getattr(self, "_ach_win", None) is not None: self._refresh_ach_window()
 
     def _update_ach_btn(self):
         known = set(self.ach_defs.keys())
         current = len([a for a in self.achievements if a in known])
         total = len(self.ach_defs)
         try:
-            self.ach_btn.configure(text=f"Succès ({current}/{total})")
+            self.binder.configure(self.ach_btn, text=f"Succès ({current}/{total})")
         except Exception:
             pass
 
     def open_achievements(self):
-        win = tk.Toplevel(self.root); win.title("Succès"); win.configure(bg="#0b0f24")
+        """One window for the session: closing hides it, reopening only re-binds the rows in view."""
         known = set(self.ach_defs.keys()); self.achievements = set([a for a in self.achievements if a in known])
-        header = tk.Frame(win, bg="#0b0f24"); header.pack(fill="x", padx=12, pady=8)
-        current = len(self.achievements); total = len(self.ach_defs)
-        tk.Label(header, text=f"Succès débloqués : {current}/{total}", font=("Arial", 12, "bold"), fg=self.fg_primary, bg="#0b0f24").pack(anchor="w")
-        canvas = tk.Canvas(win, bg="#0b0f24", highlightthickness=0, height=420)
-        sc = tk.Scrollbar(win, orient="vertical", command=canvas.yview)
-        frame = tk.Frame(canvas, bg="#0b0f24")
-        frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0,0), window=frame, anchor="nw")
-        canvas.configure(yscrollcommand=sc.set)
-        canvas.pack(side="left", fill="both", expand=True); sc.pack(side="right", fill="y")
-        def _on_mousewheel(event):
-            if sys.platform.startswith("darwin"): delta = -1 * int(event.delta)
-            else: delta = -1 * int(event.delta/120) if event.delta else 0
-            canvas.yview_scroll(delta, "units")
-        win.bind("<MouseWheel>", _on_mousewheel); win.bind("<Button-4>", lambda e: canvas.yview_scroll(-1, "units")); win.bind("<Button-5>", lambda e: canvas.yview_scroll(1, "units"))
-        for aid, a in self.ach_defs.items():
-            got = aid in self.achievements
-            row = tk.Frame(frame, bg=(self.card_bg if not got else "#b5ffb8")); row.pack(fill="x", padx=12, pady=4)
-            tk.Label(row, text=("✓" if got else "•"), font=("Arial", 12, "bold"),
-                     fg=("#0b0f24" if got else self.fg_primary), bg=("#b5ffb8" if got else self.card_bg), width=2).pack(side="left", padx=(8,4))
-            tk.Label(row, text=a["name"], font=("Arial", 11, "bold"),
-                     fg=("#0b0f24" if got else self.fg_primary), bg=("#b5ffb8" if got else self.card_bg)).pack(side="left", padx=(0,6))
-            tk.Label(row, text=a["desc"], font=("Arial", 10),
-                     fg=("#264d2a" if got else self.fg_muted), bg=("#b5ffb8" if got else self.card_bg)).pack(side="left")
+        win = getattr(self, "_ach_win", None)
+        if win is None:
+            win = self._ach_win = tk.Toplevel(self.root); win.title("Succès"); win.configure(bg="#0b0f24")
+            win.protocol("WM_DELETE_WINDOW", win.withdraw)
+            header = tk.Frame(win, bg="#0b0f24"); header.pack(fill="x", padx=12, pady=8)
+            self._ach_hdr = tk.Label(header, font=("Arial", 12, "bold"), fg=self.fg_primary, bg="#0b0f24"); self._ach_hdr.pack(anchor="w")
+            self._ach_list = VirtualList(win, ACH_ROW_H, self._make_ach_row, self._bind_ach_row, bg="#0b0f24", gap=8, height=420)
+            self._ach_list.pack()
+            def _on_mousewheel(event):
+                if sys.platform.startswith("darwin"): delta = -1 * int(event.delta)
+                else: delta = -1 * int(event.delta/120) if event.delta else 0
+                self._ach_list.scroll(delta)
+            win.bind("<MouseWheel>", _on_mousewheel); win.bind("<Button-4>", lambda e: self._ach_list.scroll(-1)); win.bind("<Button-5>", lambda e: self._ach_list.scroll(1))
+        else:
+            win.deiconify(); win.lift()
+        self._refresh_ach_window()
+
+    def _refresh_ach_window(self):
+        self._ach_items = list(self.ach_defs.items())
+        self._ach_hdr.configure(text=f"Succès débloqués : {len(self.achievements)}/{len(self.ach_defs)}")
+        self._ach_list.set_count(len(self._ach_items), rebind=True)
+
+    def _make_ach_row(self, parent):
+        row = tk.Frame(parent, bg=self.card_bg)
+        h = {"frame": row, "mark": tk.Label(row, font=("Arial", 12, "bold"), width=2),
+             "name": tk.Label(row, font=("Arial", 11, "bold")), "desc": tk.Label(row, font=("Arial", 10))}
+        h["mark"].pack(side="left", padx=(8,4)); h["name"].pack(side="left", padx=(0,6)); h["desc"].pack(side="left")
+        return h
+
+    def _bind_ach_row(self, h, index: int):
+        aid, a = self._ach_items[index]; got = aid in self.achievements; b = self.binder
+        bg = "#b5ffb8" if got else self.card_bg
+        b.configure(h["frame"], bg=bg)
+        b.configure(h["mark"], text=("✓" if got else "•"), fg=("#0b0f24" if got else self.fg_primary), bg=bg)
+        b.configure(h["name"], text=a["name"], fg=("#0b0f24" if got else self.fg_primary), bg=bg)
+        b.configure(h["desc"], text=a["desc"], fg=("#264d2a" if got else self.fg_muted), bg=bg)
 
     # Animations (non-intrusives) ----------------------
     def _flash_label(self, lbl, color="#dbe6ff", dur=220):
-        old_fg = lbl.cget("fg"); old_bg = lbl.cget("bg")
+        """Tint `lbl` for `dur` ms; a flash already running is only extended (no timer per flash)."""
+        due = time.monotonic() + dur / 1000.0
+        if lbl in self._flashing: self._flashing[lbl][1] = due; return
+        self._flashing[lbl] = [lbl.cget("fg"), due]
         lbl.configure(fg=color)
-        lbl.after(dur, lambda: (lbl.configure(fg=old_fg, bg=old_bg)))
 
-    def _float_over_gold(self, text: str):
+    def _flash_step(self, dt: float):
+        if not self._flashing: return
+        now = time.monotonic()
+        for lbl in [l for l, (_fg, due) in self._flashing.items() if due <= now]:
+            lbl.configure(fg=self._flashing.pop(lbl)[0])
+
+    def _refresh_float_anchors(self, e=None):
         # place closer to the "OR" header
-        if len(self._gold_float_labels) >= 8:
-            try:
-                lbl = self._gold_float_labels.pop(0); lbl.destroy()
-            except Exception: pass
-        self.root.update_idletasks()
-        hdr = self.gold_chip_hdr if hasattr(self, "gold_chip_hdr") else self.gold_chip_value
+        hdr = self.gold_chip_hdr
         rx = self.root.winfo_rootx(); ry = self.root.winfo_rooty()
-        x = hdr.winfo_rootx() - rx + hdr.winfo_width() + 6
-        y = hdr.winfo_rooty() - ry + max(0, (hdr.winfo_height()//2) - 6)
-        lbl = tk.Label(self.root, text=text, font=("Arial", 10, "bold"), fg="#cfe3ff", bg="#0b0f24")
-        lbl.place(x=x, y=y)
-        self._gold_float_labels.append(lbl)
-        steps = 18
-        def anim(i=0):
-            if i >= steps:
-                try: self._gold_float_labels.remove(lbl)
-                except Exception: pass
-                lbl.destroy(); return
-            lbl.place(y=y - i*3); self.root.after(14, lambda: anim(i+1))
-        anim()
-
-    def _floating_text_btn(self, text: str):
-        lbl = tk.Label(self.tap_btn, text=text, font=("Arial", 11, "bold"), fg="#e6e9ff", bg="#0b0f24")
-        self.tap_btn.update_idletasks(); w = self.tap_btn.winfo_width(); h = self.tap_btn.winfo_height()
-        lbl.place(x=w//2 + random.randint(-20,20), y=h//2)
-        steps = 16
-        def animate(i=0):
-            if i >= steps: lbl.destroy(); return
-            lbl.place(y=h//2 - i*3); self.root.after(14, lambda: animate(i+1))
-        animate()
+        self._gold_floats.anchor = (hdr.winfo_rootx() - rx + hdr.winfo_width() + 6,
+                                    hdr.winfo_rooty() - ry + max(0, (hdr.winfo_height()//2) - 6))
+        self._tap_floats.anchor = (self.tap_btn.winfo_width()//2, self.tap_btn.winfo_height()//2)
+
+    def _float_over_gold(self, value: float):
+        self._gold_floats.add(value); self._schedule_float_step()
+
+    def _floating_text_btn(self, value: float, n: int = 1):
+        self._tap_floats.add(value, n); self._schedule_float_step()
+
+    def _schedule_float_step(self):
+        self.frames.add("floats", self._float_step, 40)
+
+    def _float_step(self, dt: float = 0.0) -> bool:
+        """Frame task shared by both pools; new labels spawn every `float_every` frames (quality
+        governor), merging what arrived in between. False once nothing is floating or pending."""
+        self._float_frame += 1; spawn = self._float_frame % self._quality["float_every"] == 0
+        busy = self._gold_floats.step(spawn)
+        return self._tap_floats.step(spawn) or busy
+
+    def _apply_quality(self, level: int):
+        """Quality governor listener: particle cap, float-label rate and ripple detail for `level`."""
+        q = self._quality = QUALITY_PRESETS[level]
+        self.tap_btn.ripple_limit, self.tap_btn.ripple_speed = q["ripples"]
+        self._sync_particles_to_shards()
+
+    # Upgrade rows (virtualised) ------------------------
+    def _make_upgrade_row(self, parent):
+        row=tk.Frame(parent, bg=self.card_bg, padx=12, pady=10, bd=0)
+        left=tk.Frame(row, bg=self.card_bg); left.pack(side="left", fill="x", expand=True)
+        name_lbl = tk.Label(left, font=("Arial", 12, "bold"), fg=self.fg_primary, bg=self.card_bg); name_lbl.pack(anchor="w")
+        desc_lbl = tk.Label(left, font=("Arial", 10), fg="#9fb1ff", bg=self.card_bg); desc_lbl.pack(anchor="w")
+        right=tk.Frame(row, bg=self.card_bg); right.pack(side="right")
+        h = {"frame": row, "name": None, "name_lbl": name_lbl, "desc_lbl": desc_lbl,
+             "count_var": tk.StringVar(value="x0"), "line_cps_var": tk.StringVar(value="+0 CPS"), "cost_var": tk.StringVar(value=""),
+             "max_label": tk.StringVar(value="Max (0)")}
+        h["count_lbl"] = tk.Label(right, textvariable=h["count_var"], width=6, font=("Arial", 11, "bold"), fg=self.accent, bg=self.card_bg)
+        h["count_lbl"].pack(side="left", padx=(0,8))
+        tk.Label(right, textvariable=h["line_cps_var"], width=12, font=("Arial", 10, "bold"), fg=self.fg_muted, bg=self.card_bg, anchor="e").pack(side="left", padx=(0,8))
+        h["buy_btn"]=tk.Button(right, textvariable=h["cost_var"], font=("Arial", 11, "bold"), fg=self.fg_primary, bg=self.btn_bg, activebackground=self.btn_active,
+                               relief="flat", bd=0, padx=10, pady=6, cursor="hand2", command=lambda: self.buy_upgrade_one(h["name"]), state="disabled", disabledforeground="#6b6f99")
+        h["buy_btn"].pack(side="left", padx=(0,6))
+        h["max_btn"]=tk.Button(right, textvariable=h["max_label"], font=("Arial", 11, "bold"), fg=self.fg_primary, bg=self.btn_bg, activebackground=self.btn_active,
+                               relief="flat", bd=0, padx=10, pady=6, cursor="hand2", command=lambda: self.buy_upgrade_bulk(h["name"]), state="disabled", disabledforeground="#6b6f99")
+        h["max_btn"].pack(side="left")
+        for b in (h["buy_btn"], h["max_btn"]):
+            b.bind("<Enter>", lambda e, b=b: b.configure(bg=self.btn_active if str(b['state'])=='normal' else self.btn_bg))
+            b.bind("<Leave>", lambda e, b=b: b.configure(bg=self.btn_bg))
+        return h
+
+    def _bind_upgrade_row(self, h, index: int):
+        """A pooled row scrolled in (or the items changed): point it at its upgrade and fill it."""
+        name = self._upgrade_items[index]
+        h["name"] = name; h["unit_cps"] = self.state.economy.unit_cps[name]; h["_count"] = None
+        self.binder.configure(h["desc_lbl"], text=f"+{format_num(h['unit_cps'])} CPS par {name.lower()}")
+        self._last_upgrade_counts.setdefault(name, self.upgrades.get(name, 0))
+        self._fill_upgrade_row(h, self.advisor.best())
+
+    def _upgrade_row(self, name: str):
+        """Live row handle showing `name`, or None when it is scrolled off / hidden."""
+        for _, h in self.upgrade_list.visible():
+            if h["name"] == name: return h
+        return None
+
+    def _flash_upgrade_count(self, name: str):
+        h = self._upgrade_row(name)
+        if h is not None: self._flash_label(h["count_lbl"])
 
     # Discovery / visibility ---------------------------
     def _recompute_discovery(self, from_save=False):
@@ -494,62 +1020,63 @@ class IdleGame:
         return None
 
     def _update_upgrade_visibility(self, initial=False):
+        """Sync the shown items (discovered + next one), then refresh only the rows in the viewport."""
         next_name = self._next_undiscovered_name()
         if not hasattr(self, "_last_upgrade_counts"): self._last_upgrade_counts = {}
-        for name, data in self.upgrade_widgets.items():
-            row = data["row"]; buy_btn = data["buy_btn"]; max_btn = data["max_btn"]; max_label = data["max_label"]
-            discovered = (name in self.discovered)
-            should_show = discovered or (name == next_name)
-            visible = getattr(row, "_visible", False)
-            if should_show and not visible:
-                row.pack(fill="x", pady=6); row._visible = True
-            elif not should_show and visible:
-                row.pack_forget(); row._visible = False
-
-            count = self.upgrades.get(name, 0)
-            line_cps = count * data["unit_cps"] * self.prestige_multiplier
-            data["count_var"].set(f"x{count}")
-            data["line_cps_var"].set(f"+{format_num(line_cps)} CPS")
-            if self._last_upgrade_counts.get(name, 0) != count:
-                self._flash_label(data["count_lbl"])
-                self._last_upgrade_counts[name] = count
-
-            cost1 = self._upgrade_cost(name)
-            data["cost_var"].set(f"Coût : {format_num(cost1)}")
-
-            affordable1 = self.gold >= cost1
-            qty = self._max_affordable_qty(name)
-            max_label.set(f"Max ({qty})")
-            state_buy = "normal" if affordable1 and should_show else "disabled"
-            state_max = "normal" if qty > 0 and should_show else "disabled"
-            buy_btn.configure(state=state_buy); max_btn.configure(state=state_max)
-
-        try: self.scroll_frame.update_idletasks()
-        except Exception: pass
+        items = [name for name, *_ in self.upgrade_defs if name in self.discovered or name == next_name]
+        if initial or items != self._upgrade_items:
+            self._upgrade_items = items; self.upgrade_list.set_count(len(items), rebind=True); self.binder.request_layout()
+            return   # rebinding filled every live row
+        best = self.advisor.best()
+        for _, h in self.upgrade_list.visible(): self._fill_upgrade_row(h, best)
+
+    def _fill_upgrade_row(self, h, best):
+        b = self.binder; name = h["name"]
+        is_best = (name == best)
+        b.configure(h["name_lbl"], text=(f"★ {name}" if is_best else name), fg=("#ffe8a3" if is_best else self.fg_primary))
+        count = self.upgrades.get(name, 0)
+        if h["_count"] != count or h.get("_mult") != self.prestige_multiplier:
+            # per-count texts only change on purchase/prestige
+            h["_count"] = count; h["_mult"] = self.prestige_multiplier
+            h["_cost1"] = self._upgrade_cost(name)
+            b.set(h["count_var"], f"x{count}")
+            b.set(h["line_cps_var"], f"+{format_num(count * h['unit_cps'] * self.prestige_multiplier)} CPS")
+            b.set(h["cost_var"], f"Coût : {format_num(h['_cost1'])}")
+        if self._last_upgrade_counts.get(name, 0) != count:
+            self._flash_label(h["count_lbl"])
+            self._last_upgrade_counts[name] = count
+
+        affordable1 = self.gold >= h["_cost1"]
+        qty = self._max_affordable_qty(name)
+        if self.buy_mode == "max":
+            b.set(h["max_label"], f"Max ({qty})"); want = 1
+        else:
+            want = self.state.mode_qty(name, self.buy_mode)
+            lbl = f"→{count + want}" if self.buy_mode == "palier" else BUY_MODE_LABELS[self.buy_mode]
+            b.set(h["max_label"], f"{lbl} : {format_num(self.state.mode_cost(name, self.buy_mode))}")
+        b.configure(h["buy_btn"], state="normal" if affordable1 else "disabled")
+        b.configure(h["max_btn"], state="normal" if qty >= want and qty > 0 else "disabled")
 
     # UI helpers ---------------------------------------
     def _snap_numbers(self):
         self._recalc_cps()
-        self._disp_gold = float(self.gold); self._disp_cps = float(self.cps); self._disp_cpc = float(self.cpc)
+        self._disp_gold = self.gold; self._disp_cps = float(self.cps); self._disp_cpc = float(self.cpc)   # gold may be a BigNum
         self._update_progress_disp(); self._refresh_all_labels()
 
-    def _snap_display(self):
-        self._snap_numbers(); self.root.update_idletasks(); self._update_upgrade_visibility(initial=True)
-
     def _refresh_all_labels(self):
+        b = self.binder
         # Primary chips
-        self.gold_chip.set(format_num(self._disp_gold)); self.cps_chip.set(format_num(self._disp_cps))
-        self.cpc_chip.set(format_num(self._disp_cpc)); self.mult_chip.set(f"x{self.prestige_multiplier:.2f}")
+        b.set(self.gold_chip, format_num(self._disp_gold)); b.set(self.cps_chip, format_num(self._disp_cps))
+        b.set(self.cpc_chip, format_num(self._disp_cpc)); b.set(self.mult_chip, f"x{self.prestige_multiplier:.2f}")
         # Dynamic CPC cost text
         try:
-            self.cpc_cost_var.set(f"Améliorer le TAP (+1) — Coût : {format_num(self._cpc_cost())}")
+            b.set(self.cpc_cost_var, f"Améliorer le TAP (+1) — Coût : {format_num(self._cpc_cost())}")
         except Exception:
             pass
         # Footer infos + progress
-        self.total_var.set(f"Gagné au total : {format_num(self.total_earned)}")
-        next_exp = 6 + self.prestige_spent_levels + 1
-        self.shard_info_var.set(f"Shards : {self.prestige_shards}  |  Prochain palier : 10^{int(next_exp)}")
-        self.pb['value'] = clamp01(self._disp_pb) * 100
+        b.set(self.total_var, f"Gagné au total : {format_num(self.total_earned)}")
+        b.set(self.shard_info_var, self._shard_info())
+        b.configure(self.pb, value=round(clamp01(self._disp_pb) * 100, 1))
 
         # Subtle flash (color only)
         cur_vals = {"gold": self._disp_gold, "cps": self._disp_cps, "cpc": self._disp_cpc, "mult": self.prestige_multiplier}
@@ -563,125 +1090,164 @@ class IdleGame:
                 if key == "cpc":    self._flash_label(self.cpc_chip_value)
                 if key == "mult":   self._flash_label(self.mult_chip_value)
 
+    def _shard_info(self) -> str:
+        """Shards and the last planner text (ETA of the next one, advice)."""
+        return f"Shards : {self.prestige_shards}  |  {self._shard_plan}" if self._shard_plan else f"Shards : {self.prestige_shards}"
+
+    def _plan_shards(self):
+        """Rebuild the planner text. Display pulse only: the projection is rebuilt when CPS changed, so
+        doing it per purchase would put a clone + fast_forward on every click; labels show the last one."""
+        plan = self.planner.plan(self.state.clock() - self.state.run_started)
+        exp = self.state.economy.prestige_base_exp + max(self.state.current_level(), self.prestige_spent_levels) + 1
+        text = f"10^{int(exp)} dans {format_duration(plan['next_in'])}"
+        best = plan["best"]
+        if best is not None:
+            text += f"  |  Prestige conseillé (+{best[0]})" if best[1] <= 0 else f"  |  Conseil : +{best[0]} dans {format_duration(best[1])}"
+        self._shard_plan = text
+
     # Particles ----------------------------------------
     def _desired_particle_cap(self):
         w = max(1, self.anim_canvas.winfo_width()); density_scale = w / 760.0
-        return int(BASE_PARTICLE_CAP * max(0.6, min(1.5, density_scale)))
+        return int(BASE_PARTICLE_CAP * max(0.6, min(1.5, density_scale)) * self._quality["particles"])
     def _sync_particles_to_shards(self):
+        if self._particles is None: return   # created by the "particles" startup stage
         cap = min(self.prestige_shards, self._desired_particle_cap())
-        current = len(self._particles) if hasattr(self, "_particles") else 0
-        if not hasattr(self, "_particles"): self._particles = []
-        if cap > current:
-            for _ in range(cap - current):
-                x = random.randint(10, max(20, self.anim_canvas.winfo_width()-10)); y = random.randint(8, 44)
-                vx = random.uniform(-0.2, 0.2); vy = random.uniform(-0.1, 0.1); life = random.uniform(1.0, 3.0)
-                self._particles.append([x,y,vx,vy,life])
-        elif cap < current:
-            self._particles = self._particles[:cap]
+        self._particles.set_ambient(cap, self.anim_canvas.winfo_width(), self.anim_canvas.winfo_height())
     def _update_particles(self, dt):
+        if self._particles is None: return
         self._sync_particles_to_shards()
-        self.anim_canvas.delete("p")
         w = max(1, self.anim_canvas.winfo_width()); h = max(1, self.anim_canvas.winfo_height())
-        alive = []
-        for (x,y,vx,vy,life) in self._particles:
-            life -= dt
-            if life <= 0:
-                x = random.randint(10, w-10); y = random.randint(6, h-6)
-                vx = random.uniform(-0.2, 0.2); vy = random.uniform(-0.1, 0.1); life = random.uniform(1.0, 3.0)
-            x += vx * 60 * dt; y += vy * 60 * dt
-            size = 2 + (y/h)*2.5
-            self.anim_canvas.create_oval(x-size, y-size, x+size, y+size, fill="#8aa5ff", outline="", tags="p")
-            alive.append([x,y,vx,vy,life])
-        self._particles = alive
+        self._particles.step(dt, w, h)
     def _confetti(self):
-        w = max(1, self.anim_canvas.winfo_width()); burst = min(50, 10 + self.prestige_shards//5)
-        for _ in range(burst):
-            x = random.randint(0, w); y = 0
-            vx = random.uniform(-1.0, 1.0); vy = random.uniform(1.0, 2.5); life = random.uniform(0.8, 1.8)
-            self._particles.append([x,y,vx,vy,life])
+        if self._particles is None: return
+        w = max(1, self.anim_canvas.winfo_width())
+        burst = int(min(CONFETTI_CAP, 10 + self.prestige_shards//5) * max(0.2, self._quality["particles"]))
+        self._particles.burst(burst, w)
 
     # Loops --------------------------------------------
-    def _logic_tick(self):
-        self.gold += self.cps; self.total_earned += self.cps
-        if self.cps > 0: self._float_over_gold(f"+{format_num(self.cps)}")
+    def _logic_tick(self, dt: float = 0.0):
+        """Frame task: credit whole logic ticks due (LogicClock counts them, so frame jitter never
+        changes income), auto-taps, and the 1 Hz display pulse."""
+        self._pulse_gain += self.clock.pump()
+        if self._autotap_t0 is not None: self._pump_autotap()
+        now = time.monotonic()
+        if now >= self._next_pulse:
+            self._next_pulse += self.display_period
+            if self._next_pulse <= now: self._next_pulse = now + self.display_period   # skip missed pulses
+            self._display_pulse()
+    def _display_pulse(self):
+        if self._pulse_gain > 0: self._float_over_gold(self._pulse_gain)
+        self._pulse_gain = 0.0; self._check_achievements()
         if not self._decay["active"]:
             self._disp_gold=self.gold; self._disp_cps=self.cps; self._disp_cpc=self.cpc; self._update_progress_disp()
-        self._refresh_all_labels(); self._update_ach_btn(); self._update_upgrade_visibility()
-        self.root.after(1000, self._logic_tick)
-    def _anim_tick_30fps(self):
-        now = time.time(); dt = now - getattr(self, "_last_anim_time", now); self._last_anim_time = now
-        self._step_decay(min(dt, 0.05)); self._update_particles(min(dt, 0.05)); self.root.after(33, self._anim_tick_30fps)
+        self._plan_shards(); self._refresh_all_labels(); self._update_ach_btn(); self._update_upgrade_visibility()
+        self.tk_calls_last_tick = self.binder.take_frame_calls()
+        if time.monotonic() >= self._next_autosave: self._journal()
+    def _anim_tick(self, dt: float):
+        self._step_decay(min(dt, 0.05)); self._update_particles(min(dt, 0.05))
+
+    # Instrumentation (--profile) ------------------------
+    def _perf_counts(self) -> dict:
+        widgets = items = 0; stack = [self.root]
+        while stack:
+            w = stack.pop(); widgets += 1; stack.extend(w.winfo_children())
+            if isinstance(w, tk.Canvas): items += len(w.find_all())
+        return {"canvas_items": items, "widgets": widgets, "after": len(self.root.tk.splitlist(self.root.tk.call("after", "info"))),
+                "tasks": len(self.frames.tasks), "quality": self.frames.quality, "work_ms": round(self.frames.avg_ms, 2)}
+    def _perf_tick(self):
+        self.perf.sample(**self._perf_counts())
+        if self.perf_visible: self.perf_lbl.configure(text=self.perf.report()); self.perf_lbl.lift()
+        self.frames.later(1.0, self._perf_tick)
+    def _toggle_perf_overlay(self, _e=None):
+        self.perf_visible = not self.perf_visible
+        if self.perf_visible:
+            self.perf_lbl.configure(text=self.perf.report()); self.perf_lbl.place(relx=1.0, x=-8, y=8, anchor="ne")
+        else: self.perf_lbl.place_forget()
 
     # Persistence --------------------------------------
     def save(self, silent: bool = False):
-        data = {
-            "schema_version": SCHEMA_VERSION,
-            "gold": float(self.gold), "cpc_level": int(self.cpc_level),
-            "upgrades": {k:int(v) for k,v in self.upgrades.items()},
-            "last_time": time.time(), "total_earned": float(self.total_earned),
-            "prestige_shards": int(self.prestige_shards), "achievements": list(self.achievements),
-            "prestige_spent_levels": int(self.prestige_spent_levels),
-            "discovered": list(self.discovered),
-        }
-        tmp = SAVE_FILE + ".tmp"
-        try:
-            with open(tmp, "w", encoding="utf-8") as f: json.dump(data, f)
-            if os.path.exists(SAVE_FILE):
-                os.replace(tmp, SAVE_FILE)
-            else:
-                shutil.move(tmp, SAVE_FILE)
-            if not silent: self._show_banner("Sauvegardé ✓")
-        except Exception as e:
-            try:
-                if os.path.exists(tmp): os.remove(tmp)
-            except Exception: pass
-            if not silent: messagebox.showerror("Erreur", f"Impossible de sauvegarder : {e}")
+        """Full snapshot, written by the store's background thread."""
+        if not self._loaded: return   # never overwrite a save that has not been read yet
+        if self.recorder is not None: self.recorder.save()
+        self.store.submit(self.state.to_dict(), snapshot=True); self._next_autosave = time.monotonic() + AUTOSAVE_SECONDS
+        if silent: return
+        if self.store.error is not None: self._show_banner(f"Erreur de sauvegarde : {self.store.error}", ok=False, dur=2500); self.store.error = None
+        else: self._show_banner("Sauvegardé ✓")
+
+    def _journal(self):
+        """Delta record (purchase, prestige, periodic gold) — the writer diffs against what is on disk."""
+        self.store.submit(self.state.to_dict()); self._next_autosave = time.monotonic() + AUTOSAVE_SECONDS
+        if self.recorder is not None: self.recorder.flush()   # a crash keeps the inputs up to here
+
+    def _legacy_path(self):
+        """Pre-store save in the working directory (default profile only): the journal pair, else the v670 JSON."""
+        if self.player != "default": return None
+        if SaveStore(SAVE_BASE).exists(): return SaveStore(SAVE_BASE).snap_path
+        return SAVE_FILE if os.path.exists(SAVE_FILE) else None
 
     def load(self):
-        if not os.path.exists(SAVE_FILE): return
+        """Decode the save, then credit offline gains (startup runs the two halves as separate stages)."""
+        self._load_save(); self._apply_offline_gain()
+
+    def _load_save(self):
+        try: self._restore_save()
+        finally: self._loaded = True   # from here on the live state is the one to save
+
+    def _restore_save(self):
+        from_store = False; path = None; self._restored = None
         try:
-            with open(SAVE_FILE, "r", encoding="utf-8") as f: data = json.load(f)
+            from_store = self.store.exists(); path = None if from_store else self._legacy_path()
+            if from_store: data = self.store.load()
+            elif path is None: return
+            elif path == SAVE_FILE:
+                with open(SAVE_FILE, "r", encoding="utf-8") as f: data = json.load(f)
+            else: data = SaveStore(SAVE_BASE).load()
+            if data is None: return
         except Exception as e:
             try:
-                bad = SAVE_FILE + ".bak"
-                if os.path.exists(bad): os.remove(bad)
-                shutil.move(SAVE_FILE, bad)
+                if path is None: bad = self.store.backup()
+                else:
+                    bad = path + ".bak"
+                    if os.path.exists(bad): os.remove(bad)
+                    shutil.move(path, bad)
                 messagebox.showwarning("Sauvegarde corrompue", f"Le fichier a été renommé en {bad}.\nNouveau départ.")
             except Exception:
                 messagebox.showwarning("Sauvegarde corrompue", "Impossible de lire la sauvegarde. Nouveau départ.")
             return
+        if getattr(self.store, "recovered_from", None) is not None:
+            self._show_banner("Dernière sauvegarde illisible — version précédente restaurée.", ok=False, dur=2500)
         try:
-            self.gold = float(data.get("gold", 0.0))
-            self.cpc_level = int(data.get("cpc_level", 0)); self.cpc = 1.0 + self.cpc_level * 1.0
-            saved_upgrades = data.get("upgrades", {})
-            if isinstance(saved_upgrades, dict):
-                for name in self.upgrades.keys():
-                    self.upgrades[name] = int(saved_upgrades.get(name, 0))
-            self.total_earned = float(data.get("total_earned", self.gold))
-            self.prestige_shards = int(data.get("prestige_shards", 0))
-            known = set(self.ach_defs.keys())
-            self.achievements = set([a for a in data.get("achievements", []) if a in known])
-            self.prestige_spent_levels = int(data.get("prestige_spent_levels", 0))
-            disc = data.get("discovered")
-            if isinstance(disc, list):
-                self.discovered = set([n for n in disc if n in self.upgrades])
-            else:
-                self.discovered = set([n for n,c in self.upgrades.items() if c>0])
-            now = time.time(); last_time = float(data.get("last_time", now))
-            elapsed = max(0.0, now - last_time); cap = OFFLINE_HOURS_CAP * 3600.0
-            self._recalc_cps(); offline = self.cps * min(elapsed, cap)
+            self.state.load_dict(data)
+            if path == SAVE_FILE and isinstance(self.store, SqliteStore):
+                self.store.import_json(SAVE_FILE)   # the v670 file, as read, becomes the profile's first snapshot
+            self.autopilot_var.set(self.state.autopilot); self._apply_number_format()
+            self._restored = (from_store, path)
+        except Exception as e:
+            self._on_incompatible_save(from_store, path, e)
+
+    def _apply_offline_gain(self):
+        if self._restored is None: return
+        from_store, path = self._restored
+        try:
+            offline, elapsed, summary = self.state.apply_offline()
             if offline > 0:
-                self.gold += offline; self.total_earned += offline
                 hrs = elapsed / 3600.0; hrs_shown = min(hrs, OFFLINE_HOURS_CAP)
-                self._show_banner(f"Gains hors-ligne : +{format_num(offline)} (≈{hrs_shown:.1f}h)")
+                bought = sum(summary["bought"].values()) + summary["cpc_levels"] if summary else 0
+                extra = f" — {bought} achat(s) auto" if bought else ""
+                self._show_banner(f"Gains hors-ligne : +{format_num(offline)} (≈{hrs_shown:.1f}h){extra}", dur=2500 if bought else 1200)
+            if not from_store: self.save(silent=True)   # imported: the store is the source of truth from now on
         except Exception as e:
-            try:
-                bad = SAVE_FILE + ".bak"
+            self._on_incompatible_save(from_store, path, e)
+
+    def _on_incompatible_save(self, from_store, path, e):
+        try:   # a bad store entry is simply superseded by the next save (history keeps it)
+            if not from_store:
+                bad = path + ".bak"
                 if os.path.exists(bad): os.remove(bad)
-                shutil.move(SAVE_FILE, bad)
-            except Exception:
-                pass
-            messagebox.showwarning("Migration", f"Sauvegarde incompatible, nouveau départ.\nDétails : {e}")
+                shutil.move(path, bad)
+        except Exception:
+            pass
+        messagebox.showwarning("Migration", f"Sauvegarde incompatible, nouveau départ.\nDétails : {e}")
 
     # Misc ---------------------------------------------
     def _show_banner(self, text: str, ok: bool=True, dur: int=1200):
@@ -689,22 +1255,60 @@ class IdleGame:
         self.banner.update_idletasks()
         x = (self.root.winfo_width() - self.banner.winfo_reqwidth())//2
         self.banner.place(x=x, y=8)
-        self.root.after(dur, self.banner.place_forget)
+        self.frames.later(dur / 1000.0, self.banner.place_forget)
 
     def reset_confirm(self):
+        if not self._input_ok(): return
         if messagebox.askyesno("Réinitialiser", "Voulez-vous vraiment tout remettre à zéro ?"): self._reset()
     def _reset(self):
-        self.gold = 0.0; self.cpc = 1.0; self.cpc_level = 0; self.total_earned = 0.0
-        self.prestige_shards = 0; self.prestige_spent_levels = 0; self.achievements = set()
-        self.upgrades = {name: 0 for (name, *_rest) in self.upgrade_defs}; self.discovered = set()
+        self.state.reset(); self.store.wipe()
+        if self.recorder is not None: self.recorder.reset(self.state)
         try:
             if os.path.exists(SAVE_FILE): os.remove(SAVE_FILE)
         except Exception: pass
         self._show_banner("Partie réinitialisée."); self._start_decay({"gold":0.0,"cps":0.0,"cpc":1.0,"pb":0.0}, dur=3.0)
         self._sync_particles_to_shards(); self._update_upgrade_visibility()
 
+    def cycle_number_format(self):
+        if not self._input_ok(): return
+        self.state.number_format = FORMAT_MODES[(FORMAT_MODES.index(format_num.mode) + 1) % len(FORMAT_MODES)]
+        if self.recorder is not None: self.recorder.number_format(self.state.number_format)
+        self._apply_number_format(); self._refresh_all_labels(); self._update_upgrade_visibility()
+
+    def _apply_number_format(self):
+        mode = self.state.number_format if self.state.number_format in FORMAT_MODES else "suffix"
+        format_num.set_mode(mode)
+        self.format_btn_var.set(f"Nombres : {FORMAT_LABELS[mode]}")
+        self._upgrade_items = []   # next visibility pass re-binds every live row with the new format
+
+    def _toggle_autopilot(self):
+        if not self._input_ok(): self.autopilot_var.set(self.state.autopilot); return
+        self.state.autopilot = bool(self.autopilot_var.get())
+        if self.recorder is not None: self.recorder.autopilot(self.state.autopilot)
+
+    def _replay_event(self, kind: int, a, gain: float):
+        """ReplayDriver applied a recorded input: the UI side of what the live handler would have done."""
+        if kind in (TAP, TAPS): self._tap_gain += gain; self._tap_n += 1 if kind == TAP else a; return
+        if kind == END:
+            ok = self.replayer.identical
+            self._show_banner("Rejeu terminé : état identique ✓" if ok else "Rejeu terminé : ÉTAT DIFFÉRENT", ok=ok, dur=4000)
+        elif kind == PRESTIGE: self._confetti(); self._start_decay({"gold":0.0,"cps":0.0,"cpc":1.0,"pb":0.0}, dur=3.0)
+        elif kind == RESET: self._start_decay({"gold":0.0,"cps":0.0,"cpc":1.0,"pb":0.0}, dur=3.0)
+        elif kind == AUTOPILOT: self.autopilot_var.set(self.state.autopilot)
+        elif kind == FORMAT: self._apply_number_format()
+        self._snap_numbers(); self._check_achievements(); self._sync_particles_to_shards()
+        self._refresh_all_labels(); self._update_upgrade_visibility()
+
     def on_close(self):
-        self.save(silent=True); self.root.destroy()
+        self.save(silent=True); self.store.close(timeout=3.0)
+        if self.replay is not None:
+            shutil.rmtree(os.path.dirname(self.store.snap_path), ignore_errors=True)
+            if self.replayer is not None and self.replayer.done:   # verdict for scripted runs, once, at exit
+                print("rejeu :", {True: "état identique", False: "ÉTAT DIFFÉRENT", None: "enregistrement incomplet"}[self.replayer.identical], file=sys.stderr)
+        if self.recorder is not None and self.recorder.started: self.recorder.close(self.state); print("entrées :", self.recorder.path)
+        if self.perf is not None:
+            for path in self.perf.dump(self.perf_prefix): print("trace :", path)
+        self.root.destroy()
 
 def main():
     root = tk.Tk()
@@ -713,7 +1317,24 @@ def main():
         icon_path = os.path.join(os.path.dirname(__file__), "assets", "logo.ico")
         if os.path.exists(icon_path): root.iconbitmap(icon_path)
     except Exception: pass
-    app = IdleGame(root); root.mainloop()
+    args = sys.argv[1:]
+    player = args[args.index("--player") + 1] if "--player" in args[:-1] else "default"
+    perf = None; prefix = PERF_TRACE if PERF_TRACE not in ("", "1") else "idle_profile"
+    if "--profile" in args or PERF_TRACE:
+        i = args.index("--profile") + 1 if "--profile" in args else len(args)
+        if i < len(args) and not args[i].startswith("--"): prefix = args[i]
+        perf = PerfRecorder(); perf.install(tk.Misc, methods=((FancyTap, "_draw"), (ParticleField, "step"), (Binder, "flush"),
+                                                              (IdleGame, "_display_pulse", "_flush_taps", "_update_upgrade_visibility", "_refresh_all_labels")))
+    economy = Economy.from_file(args[args.index("--upgrades") + 1]) if "--upgrades" in args[:-1] else None
+    autotap_hz = AUTOTAP_HZ
+    if "--autotap" in args:
+        i = args.index("--autotap") + 1
+        if i < len(args) and not args[i].startswith("--"): autotap_hz = float(args[i])
+    opt = lambda flag, default=None: args[args.index(flag) + 1] if flag in args[:-1] else default
+    seed = opt("--seed")
+    app = IdleGame(root, player=player, perf=perf, perf_prefix=prefix, startup_trace="--startup-trace" in args, economy=economy,
+                   autotap="--autotap" in args, autotap_hz=autotap_hz, record=opt("--record"), replay=opt("--replay"),
+                   replay_speed=float(opt("--speed", 1.0)), seed=None if seed is None else int(seed)); root.mainloop()
 
 if __name__ == "__main__":
     main()
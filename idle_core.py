@@ -0,0 +1,912 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Idle Clicker — moteur headless (aucune dépendance Tkinter)
+- `Economy` : données des améliorations + formules de coût (upgrades, CPC).
+- `GameState` : état d'une partie + API de simulation advance / tap / buy / prestige.
+- `PrestigePlanner` : temps jusqu'au prochain shard et moment de prestige qui maximise les shards/h.
+- L'interface Tk (idle_clicker_v6_6_4.py) ne fait qu'afficher cet état.
+- `CostTable` : prix unitaires et cumuls précalculés par amélioration, étendus à la demande.
+- Améliorations chargeables depuis un fichier JSON : Economy.from_file(chemin).
+Bench : python idle_core.py --bench   |   Vérifications (achat groupé, autopilote hors ligne…) : python idle_core.py --check
+Export des définitions par défaut : python idle_core.py --dump-upgrades upgrades.json
+"""
+import json, math, time, sys, heapq
+from bisect import bisect_right
+from array import array
+
+from idle_numbers import BigNum, INF, FLOAT_E_MAX, safe_add, log10, pow_mul, ulp, num, to_json, from_json
+
+SCHEMA_VERSION = 670
+OFFLINE_HOURS_CAP = 12
+BUY_MODES = ("x1", "x10", "x100", "max", "palier")
+MILESTONE_STEP = 25   # "palier" mode buys up to the next multiple of this count
+EXACT_SUM_MAX = 64    # below this many units, bulk costs are summed unit by unit (exact rounding)
+BAND_LOOP_MAX = 1024  # units the boundary loop may walk (past the ones too cheap to change gold)
+TABLE_EXACT_MAX = 2.0 ** 53   # running totals (and gold − total) are exact integers in a float below this
+TABLE_MAX_LEN = 1 << 16       # entries per cost table; flat or shrinking price curves stop here
+TABLE_CHUNK = 64              # minimum entries added per extension
+CPC_BASE_COST, CPC_MULT = 10, 1.5
+SHARD_CPS_BONUS = 0.25   # prestige_multiplier: +25 % CPS per shard
+SHARD_TAP_BONUS = 0.05   # tap gain: +5 % per shard
+PRESTIGE_BASE_EXP = 6    # prestige level = floor(log10(total_earned)) − this
+
+# (name, base_cost, mult, unit_cps)
+UPGRADE_DEFS = (
+    ("Assistant", 15, 1.15, 0.1), ("Mine", 150, 1.15, 1.0), ("Usine", 1200, 1.15, 8.0),
+    ("Ville", 15000, 1.15, 50.0), ("Fusée", 250000, 1.15, 350.0), ("Station Orbitale", 2_500_000, 1.15, 2_000.0),
+    ("Colonies Lunaires", 20_000_000, 1.15, 12_000.0), ("Réacteur à Fusion", 150_000_000, 1.15, 75_000.0),
+    ("IA Générative", 1_200_000_000, 1.15, 520_000.0), ("Ascenseur Spatial", 9_500_000_000, 1.15, 3_600_000.0),
+    ("Terraformeur", 75_000_000_000, 1.15, 24_000_000.0), ("Portail Interstellaire", 620_000_000_000, 1.15, 170_000_000.0),
+    ("Essaim Dyson", 5_000_000_000_000, 1.15, 1_250_000_000.0), ("Matériau Exotique", 40_000_000_000_000, 1.15, 9_500_000_000.0),
+    ("Fonderie Quantique", 320_000_000_000_000, 1.15, 70_000_000_000.0), ("Ancrage Dimensionnel", 2_600_000_000_000_000, 1.15, 520_000_000_000.0),
+    ("Chantier d'Étoiles", 21_000_000_000_000_000, 1.15, 3_900_000_000_000.0), ("Moteur d'Alcubierre", 170_000_000_000_000_000, 1.15, 29_000_000_000_000.0),
+    ("Oracle Chronique", 1_350_000_000_000_000_000, 1.15, 220_000_000_000_000.0), ("Forge Cosmique", 10_800_000_000_000_000_000, 1.15, 1_650_000_000_000_000.0),
+)
+
+# Data-driven achievements: stat key + comparator + threshold (indexed, see AchievementIndex).
+# Stats: total_earned, cpc, cps, prestige_shards, upgrades.<name>. A "check" callable instead is the slow path.
+ACH_DEFS = {
+    "first_click": {"name": "Premier Tap", "desc": "Fais ton premier clic.", "stat": "total_earned", "op": ">=", "value": 1},
+    "cpc5": {"name": "Doigt musclé", "desc": "Atteins CPC ≥ 5.", "stat": "cpc", "op": ">=", "value": 5},
+    "cpc20": {"name": "Index d'acier", "desc": "Atteins CPC ≥ 20.", "stat": "cpc", "op": ">=", "value": 20},
+    "cps100": {"name": "Ça tourne tout seul", "desc": "Atteins CPS ≥ 100.", "stat": "cps", "op": ">=", "value": 100},
+    "cps10k": {"name": "Usine à or", "desc": "Atteins CPS ≥ 10K.", "stat": "cps", "op": ">=", "value": 10_000},
+    "mine10": {"name": "Mineur confirmé", "desc": "Avoir 10 Mines.", "stat": "upgrades.Mine", "op": ">=", "value": 10},
+    "fusion1": {"name": "Allumage Fusion", "desc": "Acheter 1 Réacteur à Fusion.", "stat": "upgrades.Réacteur à Fusion", "op": ">=", "value": 1},
+    "billionaire": {"name": "Milliardaire", "desc": "Gagner 1B au total.", "stat": "total_earned", "op": ">=", "value": 1_000_000_000},
+    "shard1": {"name": "Renaissance", "desc": "Gagner 1 shard.", "stat": "prestige_shards", "op": ">=", "value": 1},
+    "shard5": {"name": "Conquérant du temps", "desc": "Gagner 5 shards.", "stat": "prestige_shards", "op": ">=", "value": 5},
+    "shard10": {"name": "Seigneur des runs", "desc": "Gagner 10 shards.", "stat": "prestige_shards", "op": ">=", "value": 10},
+}
+
+# op -> (sign, strict): "<=" / "<" are indexed as ">=" / ">" on the negated stat
+ACH_OPS = {">=": (1, False), ">": (1, True), "<=": (-1, False), "<": (-1, True)}
+
+
+def stat_value(g, stat: str) -> float:
+    if stat.startswith("upgrades."): return g.upgrades.get(stat[9:], 0)
+    return getattr(g, stat)
+
+
+class AchievementIndex:
+    """Achievement definitions grouped per stat into thresholds sorted by difficulty.
+
+    A check only compares a stat against its next unmet threshold (per-state cursor), so the cost
+    does not grow with the catalogue. Definitions carrying a "check" callable are evaluated on
+    every pass (slow path)."""
+    __slots__ = ("groups", "slow")
+
+    def __init__(self, defs: dict):
+        rows = {}; self.slow = []
+        for aid, a in defs.items():
+            if "check" in a: self.slow.append((aid, a["check"])); continue
+            if a.get("op") not in ACH_OPS: raise ValueError(f"achievement {aid!r}: unknown op {a.get('op')!r}")
+            sign, strict = ACH_OPS[a["op"]]
+            rows.setdefault((a["stat"], sign), []).append((sign * a["value"], strict, aid))
+        self.groups = {}   # stat -> [(sign, keys, stricts, ids), ...]
+        for (stat, sign), r in rows.items():
+            r.sort(key=lambda t: (t[0], t[1]))   # at equal value, ">=" unlocks before ">"
+            self.groups.setdefault(stat, []).append((sign, [t[0] for t in r], [t[1] for t in r], [t[2] for t in r]))
+
+    def check(self, g, cursors: dict, stats=None) -> list:
+        """Unlock on `g` everything reached by `stats` (None = all stats); returns new ids."""
+        unlocked = []; got = g.achievements; groups = self.groups
+        for stat in (groups if stats is None else stats):
+            glist = groups.get(stat)
+            if not glist: continue
+            v = stat_value(g, stat)
+            for sign, keys, stricts, ids in glist:
+                x = sign * v; ck = (stat, sign); i = cursors.get(ck, 0); n = len(keys)
+                while i < n and (x > keys[i] or (x == keys[i] and not stricts[i])):
+                    if ids[i] not in got: got.add(ids[i]); unlocked.append(ids[i])
+                    i += 1
+                cursors[ck] = i
+        for aid, check in self.slow:
+            try:
+                if aid not in got and check(g):
+                    got.add(aid); unlocked.append(aid)
+            except Exception:
+                continue
+        return unlocked
+
+
+ACH_INDEX = AchievementIndex(ACH_DEFS)
+
+
+class CostTable:
+    """Rounded unit prices round(b·m^i) and their running totals for one price curve, extended on demand.
+
+    `unit` grows while prices stay finite floats (they are then stored exactly). `cum` stops once the
+    running total reaches TABLE_EXACT_MAX: below it every total and every gold − total is exact, so
+    `fit` agrees bit for bit with buying one unit at a time. Lookups past either end return None and
+    callers fall back to the closed forms."""
+    __slots__ = ("base", "mult", "unit", "cum", "done")
+
+    def __init__(self, base: float, mult: float):
+        self.base = base; self.mult = mult
+        self.unit = array("d"); self.cum = array("d", (0.0,))   # cum[i] = unit[0] + … + unit[i−1]
+        self.done = False   # no more entries can be added
+
+    def _grow(self, n: int) -> bool:
+        """Extend `unit` to at least `n` entries (doubling, at least TABLE_CHUNK); False if impossible."""
+        unit = self.unit
+        if n <= len(unit): return True
+        if self.done: return False
+        cum = self.cum; b = self.base; m = self.mult
+        stop = min(TABLE_MAX_LEN, max(n, 2 * len(unit), len(unit) + TABLE_CHUNK))
+        exact = len(cum) == len(unit) + 1; total = cum[-1]
+        for i in range(len(unit), stop):
+            try: c = b * (m ** i)
+            except OverflowError: c = INF
+            if c == INF: self.done = True; break
+            c = float(int(round(c))); unit.append(c)
+            if exact:
+                if total + c >= TABLE_EXACT_MAX: exact = False
+                else: total += c; cum.append(total)
+        else:
+            if stop == TABLE_MAX_LEN: self.done = True
+        return n <= len(unit)
+
+    def price(self, i: int):
+        """Unit price at count `i` (an int, as the formula returns), or None past the table."""
+        if 0 <= i < len(self.unit) or (i >= 0 and self._grow(i + 1)): return int(self.unit[i])
+        return None
+
+    def total(self, i: int, k: int):
+        """Exact price of units i … i+k−1, or None once that leaves the exact range."""
+        cum = self.cum; j = i + k
+        if i < 0 or k < 0: return None
+        if j >= len(cum):
+            self._grow(j)
+            if j >= len(cum): return None
+        return cum[j] - cum[i]
+
+    def fit(self, i: int, gold, limit: int = None):
+        """(qty, cost) of the most units from count `i` that `gold` covers (capped at `limit`), found by
+        binary search on the running totals; None when the answer may lie past the exact range."""
+        if gold.__class__ is not float and gold.__class__ is not int: return None
+        if not 0 <= gold < TABLE_EXACT_MAX or i < 0: return None
+        cum = self.cum
+        while True:   # extend until the table ends past what gold (or limit) reaches
+            top = len(cum) - 1
+            if top >= i and (cum[top] - cum[i] > gold or (limit is not None and top - i >= limit)): break
+            if len(cum) <= len(self.unit) or not self._grow(len(self.unit) + 1): return None
+        lo, hi = i, top if limit is None else min(top, i + limit)   # cum[lo] − cum[i] <= gold always
+        while lo < hi:
+            mid = (lo + hi + 1) >> 1
+            if cum[mid] - cum[i] <= gold: lo = mid
+            else: hi = mid - 1
+        return lo - i, cum[lo] - cum[i]
+
+
+class Economy:
+    """Static upgrade data and cost formulas, shared by every GameState.
+
+    Prices come from one CostTable per upgrade (and one for the tap upgrade); the formulas below
+    only run once a count or a total leaves the tables."""
+    __slots__ = ("defs", "names", "base_cost", "mult", "unit_cps", "cpc_base", "cpc_mult", "tables", "cpc_table",
+                 "shard_cps_bonus", "shard_tap_bonus", "prestige_base_exp")
+
+    def __init__(self, defs=UPGRADE_DEFS, cpc_base: float = CPC_BASE_COST, cpc_mult: float = CPC_MULT,
+                 shard_cps_bonus: float = SHARD_CPS_BONUS, shard_tap_bonus: float = SHARD_TAP_BONUS, prestige_base_exp: int = PRESTIGE_BASE_EXP):
+        self.defs = tuple(defs)
+        self.names = tuple(d[0] for d in self.defs)
+        self.base_cost = {name: base for (name, base, _m, _u) in self.defs}
+        self.mult = {name: m for (name, _b, m, _u) in self.defs}
+        self.unit_cps = {name: u for (name, _b, _m, u) in self.defs}
+        self.cpc_base = cpc_base; self.cpc_mult = cpc_mult
+        self.tables = {name: CostTable(base, m) for (name, base, m, _u) in self.defs}
+        self.cpc_table = CostTable(cpc_base, cpc_mult)
+        self.shard_cps_bonus = shard_cps_bonus; self.shard_tap_bonus = shard_tap_bonus; self.prestige_base_exp = int(prestige_base_exp)
+
+    def replace(self, **kw):
+        """Copy with some constructor arguments changed (balance sweeps)."""
+        args = dict(defs=self.defs, cpc_base=self.cpc_base, cpc_mult=self.cpc_mult, shard_cps_bonus=self.shard_cps_bonus,
+                    shard_tap_bonus=self.shard_tap_bonus, prestige_base_exp=self.prestige_base_exp)
+        args.update(kw); return Economy(**args)
+
+    @classmethod
+    def from_dict(cls, data):
+        """{"upgrades": [{"name", "base_cost", "mult", "unit_cps"}, …], "cpc": {"base_cost", "mult"},
+        "prestige": {"cps_per_shard", "tap_per_shard", "base_exp"}} (a bare list of upgrades is accepted too)."""
+        rows = data if isinstance(data, list) else data.get("upgrades")
+        if not isinstance(rows, list) or not rows: raise ValueError("upgrade definitions: 'upgrades' must be a non-empty list")
+        defs = []; seen = set()
+        for i, r in enumerate(rows):
+            try:
+                base = r["base_cost"]; base = base if base.__class__ is int else float(base)   # keep exact integers
+                d = (str(r["name"]), base, float(r["mult"]), float(r["unit_cps"]))
+            except (KeyError, TypeError, ValueError) as e: raise ValueError(f"upgrade #{i}: {e!r}") from None
+            if d[0] in seen: raise ValueError(f"upgrade {d[0]!r}: duplicate name")
+            if not (d[1] > 0 and d[2] > 0 and math.isfinite(d[1]) and math.isfinite(d[2])):
+                raise ValueError(f"upgrade {d[0]!r}: base_cost and mult must be positive")
+            if not (d[3] >= 0 and math.isfinite(d[3])): raise ValueError(f"upgrade {d[0]!r}: unit_cps must be finite and >= 0")
+            seen.add(d[0]); defs.append(d)
+        cpc = {} if isinstance(data, list) else data.get("cpc") or {}
+        pr = {} if isinstance(data, list) else data.get("prestige") or {}
+        return cls(defs, cpc.get("base_cost", CPC_BASE_COST), cpc.get("mult", CPC_MULT), float(pr.get("cps_per_shard", SHARD_CPS_BONUS)),
+                   float(pr.get("tap_per_shard", SHARD_TAP_BONUS)), int(pr.get("base_exp", PRESTIGE_BASE_EXP)))
+
+    @classmethod
+    def from_file(cls, path: str):
+        with open(path, "r", encoding="utf-8") as f: return cls.from_dict(json.load(f))
+
+    def to_dict(self) -> dict:
+        return {"upgrades": [{"name": n, "base_cost": b, "mult": m, "unit_cps": u} for (n, b, m, u) in self.defs],
+                "cpc": {"base_cost": self.cpc_base, "mult": self.cpc_mult},
+                "prestige": {"cps_per_shard": self.shard_cps_bonus, "tap_per_shard": self.shard_tap_bonus, "base_exp": self.prestige_base_exp}}
+
+    def upgrade_cost(self, name: str, count: int) -> int:
+        """Rounded unit price; a BigNum once it no longer fits a float."""
+        c = self.tables[name].price(count)
+        if c is not None: return c
+        try:
+            c = self.base_cost[name] * (self.mult[name] ** count)
+            if c != INF: return int(round(c))
+        except OverflowError:
+            pass
+        return pow_mul(self.base_cost[name], self.mult[name], count)
+
+    def _first_price(self, name: str, count: int) -> float:
+        return pow_mul(self.base_cost[name], self.mult[name], count)
+
+    def bulk_cost(self, name: str, count: int, qty: int) -> float:
+        """Price of `qty` units bought from `count`: the exact sum of rounded unit prices from the
+        table, else the closed form b·m^count·(m^qty − 1)/(m − 1)."""
+        if qty <= 0: return 0.0
+        t = self.tables[name].total(count, qty)
+        if t is not None: return t
+        b = self._first_price(name, count); m = self.mult[name]
+        series = qty if abs(m - 1.0) < 1e-9 else (pow_mul(1.0, m, qty) - 1.0) / (m - 1.0)
+        r = b * series
+        if r == INF and b.__class__ is float: r = BigNum.of(b) * series   # float product overflowed
+        return r
+
+    def _unit_loop(self, name: str, count: int, gold: float, limit: int = None):
+        """Reference semantics: buy one rounded unit at a time. Returns (qty, gold_spent)."""
+        g = gold; n = 0
+        while limit is None or n < limit:
+            c = self.upgrade_cost(name, count + n)
+            if g < c: break
+            g -= c; n += 1
+        return n, gold - g
+
+    def affordable(self, name: str, count: int, gold: float, limit: int = None):
+        """(qty, cost) of the largest purchase `gold` covers, capped at `limit`.
+
+        Within the exact range this is a binary search on the cost table: O(log k). Beyond it the
+        closed form ignores the per-unit rounding of upgrade_cost (at most 0.5 per unit) and float
+        error on the running total. Purchases of up to EXACT_SUM_MAX units use the unit loop; so does a
+        larger result within that error band of the gold boundary, through _band_loop, which skips
+        the leading units too cheap to change gold and walks at most BAND_LOOP_MAX others. Cost:
+        O(log k) plus O(min(k, log(2^55) / log(mult), BAND_LOOP_MAX)) unit prices. Quantities match
+        the unit loop exactly, except on curves flatter than that bound (mult < ~1.04), where the
+        boundary may be off by one unit."""
+        if gold.__class__ is float and not math.isfinite(gold): return 0, 0.0   # would never leave the loop
+        r = self.tables[name].fit(count, gold, limit)
+        if r is not None: return r
+        b = self._first_price(name, count); m = self.mult[name]
+        if gold < b or b <= 0: return self._unit_loop(name, count, gold, 1)
+        ratio = gold / b
+        if abs(m - 1.0) < 1e-9: k = int(ratio)
+        elif ratio.__class__ is float: k = int(math.floor(math.log(1 + (m - 1) * ratio, m)))
+        else: k = int(math.floor((log10(ratio) + math.log10(m - 1)) / math.log10(m)))
+        if limit is not None: k = min(k, limit)
+        while k > 0 and self.bulk_cost(name, count, k) > gold: k -= 1
+        while (limit is None or k < limit) and self.bulk_cost(name, count, k + 1) <= gold: k += 1
+        if k <= EXACT_SUM_MAX: return self._unit_loop(name, count, gold, limit)
+        tol = 0.5 * (k + 1) + 2 * (k + 1) * ulp(gold)
+        cost = self.bulk_cost(name, count, k)
+        capped = limit is not None and k >= limit
+        if gold - cost <= tol or (not capped and self.bulk_cost(name, count, k + 1) - gold <= tol):
+            return self._band_loop(name, count, gold, k, limit)
+        return k, cost
+
+    def _band_loop(self, name: str, count: int, gold, k: int, limit: int = None):
+        """_unit_loop for a result `k` near the gold boundary, bounded. Units priced under 1/8 ulp of
+        gold leave it unchanged in the loop (g − c rounds back to g), so they are skipped for free;
+        the loop runs from the first unit that counts. If that still leaves more than BAND_LOOP_MAX
+        units (near-flat curve), the first ones are priced in closed form instead."""
+        m = self.mult[name]; skip = 0
+        if m > 1.0:
+            tiny = (BigNum(math.ulp(gold.m), gold.e) if gold.__class__ is BigNum else math.ulp(gold)) / 8
+            skip = max(0, min(k, int((log10(tiny) - log10(self._first_price(name, count))) / math.log10(m))))
+            while skip > 0 and self.upgrade_cost(name, count + skip - 1) >= tiny: skip -= 1
+            while skip < k and self.upgrade_cost(name, count + skip) < tiny: skip += 1
+        if k - skip <= BAND_LOOP_MAX:
+            q, cost = self._unit_loop(name, count + skip, gold, None if limit is None else limit - skip)
+            return skip + q, self.bulk_cost(name, count, skip) + cost
+        j = k - BAND_LOOP_MAX // 2; head = self.bulk_cost(name, count, j)
+        room = BAND_LOOP_MAX if limit is None else min(limit - j, BAND_LOOP_MAX)
+        q, tail = self._unit_loop(name, count + j, gold - head, room)
+        return j + q, head + tail
+
+    def max_affordable_qty(self, name: str, count: int, gold: float) -> int:
+        return self.affordable(name, count, gold)[0]
+
+    def cpc_cost(self, level: int) -> int:
+        try:
+            c = self.cpc_table.price(int(level))
+            return c if c is not None else int(round(self.cpc_base * (self.cpc_mult ** int(level))))
+        except Exception: return int(self.cpc_base)
+
+    @staticmethod
+    def cpc_value(level: int) -> float:
+        return 1.0 + level * 1.0
+
+    def base_cps(self, upgrades: dict) -> float:
+        cps = 0.0
+        for name, unit in self.unit_cps.items():
+            cps += upgrades.get(name, 0) * unit
+        return cps
+
+
+DEFAULT_ECONOMY = Economy()
+
+
+class GameState:
+    """One playthrough: numbers only, no widgets. IdleGame renders it; tests and batch jobs drive it directly."""
+    __slots__ = ("economy", "ach_defs", "ach_index", "_ach_cursors", "_dirty", "gold", "total_earned", "cpc", "cpc_level", "cps",
+                 "prestige_shards", "prestige_spent_levels", "upgrades", "discovered", "achievements", "last_time", "run_started", "autopilot", "number_format", "observers", "clock")
+
+    def __init__(self, economy: Economy = None, ach_defs: dict = None, clock=time.time):
+        self.economy = economy or DEFAULT_ECONOMY
+        self.clock = clock       # wall clock for run/save timestamps (idle_replay injects the recorded one)
+        self.ach_defs = ACH_DEFS if ach_defs is None else ach_defs
+        self.ach_index = ACH_INDEX if self.ach_defs is ACH_DEFS else AchievementIndex(self.ach_defs)
+        self.last_time = clock()
+        self.autopilot = False   # opt-in: spend offline income via fast_forward()
+        self.number_format = "suffix"   # player's display preference (idle_numbers.FORMAT_MODES)
+        self.observers = []      # callables(name) told when an upgrade count changes (None = all of them)
+        self.reset()
+
+    def reset(self):
+        self.gold = 0.0; self.total_earned = 0.0
+        self.cpc = 1.0; self.cpc_level = 0; self.cps = 0.0
+        self.prestige_shards = 0; self.prestige_spent_levels = 0
+        self.run_started = self.clock()   # last reset / prestige: run length for the planner
+        self.upgrades = {name: 0 for name in self.economy.names}
+        self.discovered = set(); self.achievements = set()
+        self._ach_cursors = {}; self._dirty = None   # None = every stat needs a check
+        self._notify(None)
+
+    def clone(self) -> "GameState":
+        """Independent copy of the numbers (no observers), for projections."""
+        g = GameState.__new__(GameState)
+        for k in GameState.__slots__: setattr(g, k, getattr(self, k))
+        g.upgrades = dict(self.upgrades); g.discovered = set(self.discovered); g.achievements = set(self.achievements)
+        g._ach_cursors = dict(self._ach_cursors); g._dirty = None; g.observers = []
+        return g
+
+    # ---------------- Rules ----------------
+    @property
+    def prestige_multiplier(self) -> float:
+        return 1.0 + self.economy.shard_cps_bonus * float(self.prestige_shards)
+
+    @property
+    def tap_gain(self) -> float:
+        return self.cpc * (1.0 + self.economy.shard_tap_bonus * self.prestige_shards)
+
+    def _credit_big(self, gain):
+        """Float sum overflowed: continue in BigNum instead of inf (rare path, kept out of tap/advance)."""
+        return safe_add(self.gold, gain), safe_add(self.total_earned, gain)
+
+    def _notify(self, name):
+        for cb in self.observers: cb(name)
+
+    def _touch(self, stat: str):
+        if self._dirty is not None: self._dirty.add(stat)
+
+    def recalc_cps(self) -> float:
+        self.cps = self.economy.base_cps(self.upgrades) * self.prestige_multiplier
+        self._touch("cps")
+        return self.cps
+
+    def upgrade_cost(self, name: str) -> int:
+        return self.economy.upgrade_cost(name, self.upgrades.get(name, 0))
+
+    def max_affordable_qty(self, name: str) -> int:
+        return self.economy.max_affordable_qty(name, self.upgrades.get(name, 0), self.gold)
+
+    def mode_qty(self, name: str, mode: str) -> int:
+        """Units a BUY_MODES button targets (max = what the current gold covers)."""
+        if mode == "max": return self.max_affordable_qty(name)
+        if mode == "palier": return MILESTONE_STEP - self.upgrades.get(name, 0) % MILESTONE_STEP
+        return int(mode[1:])
+
+    def mode_cost(self, name: str, mode: str) -> float:
+        qty = self.mode_qty(name, mode)
+        return self.economy.bulk_cost(name, self.upgrades.get(name, 0), max(1, qty))
+
+    def cpc_cost(self) -> int:
+        return self.economy.cpc_cost(self.cpc_level)
+
+    # ---------------- Simulation API ----------------
+    def advance(self, seconds: float) -> float:
+        """Passive income over `seconds` (CPS is constant between purchases)."""
+        if seconds <= 0 or self.cps <= 0: return 0.0
+        gain = self.cps * seconds
+        g = self.gold + gain; t = self.total_earned + gain
+        if t == INF: g, t = self._credit_big(gain)   # gold <= total_earned, so one check covers both
+        self.gold = g; self.total_earned = t; self._touch("total_earned")
+        return gain
+
+    def tap(self, n: int = 1) -> float:
+        gain = self.cpc * (1.0 + self.economy.shard_tap_bonus * self.prestige_shards) * n   # tap_gain, inlined (hot path)
+        g = self.gold + gain; t = self.total_earned + gain
+        if t == INF: g, t = self._credit_big(gain)   # gold <= total_earned, so one check covers both
+        self.gold = g; self.total_earned = t; self._touch("total_earned")
+        return gain
+
+    def buy(self, name: str, qty: int = 1, partial: bool = True) -> int:
+        """Buy up to `qty` units (None = as many as affordable) in O(log k) (see Economy.affordable); returns how many were bought.
+        With partial=False the purchase is all-or-nothing."""
+        bought, cost = self.economy.affordable(name, self.upgrades.get(name, 0), self.gold, qty)
+        if bought <= 0 or (not partial and qty is not None and bought < qty): return 0
+        self.gold -= cost; self.upgrades[name] += bought; self._touch("upgrades." + name)
+        self.discovered.add(name); self.recalc_cps()
+        if self.observers: self._notify(name)
+        return bought
+
+    def buy_mode(self, name: str, mode: str) -> int:
+        if mode == "max": return self.buy(name, None)
+        return self.buy(name, self.mode_qty(name, mode), partial=False)
+
+    def buy_cpc(self) -> bool:
+        cost = self.cpc_cost()
+        if self.gold < cost: return False
+        self.gold -= cost; self.cpc_level += 1; self.cpc = self.economy.cpc_value(self.cpc_level); self._touch("cpc")
+        self.recalc_cps()
+        return True
+
+    # Prestige -----------------------------------------
+    def current_level(self) -> int:
+        t = max(1.0, self.total_earned)
+        try: lv = int(max(0, math.floor(log10(t)) - self.economy.prestige_base_exp))
+        except Exception: lv = 0
+        return lv
+
+    def potential_shards_gain(self) -> int:
+        return max(0, self.current_level() - int(self.prestige_spent_levels))
+
+    def prestige(self) -> int:
+        """Convert pending levels to shards and reset the run; returns the shard gain (0 = nothing done)."""
+        gain = self.potential_shards_gain()
+        if gain <= 0: return 0
+        self.prestige_shards += gain; self.prestige_spent_levels += gain
+        self.run_started = self.clock()
+        self.gold = 0.0; self.cpc = 1.0; self.cpc_level = 0
+        self.upgrades = {name: 0 for name in self.economy.names}
+        self.discovered = set(); self._dirty = None
+        self.recalc_cps(); self._notify(None)
+        return gain
+
+    # Achievements -------------------------------------
+    def check_achievements(self) -> list:
+        """Unlock every satisfied achievement; returns the newly unlocked ids.
+        Only stats changed since the last call are looked at (all of them after load/reset/prestige)."""
+        stats = self._dirty; self._dirty = set()
+        return self.ach_index.check(self, self._ach_cursors, stats)
+
+    # ---------------- Persistence ----------------
+    def to_dict(self, now: float = None) -> dict:
+        return {
+            "schema_version": SCHEMA_VERSION,
+            "gold": to_json(self.gold), "cpc_level": int(self.cpc_level),
+            "upgrades": {k:int(v) for k,v in self.upgrades.items()},
+            "last_time": self.clock() if now is None else now, "total_earned": to_json(self.total_earned),
+            "prestige_shards": int(self.prestige_shards), "achievements": list(self.achievements),
+            "prestige_spent_levels": int(self.prestige_spent_levels),
+            "discovered": list(self.discovered), "run_started": self.run_started,
+            "autopilot": bool(self.autopilot), "number_format": self.number_format,
+        }
+
+    def load_dict(self, data: dict):
+        """Restore from a schema-670 dict. Raises on malformed data; offline gains are applied separately."""
+        self.gold = from_json(data.get("gold", 0.0))
+        self.cpc_level = int(data.get("cpc_level", 0)); self.cpc = self.economy.cpc_value(self.cpc_level)
+        saved_upgrades = data.get("upgrades", {})
+        if isinstance(saved_upgrades, dict):
+            for name in self.upgrades.keys():
+                self.upgrades[name] = int(saved_upgrades.get(name, 0))
+        self.total_earned = from_json(data.get("total_earned", to_json(self.gold)))
+        self.prestige_shards = int(data.get("prestige_shards", 0))
+        known = set(self.ach_defs.keys())
+        self.achievements = set([a for a in data.get("achievements", []) if a in known])
+        self.prestige_spent_levels = int(data.get("prestige_spent_levels", 0))
+        disc = data.get("discovered")
+        if isinstance(disc, list):
+            self.discovered = set([n for n in disc if n in self.upgrades])
+        else:
+            self.discovered = set([n for n,c in self.upgrades.items() if c>0])
+        self.last_time = float(data.get("last_time", self.clock()))
+        self.run_started = float(data.get("run_started", self.last_time))
+        self.autopilot = bool(data.get("autopilot", False))
+        self.number_format = str(data.get("number_format", "suffix"))
+        self._ach_cursors = {}; self._dirty = None
+        self.recalc_cps(); self._notify(None)
+
+    def apply_offline(self, now: float = None, cap_hours: float = OFFLINE_HOURS_CAP):
+        """Credit passive income since `last_time` (capped), through the autopilot if enabled (upgrades
+        and the CPC upgrade, like the UI offers). Returns (gain, elapsed_seconds, summary) — summary is
+        None without autopilot."""
+        now = self.clock() if now is None else now
+        elapsed = max(0.0, now - self.last_time); span = min(elapsed, cap_hours * 3600.0)
+        if self.autopilot:
+            summary = self.fast_forward(span, include_cpc=True); gain = summary["gold"]
+        else:
+            summary = None; gain = self.advance(span)
+        self.last_time = now
+        return gain, elapsed, summary
+
+    def _frontier(self):
+        """Index of the first undiscovered upgrade (the only locked one the UI offers), or None."""
+        for i, name in enumerate(self.economy.names):
+            if name not in self.discovered: return i
+        return None
+
+    def fast_forward(self, seconds: float, include_cpc: bool = False, stop_total=None, trace: list = None,
+                     max_events: int = None) -> dict:
+        """Event-driven autopilot over `seconds` of passive income.
+
+        Candidates sit in a heap keyed by price: with one shared gold pool the cheapest candidate is
+        always the next one affordable, so the loop jumps straight from purchase to purchase
+        (advance by (cost - gold) / cps) instead of ticking. Offers what the UI offers: discovered
+        upgrades, the next undiscovered one, and optionally the CPC upgrade.
+        `stop_total` ends the run early once total_earned reaches it; `trace` receives
+        (elapsed, total_earned) after every purchase; `max_events` ends it right after that many
+        purchases. "seconds" in the result is the time used."""
+        names = self.economy.names; frontier = self._frontier()
+        heap = [(self.upgrade_cost(n), i, n) for i, n in enumerate(names) if n in self.discovered or i == frontier]
+        if include_cpc: heap.append((self.cpc_cost(), -1, None))
+        heapq.heapify(heap)
+        left = max(0.0, float(seconds)); gained = 0.0; bought = {}; cpc_levels = 0; events = 0
+        while heap and events != max_events:
+            cost, i, name = heap[0]
+            if self.gold < cost:
+                if self.cps <= 0: break
+                wait = (cost - self.gold) / self.cps
+                if wait > left: break
+                if stop_total is not None and self.total_earned + self.cps * wait >= stop_total: break
+                gained += self.advance(wait); left -= wait
+                if self.gold < cost: self.gold = num(cost)   # absorb sub-ulp rounding of wait
+            heapq.heappop(heap); events += 1
+            if name is None:
+                self.buy_cpc(); cpc_levels += 1
+                heapq.heappush(heap, (self.cpc_cost(), -1, None)); continue
+            self.buy(name, 1); bought[name] = bought.get(name, 0) + 1
+            if trace is not None: trace.append((seconds - left, self.total_earned))
+            heapq.heappush(heap, (self.upgrade_cost(name), i, name))
+            if i == frontier:
+                frontier = self._frontier()
+                if frontier is not None: heapq.heappush(heap, (self.upgrade_cost(names[frontier]), frontier, names[frontier]))
+        rest = 0.0 if events == max_events else left
+        if events != max_events and stop_total is not None and self.cps > 0: rest = min(left, max(0.0, (stop_total - self.total_earned) / self.cps))
+        gained += self.advance(rest)
+        return {"seconds": float(seconds) - left + rest, "gold": gained, "bought": bought, "cpc_levels": cpc_levels, "events": events}
+
+
+class LogicClock:
+    """Fixed-timestep driver for a GameState.
+
+    Ticks are counted against time.monotonic() from a fixed origin, so scheduler jitter or a blocked
+    mainloop never adds or drops income. Income is closed-form from an anchor: the tick at which the
+    state last changed outside the clock (tap, purchase, prestige, load...) and its gold / total then;
+    credit_to(k) sets them to the anchor values advanced by (k - anchor) / hz in one advance(). The
+    result depends only on the tick count, not on how pumps were spread (idle_replay relies on it).
+    More than `cap_seconds` of due ticks (a suspend that monotonic time counted) is capped like
+    offline gains; a suspend only the wall clock saw is caught up in one advance(), capped too.
+    Both are reported to `recorder` when one is attached."""
+    __slots__ = ("state", "hz", "mono", "wall", "cap", "ticks", "recorder", "_origin", "_last_mono", "_last_wall",
+                 "_k0", "_gold0", "_total0", "_gained", "_seen")
+
+    def __init__(self, state: GameState, hz: float = 10.0, mono=time.monotonic, wall=time.time,
+                 cap_seconds: float = OFFLINE_HOURS_CAP * 3600.0):
+        self.state = state; self.hz = float(hz); self.mono = mono; self.wall = wall; self.cap = cap_seconds
+        self._origin = self._last_mono = mono(); self._last_wall = wall(); self.ticks = 0; self.recorder = None
+        self._seen = None   # (gold, total, cps) objects the clock last wrote; anything else = re-anchor
+
+    def _anchor(self, tick: int):
+        st = self.state
+        self._k0 = tick; self._gold0 = st.gold; self._total0 = st.total_earned; self._gained = 0.0
+        self._seen = (st.gold, st.total_earned, st.cps)
+
+    def credit_to(self, tick: int) -> float:
+        """Credit income up to absolute tick `tick`; returns the gold gained by this call."""
+        st = self.state; seen = self._seen
+        if seen is None or st.gold is not seen[0] or st.total_earned is not seen[1] or st.cps is not seen[2]:
+            self._anchor(self.ticks)
+        if tick <= self.ticks: return 0.0
+        before = self._gained
+        st.gold = self._gold0; st.total_earned = self._total0
+        self._gained = st.advance((tick - self._k0) / self.hz)
+        self.ticks = tick; self._seen = (st.gold, st.total_earned, st.cps)
+        return self._gained - before
+
+    def skip(self, n: int):
+        """Let `n` ticks pass unpaid (over the cap)."""
+        self.credit_to(self.ticks); self.ticks += n; self._anchor(self.ticks)
+
+    def pump(self) -> float:
+        """Credit every tick due since the last call; returns the gold gained."""
+        m = self.mono(); w = self.wall(); gain = 0.0
+        suspended = (w - self._last_wall) - (m - self._last_mono)
+        self._last_mono = m; self._last_wall = w
+        if suspended > 1.0:
+            span = min(suspended, self.cap); gain += self.state.advance(span)
+            if self.recorder is not None: self.recorder.gap(span)
+        target = int((m - self._origin) * self.hz)
+        excess = target - self.ticks - int(self.cap * self.hz)
+        if excess > 0:
+            if self.recorder is not None: self.recorder.skip(excess)
+            self.skip(excess)
+        gain += self.credit_to(target)
+        self.state.last_time = w
+        return gain
+
+    def next_tick_in(self) -> float:
+        """Seconds until the next tick boundary (to schedule the next pump on it)."""
+        period = 1.0 / self.hz
+        return period - (self.mono() - self._origin) % period
+
+    def rebase(self, hz: float):
+        """New rate, tick numbering restarts at 0 (income so far must already be credited)."""
+        self.hz = float(hz); self._origin = self._last_mono; self.ticks = 0; self._seen = None
+
+    def set_hz(self, hz: float):
+        self.pump()
+        if self.recorder is not None: self.recorder.rate(float(hz))   # stamped with the tick it lands after
+        self.rebase(hz)
+
+
+class BuyAdvisor:
+    """Ranks the offered upgrades (discovered + next locked one) by payback time:
+    cost / marginal CPS, plus the time to afford it at the current CPS.
+
+    The heap is keyed on the pure payback part, which only moves when that row's count changes
+    (the prestige multiplier scales every row alike), so a purchase is one lazy push. Ranking walks
+    the heap best-first and stops once the payback alone exceeds the best full score found."""
+    __slots__ = ("state", "_heap", "_ver", "_frontier")
+
+    def __init__(self, state: GameState):
+        self.state = state; self._heap = []; self._ver = {}; self._frontier = None
+        state.observers.append(self._on_change)
+        self._on_change(None)
+
+    def _payback(self, name: str) -> float:
+        """Cost / marginal CPS; inf for a row that adds no CPS (never pays back, ranked last)."""
+        gain = self.state.economy.unit_cps[name] * self.state.prestige_multiplier
+        return self.state.upgrade_cost(name) / gain if gain > 0 else math.inf
+
+    def _push(self, name: str):
+        v = self._ver.get(name, 0) + 1; self._ver[name] = v
+        heapq.heappush(self._heap, (self._payback(name), v, name))
+
+    def _on_change(self, name):
+        st = self.state
+        if name is None:   # reset / prestige / load: rebuild
+            self._heap = []; self._ver = {}
+            for n in st.economy.names:
+                if n in st.discovered: self._push(n)
+        else:
+            self._push(name)
+        frontier = st._frontier()
+        if frontier is not None and (name is None or frontier != self._frontier):
+            self._push(st.economy.names[frontier])
+        self._frontier = frontier
+        if len(self._heap) > 4 * max(1, len(self._ver)):   # drop stale entries now and then
+            self._heap = [e for e in self._heap if self._ver.get(e[2]) == e[1]]; heapq.heapify(self._heap)
+
+    def ranking(self, k: int = None) -> list:
+        """[(score_seconds, name), ...] best first; `k` limits how many are returned."""
+        st = self.state; heap = self._heap; popped = []; found = []
+        gold = st.gold; cps = st.cps
+        while heap:
+            entry = heapq.heappop(heap); popped.append(entry)
+            p, v, name = entry
+            if self._ver.get(name) != v: continue
+            if k is not None and len(found) >= k and p >= found[-1][0]: break
+            cost = st.upgrade_cost(name)
+            wait = 0.0 if gold >= cost else (math.inf if cps <= 0 else (cost - gold) / cps)
+            found.append((p + wait, name)); found.sort()
+            if k is not None: del found[k:]
+        for entry in popped:
+            if self._ver.get(entry[2]) == entry[1]: heapq.heappush(heap, entry)
+        return found
+
+    def best(self):
+        r = self.ranking(1)
+        return r[0][1] if r else None
+
+
+class PrestigePlanner:
+    """Time to the next shards, and the prestige moment that maximises shards per hour of the run.
+
+    The projection replays the autopilot purchase plan (fast_forward: closed-form income between
+    purchases) on a clone, up to `levels` shard thresholds ahead, keeping (total_earned, seconds)
+    breakpoints. total_earned grows linearly between breakpoints, so any later total maps back onto
+    that curve in closed form: taps and ticking income do not invalidate it. It is rebuilt only when
+    CPS, shards or spent levels change, and stops after `events` purchases (past them, the final CPS
+    is extrapolated) so a rebuild costs a bounded ~10-20 ms however far the thresholds are."""
+    __slots__ = ("state", "levels", "horizon", "events", "_key", "_totals", "_times", "_cps_end", "rebuilds")
+
+    def __init__(self, state: GameState, levels: int = 3, horizon: float = 30 * 86400.0, events: int = 2000):
+        self.state = state; self.levels = levels; self.horizon = horizon; self.events = events
+        self._key = None; self._totals = []; self._times = []; self._cps_end = 0.0; self.rebuilds = 0
+
+    def _base(self) -> int:
+        st = self.state
+        return max(st.current_level(), int(st.prestige_spent_levels))   # next shard at 10^(base_exp + base + 1)
+
+    def _threshold(self, level: int) -> float:
+        return 10.0 ** (self.state.economy.prestige_base_exp + level)
+
+    def _project(self):
+        st = self.state; self.rebuilds += 1
+        self._key = (st.cps, st.prestige_shards, st.prestige_spent_levels)
+        self._totals = []; self._times = []; self._cps_end = 0.0
+        top = st.economy.prestige_base_exp + self._base() + self.levels
+        if st.total_earned.__class__ is not float or top >= FLOAT_E_MAX: return   # beyond float totals: no projection
+        g = st.clone(); trace = [(0.0, g.total_earned)]
+        used = g.fast_forward(self.horizon, stop_total=self._threshold(top - st.economy.prestige_base_exp), trace=trace,
+                              max_events=self.events)["seconds"]
+        trace.append((used, g.total_earned))
+        for t, total in trace:
+            if total.__class__ is not float: break
+            if self._totals and total <= self._totals[-1]: self._times[-1] = t; continue   # purchases at one instant
+            self._totals.append(total); self._times.append(t)
+        self._cps_end = g.cps
+
+    def _time_at(self, total: float) -> float:
+        """Projected seconds (from the projection origin) at which total_earned reaches `total`."""
+        T = self._totals; ts = self._times
+        i = bisect_right(T, total) - 1
+        if i < 0 or total == T[i]: return ts[max(i, 0)]
+        if i + 1 < len(T): return ts[i] + (total - T[i]) / (T[i + 1] - T[i]) * (ts[i + 1] - ts[i])
+        return ts[i] + (total - T[i]) / self._cps_end if self._cps_end > 0 else INF
+
+    def time_to_total(self, total: float) -> float:
+        st = self.state
+        if (st.cps, st.prestige_shards, st.prestige_spent_levels) != self._key: self._project()
+        if not self._totals: return INF
+        now = st.total_earned
+        if now >= total: return 0.0
+        return max(0.0, self._time_at(total) - self._time_at(now))
+
+    def plan(self, run_seconds: float = None) -> dict:
+        """{"gain", "next_in", "options": [(gain, seconds_from_now, shards_per_hour), ...], "best": option or None}.
+        `run_seconds`: length of the current run so far (default: since state.run_started)."""
+        st = self.state; gain = st.potential_shards_gain(); base = self._base()
+        run = max(1.0, (st.clock() - st.run_started) if run_seconds is None else run_seconds)
+        options = [(gain, 0.0, gain * 3600.0 / run)] if gain > 0 else []
+        for k in range(1, self.levels + 1):
+            wait = self.time_to_total(self._threshold(base + k)) if base + k + st.economy.prestige_base_exp < FLOAT_E_MAX else INF
+            if wait == INF: break
+            g = base + k - int(st.prestige_spent_levels)
+            options.append((g, wait, g * 3600.0 / (run + wait)))
+        next_in = next((w for g, w, _ in options if g > gain), INF)
+        best = max(options, key=lambda o: o[2]) if options else None
+        return {"gain": gain, "next_in": next_in, "options": options, "best": best}
+
+
+def bench_ticks(seconds: float = 1.0, start_gold=1e6) -> float:
+    """Headless throughput: 1 s logic ticks per wall-clock second, with a greedy buyer."""
+    g = GameState(); g.gold = start_gold; g.recalc_cps()
+    names = g.economy.names; ticks = 0
+    t0 = time.perf_counter(); deadline = t0 + seconds
+    while True:
+        for _ in range(1000):
+            g.advance(1.0); g.tap()
+            g.buy(names[ticks % len(names)])
+            g.check_achievements()
+            ticks += 1
+        if time.perf_counter() >= deadline: break
+    return ticks / (time.perf_counter() - t0)
+
+
+def bench_achievements(n: int = 10_000, taps: int = 100_000, seed: int = 0) -> float:
+    """Cost of tap() + check_achievements() in µs with `n` extra generated achievements."""
+    import random
+    rng = random.Random(seed); defs = dict(ACH_DEFS)
+    stats = ["total_earned", "cpc", "cps", "prestige_shards"] + ["upgrades." + d[0] for d in UPGRADE_DEFS]
+    for i in range(n):
+        defs[f"gen{i}"] = {"name": f"gen{i}", "desc": "", "stat": rng.choice(stats), "op": ">=", "value": 10 ** rng.uniform(0, 30)}
+    g = GameState(ach_defs=defs); g.check_achievements()
+    t0 = time.perf_counter()
+    for _ in range(taps):
+        g.tap(); g.check_achievements()
+    return (time.perf_counter() - t0) / taps * 1e6
+
+
+def check_bulk_consistency(trials: int = 5000, seed: int = 0) -> int:
+    """Property check: Economy.affordable agrees with the one-unit-at-a-time loop on random
+    (upgrade, count, gold, limit), including gold right on a boundary past the float range. Same
+    quantity always; cost within the per-unit rounding band. Returns the number of disagreements (0 = ok)."""
+    import random
+    rng = random.Random(seed); eco = DEFAULT_ECONOMY; bad = 0
+    for _ in range(trials):
+        name = rng.choice(eco.names); count = rng.randint(0, 400)
+        first = eco.upgrade_cost(name, count)
+        gold = first * 10 ** rng.uniform(-0.5, 6.0)
+        if rng.random() < 0.3:   # land right on a boundary
+            n = rng.randint(1, 2000); gold = float(sum(eco.upgrade_cost(name, count + i) for i in range(n)))
+        limit = rng.choice((None, None, 1, 10, 100))
+        q1, c1 = eco.affordable(name, count, gold, limit)
+        q2, c2 = eco._unit_loop(name, count, gold, limit)
+        if q1 != q2 or abs(c1 - c2) > 0.5 * q2 + 4 * q2 * math.ulp(gold) + 1e-9 * c2:
+            bad += 1
+            print(f"mismatch {name} count={count} gold={gold!r} limit={limit}: {q1},{c1!r} vs {q2},{c2!r}")
+    for _ in range(max(1, trials // 500)):   # boundaries where the totals leave the float range (BigNum gold)
+        name = rng.choice(eco.names); count = rng.randint(2300, 2700); gold = 0.0
+        for i in range(rng.randint(2500, 3000)): gold = safe_add(gold, eco.upgrade_cost(name, count + i))
+        q1, c1 = eco.affordable(name, count, gold); q2, c2 = eco._unit_loop(name, count, gold)
+        if q1 != q2 or abs(c1 - c2) > 1e-9 * c2:
+            bad += 1; print(f"mismatch {name} count={count} gold={gold!r}: {q1},{c1!r} vs {q2},{c2!r}")
+    return bad
+
+
+def check_economy_files() -> list:
+    """Economy.from_dict rejects malformed upgrade files and accepts a zero-CPS row. Returns the failures."""
+    good = DEFAULT_ECONOMY.to_dict(); fails = []
+    def variant(**row):
+        d = json.loads(json.dumps(good)); d["upgrades"][0].update(row); return d
+    bad = {"empty": [], "missing unit_cps": [{"name": "a", "base_cost": 1, "mult": 1.1}],
+           "duplicate": {"upgrades": good["upgrades"][:1] * 2}, "base_cost 0": variant(base_cost=0),
+           "mult nan": variant(mult=float("nan")), "unit_cps < 0": variant(unit_cps=-1.0),
+           "unit_cps nan": variant(unit_cps=float("nan")), "unit_cps inf": variant(unit_cps=float("inf")),
+           "unit_cps text": variant(unit_cps="x")}
+    for label, data in bad.items():
+        try: Economy.from_dict(data); fails.append(f"economy file accepted: {label}")
+        except ValueError: pass
+    try:
+        st = GameState(Economy.from_dict(variant(unit_cps=0))); st.gold = 1e9; st.discovered.update(st.economy.names)
+        if dict((n, p) for p, n in BuyAdvisor(st).ranking())[st.economy.names[0]] != math.inf: fails.append("zero-CPS row not ranked last")
+    except Exception as e: fails.append(f"zero-CPS row: {e!r}")
+    return fails
+
+
+def check_fast_forward_caps() -> list:
+    """fast_forward with max_events and stop_total together: the event cap ends the run at its last
+    purchase, stop_total alone runs up to the total. Returns the failures."""
+    fails = []
+    def run(**kw):
+        g = GameState(); g.gold = 50.0; g.buy(g.economy.names[0], 1); trace = []
+        return g, g.fast_forward(86400.0, trace=trace, **kw), trace
+    g, res, trace = run(max_events=20, stop_total=1e12)
+    if res["events"] != 20 or res["seconds"] != trace[-1][0] or g.total_earned != trace[-1][1]:
+        fails.append(f"max_events + stop_total: {res['events']} events, {res['seconds']} s (last purchase at {trace[-1][0]} s)")
+    g, res, trace = run(stop_total=1e5)
+    if not (res["events"] > 0 and abs(g.total_earned - 1e5) < 1e-6 * 1e5):
+        fails.append(f"stop_total: total {g.total_earned} after {res['events']} events")
+    return fails
+
+
+def check_offline_autopilot() -> list:
+    """12 h away with the autopilot: upgrades and CPC levels get bought. Returns the failures."""
+    g = GameState(clock=lambda: 43200.0); g.gold = 1e4; g.recalc_cps(); g.autopilot = True; g.last_time = 0.0
+    g.buy(g.economy.names[0], 5)
+    gain, elapsed, summary = g.apply_offline()
+    fails = []
+    if summary is None or summary["cpc_levels"] <= 0: fails.append(f"offline autopilot: no CPC level bought ({summary})")
+    if summary is not None and not summary["bought"]: fails.append("offline autopilot: no upgrade bought")
+    if gain <= 0 or elapsed != 43200.0: fails.append(f"offline autopilot: gain={gain} elapsed={elapsed}")
+    return fails
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv[1:]:
+        print(f"GameState: {bench_ticks():,.0f} ticks/s")
+        print(f"GameState, BigNum gold (1e400): {bench_ticks(start_gold=BigNum(1.0, 400)):,.0f} ticks/s")
+        for n in (0, 10_000):
+            print(f"tap + achievements ({len(ACH_DEFS) + n} defs): {bench_achievements(n):.2f} µs")
+    if "--check" in sys.argv[1:]:
+        n = check_bulk_consistency(); print("bulk buy vs unit loop:", "ok" if n == 0 else f"{n} mismatch(es)")
+        fails = check_economy_files() + check_fast_forward_caps() + check_offline_autopilot()
+        for f in fails: print("FAIL", f)
+        print("economy files, fast_forward caps, offline autopilot:", "ok" if not fails else f"{len(fails)} failure(s)")
+        sys.exit(1 if n or fails else 0)
+    if "--dump-upgrades" in sys.argv[1:-1]:
+        path = sys.argv[sys.argv.index("--dump-upgrades") + 1]
+        with open(path, "w", encoding="utf-8") as f: json.dump(DEFAULT_ECONOMY.to_dict(), f, ensure_ascii=False, indent=1)
+        print("définitions :", path)
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Idle Clicker — nombres au-delà des floats
+- `BigNum` : mantisse/exposant (m · 10^e), slots, pour l'or / coûts / totaux qui dépassent ~1e308.
+- Les floats restent la représentation normale : un résultat BigNum qui retombe sous FLOAT_E_MAX
+  redevient un float, donc le chemin chaud ne paie rien tant qu'on ne déborde pas.
+- `format_num` : affichage (suffixes / scientifique / ingénieur), cache LRU borné.
+- `format_duration` : durées courtes pour l'interface (« 45 s », « 3 h 05 », « 2 j 04 h »).
+Bench formatage : python idle_numbers.py --bench   |   Vérifications : python idle_numbers.py --check
+"""
+import math, sys, time, functools
+from bisect import bisect_right
+
+INF = math.inf
+FLOAT_E_MAX = 300   # results below 10**FLOAT_E_MAX are handed back as plain floats
+_ALIGN_MAX = 20     # beyond this exponent gap the smaller operand vanishes in the mantissa
+INF_E = 10 ** 9     # exponent a float ±inf saturates to: above any value the game can reach
+
+
+def _pow10(e: int) -> float:
+    return 10.0 ** e if e > -320 else 0.0
+
+
+class BigNum:
+    """m · 10**e with 1 <= |m| < 10 (or m == 0). Arithmetic, comparisons and log10 mix freely with
+    int/float operands; results that fit comfortably in a float are returned as floats.
+    A float that already overflowed (±inf) saturates to ±1 · 10**INF_E; NaN stays NaN."""
+    __slots__ = ("m", "e")
+
+    def __init__(self, m: float = 0.0, e: int = 0):
+        if m == 0 or m != m:
+            self.m = 0.0 if m == 0 else m; self.e = 0; return
+        if m == INF or m == -INF:
+            self.m = 1.0 if m > 0 else -1.0; self.e = INF_E; return
+        s = math.floor(math.log10(abs(m)))
+        if s: m = m / 10.0 ** s if s > -300 else m * 10.0 ** -s
+        e += s
+        if abs(m) >= 10.0: m /= 10.0; e += 1
+        elif abs(m) < 1.0: m *= 10.0; e -= 1
+        self.m = m; self.e = int(e)
+
+    # Construction -------------------------------------
+    @classmethod
+    def of(cls, x) -> "BigNum":
+        if x.__class__ is cls: return x
+        if isinstance(x, int) and not -1e300 < x < 1e300:
+            e = int(math.log10(abs(x))); return cls(x / 10 ** e, e)
+        return cls(float(x), 0)
+
+    @classmethod
+    def from_log10(cls, lg: float, sign: float = 1.0):
+        """10**lg, as a float when it fits."""
+        e = math.floor(lg)
+        if e < FLOAT_E_MAX: return sign * 10.0 ** lg
+        b = cls.__new__(cls); b.m = sign * 10.0 ** (lg - e); b.e = int(e)
+        return b
+
+    @staticmethod
+    def _make(m: float, e: int):
+        if m == 0: return 0.0
+        b = BigNum(m, e)
+        return b.m * _pow10(b.e) if b.e < FLOAT_E_MAX else b
+
+    # Arithmetic ---------------------------------------
+    def __add__(self, o):
+        o = BigNum.of(o)
+        if o.m == 0: return BigNum._make(self.m, self.e)
+        if self.m == 0: return BigNum._make(o.m, o.e)
+        hi, lo = (self, o) if self.e >= o.e else (o, self)
+        d = hi.e - lo.e
+        return BigNum._make(hi.m + (lo.m * _pow10(-d) if d <= _ALIGN_MAX else 0.0), hi.e)
+    __radd__ = __add__
+
+    def __neg__(self):
+        b = BigNum.__new__(BigNum); b.m = -self.m; b.e = self.e
+        return b
+
+    def __pos__(self): return self
+    def __abs__(self): return -self if self.m < 0 else self
+
+    def __sub__(self, o): return self + (-BigNum.of(o))
+    def __rsub__(self, o): return BigNum.of(o) + (-self)
+
+    def __mul__(self, o):
+        o = BigNum.of(o)
+        return BigNum._make(self.m * o.m, self.e + o.e)
+    __rmul__ = __mul__
+
+    def __truediv__(self, o):
+        o = BigNum.of(o)
+        if o.m == 0: raise ZeroDivisionError("BigNum division by zero")
+        return BigNum._make(self.m / o.m, self.e - o.e)
+
+    def __rtruediv__(self, o): return BigNum.of(o) / self
+
+    # Comparisons --------------------------------------
+    def _key(self):
+        """Sortable (sign, signed exponent, mantissa) key."""
+        if self.m == 0: return (0, 0, 0.0)
+        return (1, self.e, self.m) if self.m > 0 else (-1, -self.e, self.m)
+
+    def _cmp_key(self, o):
+        if o.__class__ is not BigNum:
+            if o != o: return None
+            if o == INF or o == -INF: return (2 if o > 0 else -2, 0, 0.0)
+            o = BigNum.of(o)
+        return o._key()
+
+    def __eq__(self, o):
+        try: return self._key() == self._cmp_key(o)
+        except (TypeError, ValueError): return NotImplemented
+    def __ne__(self, o):
+        r = self.__eq__(o)
+        return r if r is NotImplemented else not r
+    def __lt__(self, o): k = self._cmp_key(o); return k is not None and self._key() < k
+    def __le__(self, o): k = self._cmp_key(o); return k is not None and self._key() <= k
+    def __gt__(self, o): k = self._cmp_key(o); return k is not None and self._key() > k
+    def __ge__(self, o): k = self._cmp_key(o); return k is not None and self._key() >= k
+    def __hash__(self): return hash(float(self)) if self.e < 308 else hash((self.m, self.e))
+    def __bool__(self): return self.m != 0
+
+    # Conversions --------------------------------------
+    def __float__(self):
+        if self.e > 308: return INF if self.m > 0 else -INF
+        return self.m * _pow10(self.e)
+
+    def __int__(self):
+        return int(self.m * 1e15) * 10 ** (self.e - 15) if self.e >= 15 else int(float(self))
+
+    def __round__(self, ndigits=None):
+        return self   # far beyond integer resolution already
+
+    def log10(self) -> float:
+        if self.m <= 0: raise ValueError("math domain error")
+        return self.e + math.log10(self.m)
+
+    def __repr__(self): return f"BigNum({self.m!r}, {self.e})"
+    def __str__(self): return f"{self.m!r}e{self.e}"
+
+    # JSON: "<mantissa repr>e<exponent>" round-trips exactly (no renormalisation on parse)
+    def to_json(self) -> str: return str(self)
+
+    @classmethod
+    def from_json(cls, s: str) -> "BigNum":
+        m, e = s.rsplit("e", 1)
+        b = cls.__new__(cls); b.m = float(m); b.e = int(e)
+        return b
+
+
+def num(x):
+    """Normalise an economy value: float when it fits, BigNum otherwise."""
+    if x.__class__ is BigNum: return BigNum._make(x.m, x.e)
+    try: return float(x)
+    except OverflowError: return BigNum.of(x)
+
+def safe_add(a, b):
+    """a + b, promoting to BigNum instead of overflowing to inf."""
+    r = a + b
+    if r == INF and a != INF and b != INF: return BigNum.of(a) + b
+    return r
+
+def log10(x) -> float:
+    return x.log10() if x.__class__ is BigNum else math.log10(x)
+
+def pow_mul(base: float, mult: float, count: int):
+    """base · mult**count without overflow."""
+    try:
+        r = base * (mult ** count)
+        if r != INF: return r
+    except OverflowError:
+        pass
+    return BigNum.from_log10(math.log10(base) + count * math.log10(mult))
+
+def ulp(x):
+    return math.ulp(x) if x.__class__ is not BigNum else abs(x) * 2.3e-16
+
+def to_json(x):
+    return x.to_json() if x.__class__ is BigNum else float(x)
+
+def from_json(v):
+    return BigNum.from_json(v) if isinstance(v, str) else float(v)
+
+
+# ---------------- Formatting ----------------
+SUFFIXES = ("", "K", "M", "B", "T", "Qa", "Qi", "Sx", "Sp", "Oc", "No", "De",
+            "UDe", "DDe", "TDe", "QaDe", "QiDe", "SxDe", "SpDe", "OcDe", "NoDe", "Vg")
+FORMAT_MODES = ("suffix", "scientific", "engineering")
+_TIERS = tuple(10.0 ** (3 * i) for i in range(1, 103))   # 1e3 .. 1e306
+
+
+class NumberFormatter:
+    """format_num engine. Exact repeats (costs, CPS between purchases) are answered from a small
+    value -> text memo. Otherwise values under 1000 take an integer fast path, and larger ones are
+    reduced to (tier, value rounded to display precision) by bisecting precomputed powers of 1000;
+    that key is rendered through a bounded LRU cache. Suffix mode falls back to scientific past
+    the last tier."""
+    __slots__ = ("mode", "_render", "_memo", "_memo_max", "memo_hits")
+
+    def __init__(self, mode: str = "suffix", maxsize: int = 2048):
+        self.mode = mode
+        self._render = functools.lru_cache(maxsize=maxsize)(_render)
+        self._memo = {}; self._memo_max = maxsize; self.memo_hits = 0
+
+    def set_mode(self, mode: str):
+        if mode not in FORMAT_MODES: raise ValueError(f"unknown number format {mode!r}")
+        self.mode = mode; self._memo.clear()
+
+    def __call__(self, n) -> str:
+        try:
+            s = self._memo.get(n)
+            if s is not None: self.memo_hits += 1; return s
+        except TypeError:
+            return "0"
+        s = self._format(n)
+        if len(self._memo) >= self._memo_max: self._memo.clear()
+        self._memo[n] = s
+        return s
+
+    def _format(self, n) -> str:
+        if n.__class__ is BigNum:
+            tier, r = divmod(n.e, 3); value = n.m * 10.0 ** r
+        else:
+            if n.__class__ is not float:
+                try: n = float(n)
+                except Exception: return "0"
+            a = n if n >= 0 else -n
+            if a < 1000:
+                i = int(n)
+                if -1e-6 < n - i < 1e-6: return str(i)
+                return f"{n:.1f}"
+            if a == INF or n != n: return "∞" if a == INF else "?"
+            tier = bisect_right(_TIERS, a); value = n / _TIERS[tier - 1]
+        av = value if value >= 0 else -value
+        digits = 0 if av >= 100 else (1 if av >= 10 else 2)
+        value = round(value, digits)
+        if value >= 1000 or value <= -1000:   # 999.7 -> 1.00 of the next tier
+            tier += 1; value = round(value / 1000.0, 2); digits = 2
+        return self._render(self.mode, tier, value, digits)
+
+    def stats(self) -> dict:
+        ci = self._render.cache_info(); hits = ci.hits + self.memo_hits; total = hits + ci.misses
+        return {"memo_hits": self.memo_hits, "lru_hits": ci.hits, "misses": ci.misses, "size": ci.currsize,
+                "hit_rate": (hits / total) if total else 0.0}
+
+
+def _render(mode: str, tier: int, value: float, digits: int) -> str:
+    if mode == "suffix" and tier < len(SUFFIXES):
+        return f"{value:.{digits}f}{SUFFIXES[tier]}"
+    if mode == "engineering":
+        return f"{value:.{digits}f}e{3 * tier}"
+    shift = 2 if abs(value) >= 100 else (1 if abs(value) >= 10 else 0)
+    return f"{value / 10 ** shift:.2f}e{3 * tier + shift}"
+
+
+format_num = NumberFormatter()
+
+
+def format_duration(seconds: float) -> str:
+    """Two most significant units: "45 s", "12 min", "3 h 05", "2 j 04 h" ("∞" when never)."""
+    if seconds != seconds or seconds == INF: return "∞"
+    s = int(max(0.0, seconds))
+    if s < 60: return f"{s} s"
+    if s < 3600: return f"{s // 60} min"
+    if s < 86400: return f"{s // 3600} h {s % 3600 // 60:02d}"
+    if s < 1000 * 86400: return f"{s // 86400} j {s % 86400 // 3600:02d} h"
+    return f"{format_num(s / 86400)} j"
+
+
+def bench_format(n: int = 200_000) -> dict:
+    """Per-call cost of format_num on a UI-like stream (gold ticking up, costs, small tap gains)."""
+    import random
+    rng = random.Random(0); vals = []; gold = 1e6; cps = 12345.6
+    for i in range(n):
+        gold += cps; vals.append(gold if i % 3 else rng.choice((cps, 15.0 * 1.15 ** (i % 300), 7.0)))
+    f = NumberFormatter(); t0 = time.perf_counter()
+    for v in vals: f(v)
+    dt = time.perf_counter() - t0
+    return {"ns_per_call": dt / n * 1e9, **f.stats()}
+
+
+def check_bignum() -> list:
+    """Overflow edge cases of BigNum (non-finite inputs included). Returns the failures."""
+    fails = []
+    def expect(label, ok):
+        if not ok: fails.append(label)
+    for x in (INF, -INF):
+        try: b = BigNum.of(x)
+        except (OverflowError, ValueError) as e: fails.append(f"BigNum.of({x}): {e!r}"); continue
+        expect(f"BigNum.of({x}) sign", (b > 0) == (x > 0) and b.e == INF_E)
+        expect(f"BigNum.of({x}) beyond any value", b > BigNum(9.9, 10 ** 6) if x > 0 else b < BigNum(-9.9, 10 ** 6))
+        expect(f"float(BigNum.of({x}))", float(b) == x)
+        expect(f"BigNum.of({x}) round-trip", from_json(to_json(b)) == b)
+    big = BigNum(1.0, 400)
+    expect("inf + BigNum", BigNum.of(INF) + big == BigNum.of(INF))
+    expect("BigNum * inf", (big * INF) > big)
+    expect("NaN stays NaN", BigNum.of(float("nan")).m != BigNum.of(float("nan")).m)
+    expect("safe_add overflow", safe_add(1e308, 1e308) == BigNum(2.0, 308))
+    expect("num(10**400)", num(10 ** 400) == BigNum(1.0, 400))
+    expect("back to float", BigNum(1.0, 400) / BigNum(1.0, 300) == 1e100 and (BigNum(1.0, 400) / BigNum(1.0, 300)).__class__ is float)
+    return fails
+
+
+if __name__ == "__main__":
+    if "--check" in sys.argv[1:]:
+        fails = check_bignum()
+        for f in fails: print("FAIL", f)
+        print("BigNum:", "ok" if not fails else f"{len(fails)} failure(s)")
+        sys.exit(1 if fails else 0)
+    if "--bench" in sys.argv[1:]:
+        r = bench_format()
+        print(f"format_num: {r['ns_per_call']:.0f} ns/call, cache hit rate {r['hit_rate']:.1%} ({r['size']} entries)")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Idle Clicker — instrumentation opt-in (aucune dépendance Tkinter)
+- `PerfRecorder` : durée de chaque callback planifié / méthode chaude, intervalle entre frames,
+  échantillons de compteurs (items canvas, widgets, `after` en attente), p50 / p99.
+- Rien n'est patché tant que `install()` n'est pas appelé : coût nul quand c'est désactivé.
+- `dump(prefix)` écrit `<prefix>.json` (résumé + compteurs) et `<prefix>.csv` (trace brute).
+Activation dans le jeu : python idle_clicker_v6_6_4.py --profile   ou   IDLE_PROFILE=chemin
+"""
+import csv, functools, json, time
+from collections import deque
+
+TRACE_MAX = 200_000    # raw (t, name, duration) rows kept for the CSV
+SAMPLES_MAX = 4096     # per-name durations kept for percentiles
+
+
+def percentile(sorted_values, q: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence (0.0 when empty)."""
+    if not sorted_values: return 0.0
+    i = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[i]
+
+
+class PerfRecorder:
+    __slots__ = ("t0", "trace", "samples", "counts", "totals", "counters", "frame_name", "_last_frame", "_patched")
+
+    def __init__(self, frame_name: str = "frame"):
+        self.t0 = time.perf_counter()
+        self.trace = deque(maxlen=TRACE_MAX)   # (t_seconds, name, seconds)
+        self.samples = {}                      # name -> deque of recent durations
+        self.counts = {}; self.totals = {}     # name -> calls / cumulative seconds
+        self.counters = deque(maxlen=3600)     # (t_seconds, {counter: value})
+        self.frame_name = frame_name; self._last_frame = None
+        self._patched = []                     # (owner, attr, original) for uninstall()
+
+    # ---------------- recording ----------------
+    def record(self, name: str, start: float, dur: float):
+        self.trace.append((start - self.t0, name, dur))
+        s = self.samples.get(name)
+        if s is None: s = self.samples[name] = deque(maxlen=SAMPLES_MAX); self.counts[name] = 0; self.totals[name] = 0.0
+        s.append(dur); self.counts[name] += 1; self.totals[name] += dur
+
+    def frame(self):
+        """Mark a frame boundary; the interval since the previous one is recorded under `frame_name`."""
+        now = time.perf_counter()
+        if self._last_frame is not None: self.record(self.frame_name, self._last_frame, now - self._last_frame)
+        self._last_frame = now
+
+    def sample(self, **values):
+        self.counters.append((time.perf_counter() - self.t0, values))
+
+    def timed(self, fn, name: str = None):
+        name = name or getattr(fn, "__qualname__", repr(fn)); rec = self.record; clock = time.perf_counter
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            t = clock()
+            try: return fn(*a, **kw)
+            finally: rec(name, t, clock() - t)
+        return wrapper
+
+    # ---------------- installation ----------------
+    def instrument(self, cls, *names):
+        """Replace methods on the class so every call path (bindings, lambdas, after chains) is timed."""
+        for n in names:
+            orig = cls.__dict__[n]
+            setattr(cls, n, self.timed(orig, f"{cls.__name__}.{n}")); self._patched.append((cls, n, orig))
+
+    def patch_after(self, cls):
+        """Time every callback scheduled through `cls.after(ms, func, *args)` (tkinter.Misc)."""
+        orig = cls.__dict__["after"]; timed = self.timed
+        @functools.wraps(orig)
+        def after(widget, ms, func=None, *args):
+            if func is None: return orig(widget, ms)
+            return orig(widget, ms, timed(func), *args)
+        cls.after = after; self._patched.append((cls, "after", orig))
+
+    def install(self, after_cls=None, methods=()):
+        """`methods`: iterable of (class, name, ...) tuples."""
+        if after_cls is not None: self.patch_after(after_cls)
+        for cls, *names in methods: self.instrument(cls, *names)
+
+    def uninstall(self):
+        while self._patched:
+            owner, attr, orig = self._patched.pop(); setattr(owner, attr, orig)
+
+    # ---------------- reporting ----------------
+    def summary(self) -> dict:
+        """name -> {calls, total_ms, p50_ms, p99_ms, max_ms} (percentiles over the recent window)."""
+        out = {}
+        for name, s in self.samples.items():
+            v = sorted(s)
+            out[name] = {"calls": self.counts[name], "total_ms": self.totals[name] * 1e3,
+                         "p50_ms": percentile(v, 50) * 1e3, "p99_ms": percentile(v, 99) * 1e3, "max_ms": v[-1] * 1e3}
+        return out
+
+    def report(self, top: int = 8) -> str:
+        """Short text block for the overlay: frame p50/p99, latest counters, costliest callbacks."""
+        summ = self.summary(); lines = []
+        f = summ.get(self.frame_name)
+        if f: lines.append(f"frame p50 {f['p50_ms']:5.1f} ms  p99 {f['p99_ms']:5.1f} ms  ({f['calls']})")
+        if self.counters: lines.append("  ".join(f"{k} {v}" for k, v in self.counters[-1][1].items()))
+        ranked = sorted(((k, v) for k, v in summ.items() if k != self.frame_name), key=lambda kv: -kv[1]["total_ms"])
+        for name, v in ranked[:top]:
+            lines.append(f"{name[-28:]:28s} p50 {v['p50_ms']:6.2f}  p99 {v['p99_ms']:6.2f}  ×{v['calls']}")
+        return "\n".join(lines)
+
+    def dump(self, prefix: str):
+        """Write `<prefix>.json` and `<prefix>.csv`; returns the two paths."""
+        js, cs = prefix + ".json", prefix + ".csv"
+        with open(js, "w", encoding="utf-8") as f:
+            json.dump({"duration_s": time.perf_counter() - self.t0, "callbacks": self.summary(),
+                       "counters": [{"t": round(t, 3), **v} for t, v in self.counters]}, f, indent=1)
+        with open(cs, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f); w.writerow(("t_ms", "name", "dur_us"))
+            w.writerows((f"{t * 1e3:.3f}", n, f"{d * 1e6:.1f}") for t, n, d in self.trace)
+        return js, cs
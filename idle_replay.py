@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Idle Clicker — enregistrement et rejeu déterministe des entrées (aucune dépendance Tkinter)
+- `Recorder` : journal compact des entrées (taps, achats, prestige, reset, options, sauvegardes),
+  chacune repérée par le n° de tick logique (LogicClock) et l'instant en ms depuis le début ;
+  varints compressés zlib, vidés à chaque sauvegarde (un fichier coupé reste rejouable).
+  L'en-tête porte l'état de départ, l'économie et la graine des effets visuels ; la fin, l'empreinte
+  de l'état final.
+- `replay(path)` : rejeu sans interface à vitesse maximale (horloge injectée, revenu crédité par
+  LogicClock.credit_to comme en jeu) ; l'état final doit avoir la même empreinte que celui enregistré.
+- `ReplayDriver` : remplace LogicClock dans l'interface Tk pour rejouer au rythme enregistré (× vitesse).
+Usage : python idle_clicker_v6_6_4.py --record partie.rec [--seed N]
+        python idle_replay.py partie.rec [--repeat N]            (temps CPU du rejeu, état identique ?)
+        python idle_replay.py partie.rec --dump                  (entrées en texte, pour un rapport de bug)
+        python idle_clicker_v6_6_4.py --replay partie.rec [--speed X]
+        python idle_replay.py --synth 6 partie.rec               (6 h de jeu simulées, pour les mesures)
+"""
+import hashlib, json, random, struct, sys, time, zlib
+
+from idle_core import GameState, Economy, LogicClock, BuyAdvisor, BUY_MODES
+from idle_numbers import FORMAT_MODES
+
+MAGIC = b"IDLEREC1"
+VERSION = 2
+
+# Record kinds: varint(tick delta) varint(ms delta) kind payload
+END, TAP, TAPS, BUY, BUY_MODE, BUY_CPC, PRESTIGE, RESET, AUTOPILOT, FORMAT, SAVE, GAP, RATE, SKIP = range(14)
+KIND_NAMES = ("end", "tap", "taps", "buy", "buy_mode", "buy_cpc", "prestige", "reset", "autopilot", "format", "save", "gap", "rate", "skip")
+_F64 = struct.Struct("<d")
+
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while n >= 0x80: out.append((n & 0x7F) | 0x80); n >>= 7
+    out.append(n)
+    return bytes(out)
+
+def _read_varint(buf, i: int):
+    n = shift = 0
+    while True:
+        b = buf[i]; i += 1
+        n |= (b & 0x7F) << shift; shift += 7
+        if b < 0x80: return n, i
+
+def state_digest(state: GameState) -> bytes:
+    """sha256 of the saved form (sets sorted), stamped with state.last_time: equal digests = identical state."""
+    d = state.to_dict(now=state.last_time)
+    d["achievements"] = sorted(d["achievements"]); d["discovered"] = sorted(d["discovered"])
+    return hashlib.sha256(json.dumps(d, sort_keys=True).encode("utf-8")).digest()
+
+
+class ReplayClock:
+    """Injectable wall clock (GameState.clock): returns whatever the replay last set."""
+    __slots__ = ("now",)
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Recorder:
+    """Appends the inputs applied to a GameState to `path`.
+
+    Inputs are stamped with the LogicClock tick they landed after (what makes the replay exact: the
+    same credits happen at the same ticks) and with milliseconds since start (the pace for a
+    real-time replay). Call the method matching each input right after applying it to the state."""
+    __slots__ = ("path", "mono", "clock", "started", "_file", "_z", "_t0", "_tick", "_ms", "_names")
+
+    def __init__(self, path: str, mono=time.monotonic):
+        self.path = path; self.mono = mono; self.clock = None; self.started = False
+        self._file = self._z = None
+
+    def start(self, state: GameState, clock: LogicClock, seed: int = None):
+        """Header = the state inputs start from (post-load, post-offline) and the economy to rebuild it with."""
+        self.clock = clock; clock.recorder = self; self._names = {n: i for i, n in enumerate(state.economy.names)}
+        header = json.dumps({"version": VERSION, "hz": clock.hz, "wall": state.last_time, "seed": seed,
+                             "economy": state.economy.to_dict(), "state": state.to_dict(now=state.last_time)}).encode("utf-8")
+        self._file = open(self.path, "wb"); self._file.write(MAGIC)
+        self._z = zlib.compressobj(6); self._t0 = self.mono(); self._tick = clock.ticks; self._ms = 0
+        self._write(_varint(len(header)) + header); self.flush(); self.started = True
+
+    def _write(self, data: bytes):
+        out = self._z.compress(data)
+        if out: self._file.write(out)
+
+    def _put(self, kind: int, payload: bytes = b""):
+        if not self.started: return
+        t = self.clock.ticks; ms = int((self.mono() - self._t0) * 1000.0)
+        self._write(_varint(t - self._tick) + _varint(ms - self._ms) + bytes((kind,)) + payload)
+        self._tick = t; self._ms = ms
+
+    # ---------------- inputs ----------------
+    def tap(self, n: int = 1):
+        """n == 1: one GameState.tap(); otherwise one tap(n) (auto-tap batch)."""
+        self._put(TAP) if n == 1 else self._put(TAPS, _varint(n))
+
+    def buy(self, name: str, qty: int = 1):
+        self._put(BUY, _varint(self._names[name]) + _varint(qty or 0))   # 0 = None (as many as affordable)
+
+    def buy_mode(self, name: str, mode: str):
+        self._put(BUY_MODE, _varint(self._names[name]) + bytes((BUY_MODES.index(mode),)))
+
+    def buy_cpc(self):
+        self._put(BUY_CPC)
+
+    def prestige(self, state: GameState):
+        self._put(PRESTIGE, _F64.pack(state.run_started))
+
+    def reset(self, state: GameState):
+        self._put(RESET, _F64.pack(state.run_started))
+
+    def autopilot(self, flag: bool):
+        self._put(AUTOPILOT, bytes((1 if flag else 0,)))
+
+    def number_format(self, mode: str):
+        self._put(FORMAT, bytes((FORMAT_MODES.index(mode),)))
+
+    def save(self):
+        self._put(SAVE); self.flush()
+
+    def gap(self, seconds: float):
+        """LogicClock caught up a suspend of `seconds` (already capped) before crediting ticks."""
+        self._put(GAP, _F64.pack(seconds))
+
+    def rate(self, hz: float):
+        """LogicClock.set_hz: tick numbering restarts at 0."""
+        self._put(RATE, _F64.pack(hz)); self._tick = 0
+
+    def skip(self, ticks: int):
+        """LogicClock let `ticks` ticks pass unpaid (more catch-up than its cap)."""
+        self._put(SKIP, _varint(ticks))
+
+    # ---------------- file ----------------
+    def flush(self):
+        if self._file is None: return
+        self._file.write(self._z.flush(zlib.Z_SYNC_FLUSH)); self._file.flush()
+
+    def close(self, state: GameState):
+        """END record: final last_time and digest (achievements checked first, as the replay does)."""
+        if not self.started: return
+        state.check_achievements()
+        self._put(END, _F64.pack(state.last_time) + state_digest(state))
+        self._file.write(self._z.flush()); self._file.close()
+        self.started = False; self._file = None; self.clock.recorder = None
+
+
+def open_log(path: str):
+    """(header, events) — events yields (tick, ms, kind, a, b) with absolute ticks; a torn tail is ignored."""
+    with open(path, "rb") as f: raw = f.read()
+    if raw[:len(MAGIC)] != MAGIC: raise ValueError(f"{path}: not an input recording")
+    buf = zlib.decompressobj().decompress(raw[len(MAGIC):])
+    size, i = _read_varint(buf, 0); header = json.loads(buf[i:i + size].decode("utf-8"))
+    if header.get("version") != VERSION: raise ValueError(f"{path}: recording version {header.get('version')}")
+    return header, _events(buf, i + size)
+
+def _events(buf, i: int):
+    tick = ms = 0; n = len(buf)
+    while i < n:
+        try:
+            dt, i = _read_varint(buf, i); dm, i = _read_varint(buf, i); kind = buf[i]; i += 1
+            a = b = None
+            if kind in (TAPS, SKIP): a, i = _read_varint(buf, i)
+            elif kind in (BUY, BUY_MODE):
+                a, i = _read_varint(buf, i)
+                if kind == BUY: b, i = _read_varint(buf, i)
+                else: b = buf[i]; i += 1
+            elif kind in (AUTOPILOT, FORMAT): a = buf[i]; i += 1
+            elif kind in (PRESTIGE, RESET, GAP, RATE): a = _F64.unpack_from(buf, i)[0]; i += 8
+            elif kind == END:
+                a = _F64.unpack_from(buf, i)[0]; b = bytes(buf[i + 8:i + 40]); i += 40
+                if len(b) < 32: return
+        except (IndexError, struct.error):
+            return   # recording cut mid-record (crash): everything before it still replays
+        tick += dt; ms += dm
+        yield tick, ms, kind, a, b
+        if kind == RATE: tick = 0
+        if kind == END: return
+
+def apply(state: GameState, clock: ReplayClock, kind: int, a, b) -> float:
+    """Apply one recorded input; returns the gold a tap input earned (0.0 otherwise).
+    Achievements are left to the caller (the UI shows banners for them)."""
+    if kind == TAP: return state.tap()
+    if kind == TAPS: return state.tap(a)
+    if kind == BUY: state.buy(state.economy.names[a], b or None)
+    elif kind == BUY_MODE: state.buy_mode(state.economy.names[a], BUY_MODES[b])
+    elif kind == BUY_CPC: state.buy_cpc()
+    elif kind == PRESTIGE: clock.now = a; state.prestige()
+    elif kind == RESET: clock.now = a; state.reset()
+    elif kind == AUTOPILOT: state.autopilot = bool(a)
+    elif kind == FORMAT: state.number_format = FORMAT_MODES[a]
+    elif kind == GAP: state.advance(a)
+    return 0.0
+
+def _initial_state(header: dict, clock: ReplayClock) -> GameState:
+    state = GameState(Economy.from_dict(header["economy"]), clock=clock)
+    state.load_dict(header["state"]); return state
+
+
+def replay(path: str) -> dict:
+    """Headless replay at full speed. {"state", "events", "ticks", "play_seconds", "identical"} —
+    identical is None when the recording has no END record (cut short)."""
+    header, events = open_log(path)
+    clock = ReplayClock(header["wall"]); state = _initial_state(header, clock)
+    logic = LogicClock(state, header["hz"], mono=float, wall=clock); check = state.check_achievements
+    total = count = ms = 0; identical = None
+    for tick, ms, kind, a, b in events:
+        if tick > logic.ticks: total += tick - logic.ticks; logic.credit_to(tick)
+        count += 1
+        if kind == END:
+            state.last_time = a; check(); identical = state_digest(state) == b; break
+        apply(state, clock, kind, a, b); check()
+        if kind == RATE: logic.rebase(a)
+        elif kind == SKIP: logic.skip(a); total += a
+    return {"state": state, "events": count, "ticks": total, "play_seconds": ms / 1000.0, "identical": identical}
+
+
+class ReplayDriver:
+    """Stands in for LogicClock in the Tk UI: pump() applies the recording at its own pace (× speed),
+    crediting ticks exactly as recorded. `on_event(kind, a, gain)` lets the UI react; after END,
+    `identical` holds the digest comparison."""
+    __slots__ = ("state", "clock", "hz", "speed", "mono", "on_event", "ticks", "recorder", "identical", "done",
+                 "_logic", "_events", "_next", "_origin", "_wall0", "_rate_ms")
+
+    def __init__(self, state: GameState, header: dict, events, speed: float = 1.0, mono=time.monotonic, on_event=None):
+        self.state = state; self.hz = float(header["hz"]); self.speed = float(speed); self.mono = mono
+        self.on_event = on_event; self.ticks = 0; self.recorder = None; self.identical = None; self.done = False
+        self._wall0 = header["wall"]; self.clock = state.clock = ReplayClock(self._wall0)
+        self._logic = LogicClock(state, self.hz, mono=float, wall=self.clock)
+        self._events = events; self._next = next(events, None); self._origin = mono(); self._rate_ms = 0
+
+    def _run_to(self, tick: int) -> float:
+        gain = self._logic.credit_to(tick); self.ticks = self._logic.ticks
+        return gain
+
+    def pump(self) -> float:
+        ms = (self.mono() - self._origin) * 1000.0 * self.speed; gain = 0.0; ev = self._next
+        while ev is not None and ev[1] <= ms:
+            tick, at, kind, a, b = ev
+            gain += self._run_to(tick); self.clock.now = self._wall0 + at / 1000.0
+            if kind == END:
+                self.state.last_time = a; self.state.check_achievements()
+                self.identical = state_digest(self.state) == b; self._next = None; self.done = True
+                if self.on_event: self.on_event(kind, a, 0.0)
+                return gain
+            g = apply(self.state, self.clock, kind, a, b)
+            if kind == RATE: self.hz = float(a); self._logic.rebase(a); self.ticks = 0; self._rate_ms = at
+            elif kind == SKIP: self._logic.skip(a); self.ticks = self._logic.ticks
+            if self.on_event: self.on_event(kind, a, g)
+            ev = self._next = next(self._events, None)
+        if ev is None: self.done = True; return gain   # cut recording: nothing after the last input is known
+        due = int((ms - self._rate_ms) / 1000.0 * self.hz)
+        gain += self._run_to(min(due, ev[0]))
+        self.clock.now = self._wall0 + ms / 1000.0; self.state.last_time = self.clock.now
+        return gain
+
+    def next_tick_in(self) -> float:
+        period = 1.0 / (self.hz * self.speed)
+        return period - (self.mono() - self._origin) % period
+
+
+def synthesize(path: str, hours: float, seed: int = 0, tps: float = 5.0, hz: float = 10.0) -> dict:
+    """Write a recording of `hours` of scripted play (taps at ~`tps`, advisor purchases, prestige on
+    every doubling of shards), through the same Recorder/LogicClock path as the UI, on a fake clock."""
+    rng = random.Random(seed); now = [0.0]; wall0 = 1.7e9
+    mono = lambda: now[0]; wall = lambda: wall0 + now[0]
+    state = GameState(clock=wall); clock = LogicClock(state, hz, mono=mono, wall=wall); rec = Recorder(path, mono=mono)
+    rec.start(state, clock, seed); advisor = BuyAdvisor(state); end = hours * 3600.0; next_buy = 0.0; taps = buys = 0
+    while now[0] < end:
+        now[0] += rng.expovariate(tps); clock.pump()
+        state.tap(); rec.tap(); taps += 1
+        if now[0] < next_buy: continue
+        next_buy = now[0] + 1.0; best = advisor.best()
+        if best is not None and buys % 10 == 9: state.buy_mode(best, "x10"); rec.buy_mode(best, "x10")
+        elif best is not None and state.upgrade_cost(best) <= state.gold: state.buy(best, 1); rec.buy(best, 1)
+        else: state.buy_cpc(); rec.buy_cpc()
+        buys += 1
+        if state.potential_shards_gain() >= max(1, state.prestige_shards): state.prestige(); rec.prestige(state)
+        state.check_achievements()
+    rec.close(state)
+    return {"taps": taps, "buys": buys, "shards": state.prestige_shards}
+
+
+def main(argv) -> int:
+    def opt(flag, default):
+        return argv[argv.index(flag) + 1] if flag in argv[:-1] else default
+    if "--synth" in argv[:-1]:
+        i = argv.index("--synth"); hours = float(argv[i + 1])
+        path = next((a for a in argv[i + 2:] if not a.startswith("--")), "synth.rec")
+        t = time.perf_counter(); synthesize(path, hours, seed=int(opt("--seed", 0)))
+        print(f"{path} : {hours:g} h de jeu enregistrées en {time.perf_counter() - t:.1f} s"); return 0
+    paths = [a for i, a in enumerate(argv) if not a.startswith("--") and (i == 0 or argv[i - 1] not in ("--repeat", "--seed"))]
+    if not paths: print(__doc__); return 2
+    if "--dump" in argv:   # bug reports: the inputs as text
+        header, events = open_log(paths[0])
+        print(f"# {header['hz']:g} Hz, départ {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(header['wall']))}, graine {header['seed']}")
+        for tick, ms, kind, a, b in events:
+            print(f"{tick:>9} {ms / 1000.0:>10.3f}s {KIND_NAMES[kind]:9s} {'' if a is None else a} {'' if b is None or kind == END else b}")
+        return 0
+    ok = True
+    for _ in range(int(opt("--repeat", 1))):
+        w = time.perf_counter(); c = time.process_time()
+        res = replay(paths[0])
+        w = time.perf_counter() - w; c = time.process_time() - c
+        verdict = {True: "état identique", False: "ÉTAT DIFFÉRENT", None: "enregistrement incomplet (pas d'empreinte)"}[res["identical"]]
+        print(f"{res['events']} entrées, {res['ticks']} ticks ({res['play_seconds'] / 3600:.2f} h de jeu) : "
+              f"{w:.2f} s, CPU {c:.2f} s (×{res['play_seconds'] / max(w, 1e-9):,.0f}) — {verdict}")
+        ok = ok and res["identical"] is not False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
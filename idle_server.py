@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Idle Clicker — serveur headless multi-sessions (asyncio, lignes JSON sur TCP local)
+- Une partie par joueur, toutes dans un seul processus. L'or, le total gagné, le CPS, le CPC, les
+  shards et les niveaux d'amélioration de chaque session vivent dans des tableaux NumPy (structure de
+  tableaux) : un tick crédite toutes les sessions en une opération vectorisée (même arithmétique que
+  GameState.advance, un advance de 1/hz par tick).
+- Les commandes passent par les règles de `GameState` (idle_core : coûts, achats, CPC, prestige,
+  succès), dont la session garde un objet pour les données froides ; ses nombres chauds sont
+  recopiés depuis / vers les tableaux autour de chaque commande.
+- Succès pendant les ticks : prochain seuil de total gagné par session dans un tableau ; seules les
+  sessions qui l'atteignent passent par la vérification complète.
+- Sauvegarde groupée : un SqliteStore pour toutes les sessions, une tranche tournante de sessions
+  par tick (chacune toutes les SAVE_SECONDS), écrite en une transaction par lot par le thread
+  d'écriture du store ; les lectures (login) passent par un thread d'E/S, jamais par la boucle.
+- Après une suspension ou un long blocage, le retard est crédité en une étape (plafonné comme les
+  gains hors ligne) au lieu de rejouer chaque tick manqué.
+Protocole : une requête JSON par ligne, une réponse par ligne ("id" renvoyé tel quel) :
+  {"op": "login", "player": "alice"}  {"op": "tap", "n": 3}  {"op": "buy", "name": "Mine", "qty": 1}
+  {"op": "buy", "name": "Mine", "mode": "x10"}  {"op": "buy_cpc"}  {"op": "prestige"}  {"op": "state"}
+  {"op": "save"}  {"op": "stats"}  {"op": "logout"}      poussé : {"event": "achievements", "ids": [...]}
+Usage : python idle_server.py [--port 8765] [--hz 10] [--db chemin] [--upgrades fichier.json]
+        python idle_server.py --load [--sessions 1000,10000,50000] [--cmd-rate 0.2]   (sessions par cœur à 1 et 10 Hz)
+"""
+import asyncio, json, os, random, shutil, sys, tempfile, time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from idle_core import GameState, Economy, DEFAULT_ECONOMY, BUY_MODES, OFFLINE_HOURS_CAP
+from idle_numbers import BigNum, to_json
+from idle_storage import SqliteStore
+
+HOST, PORT = "127.0.0.1", 8765
+SERVER_HZ = 10.0           # ticks per second for every session
+SAVE_SECONDS = 30.0        # each session is checkpointed this often (rotating slice per tick)
+MAX_TAPS_PER_MSG = 50      # one "tap" request credits at most this many taps
+CATCHUP_TICKS = 10         # a late wake-up replays at most this many ticks; a longer stall is credited in one step
+TICK_BUDGET = 0.5          # share of the period the tick may use (the rest: commands, I/O) for --load
+SERVER_DB = os.path.join(os.environ.get("IDLE_CLICKER_HOME") or os.path.join(os.path.expanduser("~"), ".idle_clicker"), "idle_server.db")
+INF = float("inf")
+
+
+class SessionTable:
+    """Struct-of-arrays of every live session's hot numbers; one GameState per slot keeps the rest.
+
+    Arrays are authoritative for gold / total_earned between commands: pull() copies them into the
+    slot's GameState before the rules run, push() copies the result back. Free slots stay at zero
+    CPS so the vectorized step can sweep [0, n) without a mask. A session whose totals outgrow a float
+    leaves the arrays (`big`) and is advanced through GameState with BigNum."""
+    __slots__ = ("economy", "capacity", "n", "gold", "total", "cps", "cpc", "shards", "counts", "ach_next",
+                 "states", "players", "index", "free", "big", "_gain", "_next", "_next_total")
+
+    def __init__(self, economy: Economy = None, capacity: int = 1024):
+        self.economy = economy or DEFAULT_ECONOMY; self.capacity = 0; self.n = 0
+        self.states = []; self.players = []; self.index = {}; self.free = []; self.big = set()
+        self._alloc(max(1, capacity))
+        st = GameState(self.economy)   # thresholds of the total_earned achievements, once
+        self._next_total = [(keys, ("total_earned", sign)) for sign, keys, _, _ in st.ach_index.groups.get("total_earned", ()) if sign > 0]
+
+    def _alloc(self, cap: int):
+        old = self.capacity; u = len(self.economy.names)
+        def grow(a, shape, dtype, fill=0):
+            b = np.full(shape, fill, dtype=dtype)
+            if a is not None: b[:old] = a[:old]
+            return b
+        g = lambda name: getattr(self, name, None) if old else None
+        self.gold = grow(g("gold"), cap, np.float64); self.total = grow(g("total"), cap, np.float64)
+        self.cps = grow(g("cps"), cap, np.float64); self.cpc = grow(g("cpc"), cap, np.float64)
+        self.shards = grow(g("shards"), cap, np.int64); self.counts = grow(g("counts"), (cap, u), np.int64)
+        self.ach_next = grow(g("ach_next"), cap, np.float64, INF); self._gain = np.zeros(cap); self._next = np.zeros(cap)
+        self.states.extend([None] * (cap - old)); self.players.extend([None] * (cap - old))
+        self.free.extend(range(cap - 1, old - 1, -1)); self.capacity = cap
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    # ---------------- slots ----------------
+    def add(self, player: str, state: GameState) -> int:
+        if not self.free: self._alloc(self.capacity * 2)
+        i = self.free.pop(); self.n = max(self.n, i + 1)
+        self.states[i] = state; self.players[i] = player; self.index[player] = i
+        state.check_achievements(); self.push(i)
+        return i
+
+    def remove(self, i: int):
+        del self.index[self.players[i]]; self.states[i] = self.players[i] = None; self.big.discard(i)
+        self.gold[i] = self.total[i] = self.cps[i] = self.cpc[i] = 0.0; self.shards[i] = 0; self.counts[i] = 0
+        self.ach_next[i] = INF; self.free.append(i)
+        while self.n and self.states[self.n - 1] is None: self.n -= 1
+
+    def pull(self, i: int) -> GameState:
+        st = self.states[i]
+        if i not in self.big: st.gold = float(self.gold[i]); st.total_earned = float(self.total[i])
+        return st
+
+    def push(self, i: int):
+        st = self.states[i]
+        if st.total_earned.__class__ is BigNum or st.gold.__class__ is BigNum:
+            self.big.add(i); self.cps[i] = 0.0; self.ach_next[i] = INF   # GameState carries it from here
+        else:
+            self.big.discard(i); self.gold[i] = st.gold; self.total[i] = st.total_earned; self.cps[i] = st.cps
+            self.ach_next[i] = self._threshold(st)
+        self.cpc[i] = st.cpc; self.shards[i] = st.prestige_shards
+        self.counts[i] = [st.upgrades[n] for n in self.economy.names]
+
+    def _threshold(self, st: GameState) -> float:
+        """Next total_earned value that unlocks something for this session (inf = none left)."""
+        nxt = INF; cur = st._ach_cursors
+        for keys, ck in self._next_total:
+            j = cur.get(ck, 0)
+            if j < len(keys) and keys[j] < nxt: nxt = keys[j]
+        return nxt
+
+    # ---------------- tick ----------------
+    def step(self, dt: float) -> list:
+        """Credit `dt` seconds of income to every session; returns the slots whose total crossed their
+        next achievement threshold (the caller runs the full check on those only)."""
+        n = self.n
+        if not n: return []
+        for i in self.big: self.states[i].advance(dt)
+        gain = np.multiply(self.cps[:n], dt, out=self._gain[:n]); total = self.total[:n]
+        with np.errstate(over="ignore"): nxt = np.add(total, gain, out=self._next[:n])
+        if nxt.max() == INF:   # rare: these sessions continue in BigNum through GameState
+            for i in np.flatnonzero(nxt == INF).tolist():
+                st = self.pull(i); st.advance(dt); gain[i] = 0.0; nxt[i] = total[i]; self.push(i)
+        total[:] = nxt; gold = self.gold[:n]; np.add(gold, gain, out=gold)
+        return np.flatnonzero(total >= self.ach_next[:n]).tolist()
+
+
+class GameServer:
+    """Sessions, commands and the tick loop; transport-agnostic (handle() takes decoded requests)."""
+
+    def __init__(self, economy: Economy = None, store: SqliteStore = None, hz: float = SERVER_HZ, save_seconds: float = SAVE_SECONDS):
+        self.table = SessionTable(economy); self.economy = self.table.economy
+        self.store = store; self.hz = float(hz); self.save_seconds = save_seconds
+        self.push = {}             # slot -> callable(dict) for events (the connection's writer)
+        self._io = ThreadPoolExecutor(1, thread_name_prefix="idle_server_io")   # store reads, off the event loop
+        self._save_cursor = 0; self._save_credit = 0.0
+        self.ticks = 0; self.tick_seconds = 0.0; self.commands = 0
+
+    # ---------------- sessions ----------------
+    def open_session(self, player: str, data: dict = None, fetch: bool = True) -> int:
+        """Slot of `player`: `data` or, with fetch, the saved game (store), with offline income applied;
+        a new game otherwise."""
+        if player in self.table.index: raise ValueError("session déjà ouverte")
+        st = GameState(self.economy)
+        if data is None and fetch and self.store is not None: data = self.store.load(profile=player)
+        if data is not None: st.load_dict(data); st.apply_offline()
+        return self.table.add(player, st)
+
+    async def login(self, player: str) -> int:
+        """open_session with the store read done on the I/O thread (the loop keeps ticking meanwhile)."""
+        if player in self.table.index: raise ValueError("session déjà ouverte")
+        data = None
+        if self.store is not None:
+            data = await asyncio.get_running_loop().run_in_executor(self._io, lambda: self.store.load(profile=player))
+        return self.open_session(player, data, fetch=False)
+
+    def close_session(self, i: int):
+        """Final snapshot, then free the slot; a slot already freed is left alone."""
+        self.push.pop(i, None)
+        if self.table.players[i] is None: return
+        self.save(i, snapshot=True); self.table.remove(i)
+
+    def save(self, i: int, snapshot: bool = False):
+        if self.store is None: return
+        st = self.table.pull(i); st.last_time = time.time()
+        self.store.submit(st.to_dict(), snapshot=snapshot, key=self.table.players[i])
+
+    def _save_slice(self, dt: float):
+        """Checkpoint the next sessions in rotation so each one is written every save_seconds;
+        the store's writer folds whatever is pending into one transaction (the loop only queues).
+        A catch-up step counts as one tick here, so it never checkpoints every session at once."""
+        t = self.table
+        if self.store is None or not t.n: return
+        self._save_credit += t.n * min(dt, 1.0 / self.hz) / self.save_seconds; k = int(self._save_credit); self._save_credit -= k
+        for _ in range(min(k, t.n)):
+            i = self._save_cursor % t.n; self._save_cursor = i + 1
+            if t.states[i] is not None: self.save(i)
+
+    # ---------------- tick ----------------
+    def tick(self, dt: float = None):
+        dt = 1.0 / self.hz if dt is None else dt; t0 = time.perf_counter(); t = self.table
+        for i in t.step(dt):
+            st = t.pull(i); st._touch("total_earned"); ids = st.check_achievements(); t.push(i)
+            if ids and i in self.push: self.push[i]({"event": "achievements", "ids": ids})
+        self._save_slice(dt)
+        self.ticks += 1; self.tick_seconds += time.perf_counter() - t0
+
+    async def run(self, cap_seconds: float = OFFLINE_HOURS_CAP * 3600.0):
+        """Fixed-timestep ticks against time.monotonic(). A late wake-up replays the ticks due, up to
+        CATCHUP_TICKS; beyond that (suspend, long stall) the whole gap, capped at `cap_seconds` like
+        offline gains, is credited by one step (income is linear between commands) and the tick grid
+        restarts from now."""
+        period = 1.0 / self.hz; origin = time.monotonic(); done = 0
+        while True:
+            now = time.monotonic(); due = int((now - origin) * self.hz) - done
+            if due > CATCHUP_TICKS:
+                self.tick(min(due * period, cap_seconds)); origin = now; done = 0
+            else:
+                for _ in range(due): self.tick(period)
+                done += max(0, due)
+            await asyncio.sleep(period - (time.monotonic() - origin) % period)
+
+    # ---------------- commands ----------------
+    def summary(self, i: int) -> dict:
+        st = self.table.pull(i)
+        return {"player": self.table.players[i], "gold": to_json(st.gold), "total_earned": to_json(st.total_earned),
+                "cps": st.cps, "cpc": st.tap_gain, "shards": st.prestige_shards, "pending_shards": st.potential_shards_gain(),
+                "upgrades": dict(st.upgrades), "costs": {n: st.upgrade_cost(n) for n in self.economy.names},
+                "cpc_cost": st.cpc_cost(), "achievements": sorted(st.achievements)}
+
+    def handle(self, i: int, msg: dict) -> dict:
+        """Apply one request of session `i` through the GameState rules; returns the response
+        (malformed arguments get {"ok": False, "error": ...}, the state is left untouched)."""
+        op = msg.get("op"); t = self.table; st = t.pull(i); self.commands += 1
+        try:
+            if op == "tap":
+                n = _int_arg(msg, "n")
+                if n is None: return {"ok": False, "error": "'n' doit être un entier"}
+                res = {"gain": to_json(st.tap(max(1, min(MAX_TAPS_PER_MSG, n))))}
+            elif op == "buy":
+                name = msg.get("name")
+                if not isinstance(name, str) or name not in st.upgrades: return {"ok": False, "error": f"amélioration inconnue : {name!r}"}
+                mode = msg.get("mode")
+                if mode is not None and (not isinstance(mode, str) or mode not in BUY_MODES): return {"ok": False, "error": f"mode inconnu : {mode!r}"}
+                qty = _int_arg(msg, "qty")
+                if qty is None or qty < 1: return {"ok": False, "error": "'qty' doit être un entier ≥ 1"}
+                bought = st.buy_mode(name, mode) if mode is not None else st.buy(name, qty, partial=False)
+                res = {"ok": bought > 0, "bought": bought}
+            elif op == "buy_cpc": res = {"ok": st.buy_cpc(), "cpc_level": st.cpc_level}
+            elif op == "prestige":
+                gain = st.prestige(); res = {"ok": gain > 0, "gain": gain}
+                if gain: self.save(i, snapshot=True)
+            elif op == "state": return dict(self.summary(i), ok=True)
+            elif op == "save": self.save(i, snapshot=True); return {"ok": True}
+            elif op == "stats": return dict(self.stats(), ok=True)
+            else: return {"ok": False, "error": f"opération inconnue : {op!r}"}
+        finally:
+            t.push(i)
+        res.setdefault("ok", True); res["gold"] = to_json(st.gold)
+        ids = st.check_achievements()
+        if ids: res["achievements"] = ids; t.push(i)
+        return res
+
+    def stats(self) -> dict:
+        return {"sessions": len(self.table), "hz": self.hz, "ticks": self.ticks, "commands": self.commands,
+                "tick_ms": self.tick_seconds / self.ticks * 1e3 if self.ticks else 0.0}
+
+    # ---------------- transport ----------------
+    async def serve_client(self, reader, writer):
+        """One connection = one session. A request that fails gets an error reply; the connection stays."""
+        slot = None
+        def send(obj):
+            writer.write(json.dumps(obj, separators=(",", ":")).encode("utf-8") + b"\n")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line: break
+                try: msg = json.loads(line)
+                except ValueError: send({"ok": False, "error": "JSON invalide"}); continue
+                if not isinstance(msg, dict): send({"ok": False, "error": "objet JSON attendu"}); continue
+                op = msg.get("op")
+                if op == "login" and slot is None:
+                    try: slot = await self.login(str(msg.get("player") or "default")); self.push[slot] = send; res = dict(self.summary(slot), ok=True)
+                    except ValueError as e: res = {"ok": False, "error": str(e)}
+                elif op == "logout": break
+                elif slot is None: res = {"ok": False, "error": "login d'abord"} if op != "stats" else dict(self.stats(), ok=True)
+                else:
+                    try: res = self.handle(slot, msg)
+                    except Exception as e: res = {"ok": False, "error": f"requête invalide : {type(e).__name__}: {e}"}
+                if "id" in msg: res["id"] = msg["id"]
+                send(res); await writer.drain()
+        except asyncio.CancelledError:
+            pass   # server shutdown: end the handler quietly (asyncio 3.11 logs a cancelled client task as an error)
+        finally:   # serve() may have closed it already (shutdown): only close what this connection still owns
+            if slot is not None and self.push.get(slot) is send: self.close_session(slot)
+            writer.close()
+
+    async def serve(self, host: str = HOST, port: int = PORT):
+        server = await asyncio.start_server(self.serve_client, host, port)
+        ticker = asyncio.ensure_future(self.run())
+        print(f"idle_server : {host}:{port}, {self.hz:g} Hz")
+        try:
+            async with server: await server.serve_forever()
+        finally:
+            ticker.cancel()
+            for i in list(self.push): self.close_session(i)
+            self._io.shutdown(wait=True)
+
+
+def _int_arg(msg: dict, key: str, default: int = 1):
+    """msg[key] as an int (default when absent); None when it is not an integer (bool included)."""
+    v = msg.get(key, default)
+    return v if isinstance(v, int) and not isinstance(v, bool) else None
+
+
+# ---------------- load generator ----------------
+def _populate(server: GameServer, n: int, rng: random.Random):
+    """`n` sessions at varied points of a run: some gold, a few purchases, occasional shards."""
+    names = server.economy.names
+    for k in range(len(server.table), n):
+        st = GameState(server.economy); st.gold = 10 ** rng.uniform(2, 9); st.prestige_shards = rng.choice((0, 0, 0, 1, 5))
+        for _ in range(rng.randint(1, 12)): st.buy(rng.choice(names[:6]), 1)
+        server.table.add(f"charge{k}", st)
+
+def _measure(server: GameServer, hz: float, cmd_rate: float, seconds: float, rng: random.Random) -> float:
+    """CPU seconds per tick at `hz` with cmd_rate requests per session per second spread over the
+    ticks; counts the store's writer thread (flushed before stopping the clock)."""
+    period = 1.0 / hz; ticks = max(3, int(seconds * hz)); n = len(server.table)
+    per_tick = cmd_rate * n * period; credit = 0.0; names = server.economy.names; slots = list(server.table.index.values())
+    ops = ({"op": "tap", "n": 5}, {"op": "buy_cpc"}, {"op": "state"}) + tuple({"op": "buy", "name": nm} for nm in names[:6])
+    if server.store is not None: server.store.flush()
+    c0 = time.process_time()
+    for _ in range(ticks):
+        server.tick(period)
+        credit += per_tick; k = int(credit); credit -= k
+        for _ in range(k):   # through the wire format, as a client would send them
+            msg = json.loads(json.dumps(rng.choice(ops))); json.dumps(server.handle(rng.choice(slots), msg))
+    if server.store is not None: server.store.flush()
+    return (time.process_time() - c0) / ticks
+
+def _capacity(rows: dict, hz: float, col: int) -> int:
+    """Sessions whose per-tick cost fits TICK_BUDGET of the period (linear fit of the two largest sizes)."""
+    big = sorted(rows)[-2:]
+    if len(big) < 2: a, b = 0.0, rows[big[0]][hz][col] / big[0]
+    else:
+        n1, n2 = big; b = max(1e-12, (rows[n2][hz][col] - rows[n1][hz][col]) / (n2 - n1)); a = max(0.0, rows[n2][hz][col] - b * n2)
+    return int(max(0.0, TICK_BUDGET / hz - a) / b)
+
+def load_test(sizes=(1000, 10000, 50000), rates=(1.0, 10.0), cmd_rate: float = 0.2, seconds: float = 5.0, db: str = None) -> dict:
+    """Per-tick CPU for each session count and tick rate, then the sessions one core can carry at
+    each rate: {hz: (ticks only, with requests)}."""
+    rng = random.Random(0); tmp = None
+    if db is None: tmp = tempfile.mkdtemp(prefix="idle_server_"); db = os.path.join(tmp, "load.db")
+    store = SqliteStore(db, fsync="never"); server = GameServer(store=store); rows = {}
+    try:
+        for n in sorted(sizes):
+            _populate(server, n, rng)
+            rows[n] = {hz: (_measure(server, hz, 0.0, seconds, rng), _measure(server, hz, cmd_rate, seconds, rng)) for hz in rates}
+            print(f"{n:>8} sessions  " + "  ".join(f"{hz:g} Hz : tick {rows[n][hz][0] * 1e3:7.2f} ms, + requêtes {rows[n][hz][1] * 1e3:7.2f} ms"
+                                                   for hz in rates))
+    finally:
+        store.close(timeout=30.0)
+        if tmp: shutil.rmtree(tmp, ignore_errors=True)
+    out = {hz: (_capacity(rows, hz, 0), _capacity(rows, hz, 1)) for hz in rates}
+    for hz, (ticks_only, loaded) in out.items():
+        print(f"{hz:g} Hz : ≈ {ticks_only:,} sessions par cœur (ticks + sauvegardes), ≈ {loaded:,} avec {cmd_rate:g} requête/s/session"
+              f"  ({TICK_BUDGET:.0%} de la période)")
+    return out
+
+
+def main(argv) -> int:
+    def opt(flag, default):
+        return argv[argv.index(flag) + 1] if flag in argv[:-1] else default
+    economy = Economy.from_file(opt("--upgrades", None)) if "--upgrades" in argv[:-1] else None
+    if "--load" in argv:
+        load_test(tuple(int(x) for x in str(opt("--sessions", "1000,10000,50000")).split(",")),
+                  cmd_rate=float(opt("--cmd-rate", 0.2)), seconds=float(opt("--seconds", 5.0)), db=opt("--db", None))
+        return 0
+    store = SqliteStore(opt("--db", SERVER_DB), fsync="interval")
+    server = GameServer(economy, store, hz=float(opt("--hz", SERVER_HZ)))
+    try: asyncio.run(server.serve(opt("--host", HOST), int(opt("--port", PORT))))
+    except KeyboardInterrupt: pass
+    finally: store.close(timeout=10.0)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Idle Clicker — simulateur d'équilibrage headless (balayages de stratégies et de courbe de prestige)
+- Des milliers de parties `GameState` réparties sur tous les cœurs (ProcessPoolExecutor), par lots
+  de `--shard-size` parties ; graine par partie = --seed + n° de partie (mêmes graines dans chaque
+  configuration, donc les configurations se comparent à aléa égal).
+- Configurations = produit cartésien des listes passées : stratégies d'achat (--buy) et de prestige
+  (--prestige), bonus par shard (--cps-bonus, --tap-bonus), seuil de prestige (--base-exp),
+  taps par seconde (--tps), fichiers d'améliorations (--upgrades).
+- Stratégies enfichables : un module passé par --plugin ajoute ses entrées à BUY_STRATEGIES /
+  PRESTIGE_STRATEGIES (importé aussi dans chaque worker).
+- Sortie colonnaire sans dépendance, écrite au fil des lots dans --out : une colonne = un fichier
+  binaire `<table>/<colonne>.bin` (codes de type `array`, lisibles par numpy.fromfile), et
+  `meta.json` (colonnes, lignes, configurations). Tables : `runs` (une ligne par partie : temps
+  jusqu'à chaque amélioration et jusqu'au shard N) et `curves` (or / total / CPS échantillonnés).
+Usage : python idle_sim.py --runs 2000 --hours 24 --buy advisor,cheapest --prestige never,gain:1,double
+        [--cps-bonus 0.25,0.5] [--workers N] [--out sim_out]
+"""
+import importlib, itertools, json, os, random, sys, time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from idle_core import GameState, BuyAdvisor, DEFAULT_ECONOMY, Economy
+from idle_numbers import log10
+
+OUT_DIR = "sim_out"
+SHARD_SIZE = 25       # playthroughs per work unit
+MAX_SHARDS = 10       # t_shard_1 … t_shard_N columns
+NAN = float("nan")
+
+
+# ---------------- strategies ----------------
+# Buy: factory(g, rng, arg) -> step(); called after every simulation step, spends what it wants.
+def _offered(g):
+    """Upgrades the UI offers: discovered ones plus the next locked one."""
+    f = g._frontier(); names = g.economy.names
+    return [n for i, n in enumerate(names) if n in g.discovered or i == f]
+
+def buy_advisor(g, rng, arg):
+    adv = BuyAdvisor(g)
+    def step():
+        while True:
+            best = adv.best()
+            if best is None or not g.buy(best, 1): return
+    return step
+
+def buy_cheapest(g, rng, arg):
+    """Cheapest offered upgrade (or the tap upgrade, unless arg == "nocpc") until nothing fits."""
+    cpc = arg != "nocpc"
+    def step():
+        while True:
+            name = min(_offered(g), key=g.upgrade_cost, default=None)
+            if cpc and (name is None or g.cpc_cost() < g.upgrade_cost(name)):
+                if not g.buy_cpc(): return
+            elif name is None or not g.buy(name, 1): return
+    return step
+
+def buy_random(g, rng, arg):
+    def step():
+        while True:
+            fits = [n for n in _offered(g) if g.upgrade_cost(n) <= g.gold]
+            if not fits: return
+            g.buy(rng.choice(fits), 1)
+    return step
+
+# Prestige: factory(g, arg) -> decide(seconds_since_last_prestige) -> bool
+def prestige_never(g, arg):
+    return lambda run_t: False
+
+def prestige_gain(g, arg):
+    """As soon as at least `arg` (default 1) shards are on offer."""
+    k = int(arg or 1)
+    return lambda run_t: g.potential_shards_gain() >= k
+
+def prestige_double(g, arg):
+    """When the reset at least doubles the shard count."""
+    return lambda run_t: g.potential_shards_gain() >= max(1, g.prestige_shards)
+
+def prestige_time(g, arg):
+    """After `arg` hours (default 4) in the current run, if anything is on offer."""
+    h = float(arg or 4) * 3600.0
+    return lambda run_t: run_t >= h and g.potential_shards_gain() > 0
+
+BUY_STRATEGIES = {"advisor": buy_advisor, "cheapest": buy_cheapest, "random": buy_random}
+PRESTIGE_STRATEGIES = {"never": prestige_never, "gain": prestige_gain, "double": prestige_double, "time": prestige_time}
+
+
+def _strategy(table: dict, spec: str):
+    name, _, arg = spec.partition(":")
+    if name not in table: raise ValueError(f"unknown strategy {spec!r} (known: {', '.join(table)})")
+    return table[name], arg
+
+
+# ---------------- one playthrough ----------------
+def _lg(x) -> float:
+    return log10(x) if x >= 1 else 0.0
+
+def simulate(cfg: dict, seed: int, eco: Economy, curves: dict = None, run: int = 0):
+    """One headless playthrough of cfg["hours"], stepped every cfg["step"] seconds.
+
+    Each step: passive income, taps (cfg["tps"] per second, ±50 % noise), the buy strategy, then the
+    prestige strategy. Returns the `runs` row; curve samples are appended to `curves` columns."""
+    rng = random.Random(seed); g = GameState(eco)
+    buy = _strategy(BUY_STRATEGIES, cfg["buy"]); buy = buy[0](g, rng, buy[1])
+    pre = _strategy(PRESTIGE_STRATEGIES, cfg["prestige"]); pre = pre[0](g, pre[1])
+    names = eco.names; index = {n: i for i, n in enumerate(names)}
+    t_up = [NAN] * len(names); t_shard = [NAN] * cfg["max_shards"]; now = [0.0]
+    def seen(name):
+        if name is not None and t_up[index[name]] != t_up[index[name]]: t_up[index[name]] = now[0]
+    g.observers.append(seen)
+    dt = float(cfg["step"]); steps = int(cfg["hours"] * 3600.0 / dt); every = max(1, int(round(cfg["sample"] / dt)))
+    tps = cfg["tps"]; prestiges = 0; run_start = 0.0
+    for i in range(1, steps + 1):
+        t = now[0] = i * dt
+        g.advance(dt)
+        if tps > 0:
+            n = int(tps * dt * rng.uniform(0.5, 1.5))
+            if n: g.tap(n)
+        buy()
+        if pre(t - run_start):
+            before = g.prestige_shards
+            if g.prestige():
+                prestiges += 1; run_start = t
+                for k in range(before + 1, min(g.prestige_shards, len(t_shard)) + 1): t_shard[k - 1] = t
+        if curves is not None and i % every == 0:
+            curves["run"].append(run); curves["t"].append(t)
+            curves["gold_log10"].append(_lg(g.gold)); curves["total_log10"].append(_lg(g.total_earned))
+            curves["cps_log10"].append(_lg(g.cps)); curves["shards"].append(g.prestige_shards)
+    row = {"run": run, "config": cfg["index"], "seed": seed, "total_log10": _lg(g.total_earned),
+           "shards": g.prestige_shards, "prestiges": prestiges, "cpc_level": g.cpc_level}
+    for i, v in enumerate(t_up): row[f"t_upgrade_{i}"] = v
+    for i, v in enumerate(t_shard): row[f"t_shard_{i + 1}"] = v
+    return row
+
+
+# ---------------- work units ----------------
+RUN_TYPES = {"run": "q", "config": "q", "seed": "q", "shards": "q", "prestiges": "q", "cpc_level": "q"}   # others: "d"
+CURVE_TYPES = {"run": "q", "t": "d", "gold_log10": "d", "total_log10": "d", "cps_log10": "d", "shards": "q"}
+_economies = {}
+
+def _economy(cfg: dict) -> Economy:
+    key = (cfg["upgrades"], cfg["cps_bonus"], cfg["tap_bonus"], cfg["base_exp"])
+    eco = _economies.get(key)
+    if eco is None:
+        base = Economy.from_file(cfg["upgrades"]) if cfg["upgrades"] else DEFAULT_ECONOMY
+        eco = _economies[key] = base.replace(shard_cps_bonus=cfg["cps_bonus"], shard_tap_bonus=cfg["tap_bonus"], prestige_base_exp=cfg["base_exp"])
+    return eco
+
+def run_shard(unit):
+    """Worker entry: (unit_id, cfg, first_run, count) -> (unit_id, {table: {column: array}})."""
+    uid, cfg, first, count = unit; eco = _economy(cfg)
+    curves = {k: array(tc) for k, tc in CURVE_TYPES.items()}; runs = {}
+    for r in range(first, first + count):
+        row = simulate(cfg, cfg["seed"] + r, eco, curves, run=cfg["index"] * cfg["runs"] + r)
+        for k, v in row.items():
+            col = runs.get(k)
+            if col is None: col = runs[k] = array(RUN_TYPES.get(k, "d"))
+            col.append(v)
+    return uid, {"runs": runs, "curves": curves}
+
+def _init_worker(plugins):
+    for mod in plugins: importlib.import_module(mod)
+
+
+class ColumnWriter:
+    """Appends column arrays to `<out>/<table>/<column>.bin`; `close()` writes `meta.json`."""
+
+    def __init__(self, out: str, meta: dict = None):
+        self.out = out; self.meta = dict(meta or {}); self.files = {}; self.tables = {}
+        os.makedirs(out, exist_ok=True)
+
+    def append(self, table: str, columns: dict):
+        info = self.tables.setdefault(table, {"rows": 0, "columns": {}})
+        n = None
+        for name, col in columns.items():
+            f = self.files.get((table, name))
+            if f is None:
+                os.makedirs(os.path.join(self.out, table), exist_ok=True)
+                f = self.files[(table, name)] = open(os.path.join(self.out, table, name + ".bin"), "wb")
+                info["columns"][name] = col.typecode
+            col.tofile(f); n = len(col)
+        if n: info["rows"] += n
+
+    def close(self, **extra):
+        for f in self.files.values(): f.close()
+        self.files = {}
+        meta = dict(self.meta, byteorder=sys.byteorder, tables=self.tables, **extra)
+        with open(os.path.join(self.out, "meta.json"), "w", encoding="utf-8") as f: json.dump(meta, f, ensure_ascii=False, indent=1)
+
+
+def load(out: str = OUT_DIR) -> dict:
+    """{table: {column: array}} read back from a simulator output directory."""
+    with open(os.path.join(out, "meta.json"), "r", encoding="utf-8") as f: meta = json.load(f)
+    data = {}
+    for table, info in meta["tables"].items():
+        data[table] = {}
+        for name, tc in info["columns"].items():
+            a = array(tc)
+            with open(os.path.join(out, table, name + ".bin"), "rb") as f: a.fromfile(f, info["rows"])
+            if meta["byteorder"] != sys.byteorder: a.byteswap()
+            data[table][name] = a
+    return data
+
+
+# ---------------- driver ----------------
+def configs(opts: dict) -> list:
+    """Cartesian product of every list-valued option, as indexed config dicts."""
+    keys = ("buy", "prestige", "cps_bonus", "tap_bonus", "base_exp", "tps", "upgrades")
+    out = []
+    for i, combo in enumerate(itertools.product(*(opts[k] for k in keys))):
+        cfg = dict(zip(keys, combo)); cfg.update(index=i, runs=opts["runs"], hours=opts["hours"], step=opts["step"],
+                                                 sample=opts["sample"], seed=opts["seed"], max_shards=opts["max_shards"])
+        out.append(cfg)
+    return out
+
+def sweep(opts: dict, workers: int = None, shard_size: int = SHARD_SIZE, out: str = OUT_DIR, plugins=(), log=sys.stderr) -> dict:
+    """Run every configuration × opts["runs"] playthroughs on a process pool, streaming to `out`.
+    Units are written in submission order (results arriving early wait), so output is reproducible."""
+    cfgs = configs(opts); units = []
+    for cfg in cfgs:
+        for first in range(0, opts["runs"], shard_size):
+            units.append((len(units), cfg, first, min(shard_size, opts["runs"] - first)))
+    total = sum(u[3] for u in units); workers = workers or _cpu_count()
+    eco_names = {c["upgrades"] or "": list(_economy(c).names) for c in cfgs}
+    writer = ColumnWriter(out, {"configs": cfgs, "upgrades": eco_names})
+    stats = {c["index"]: {"total_log10": [], "t_shard_1": []} for c in cfgs}
+    t0 = time.perf_counter(); done = 0; pending = {}; nxt = 0
+    try:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(tuple(plugins),)) as ex:
+            for fut in as_completed([ex.submit(run_shard, u) for u in units]):
+                uid, tables = fut.result(); pending[uid] = tables
+                while nxt in pending:
+                    tables = pending.pop(nxt); nxt += 1
+                    for name, cols in tables.items(): writer.append(name, cols)
+                    runs = tables["runs"]; done += len(runs["run"])
+                    for c, tl, ts in zip(runs["config"], runs["total_log10"], runs["t_shard_1"]):
+                        stats[c]["total_log10"].append(tl); stats[c]["t_shard_1"].append(ts)
+                rate = done / (time.perf_counter() - t0)
+                if log is not None: print(f"\r{done}/{total} parties  {rate:,.1f} sims/s", end="", file=log, flush=True)
+    finally:
+        elapsed = time.perf_counter() - t0
+        writer.close(runs_done=done, seconds=elapsed, sims_per_s=done / elapsed if elapsed else 0.0, workers=workers)
+    if log is not None: print(file=log)
+    return {"runs": done, "seconds": elapsed, "sims_per_s": done / elapsed if elapsed else 0.0, "workers": workers,
+            "configs": cfgs, "stats": stats}
+
+def _cpu_count() -> int:
+    try: return len(os.sched_getaffinity(0))
+    except AttributeError: return os.cpu_count() or 1
+
+def _median(values) -> float:
+    v = sorted(x for x in values if x == x)
+    return v[len(v) // 2] if v else NAN
+
+
+def main(argv) -> int:
+    def opt(flag, default):
+        return argv[argv.index(flag) + 1] if flag in argv[:-1] else default
+    def many(flag, default, cast=str):
+        return [cast(x) for x in str(opt(flag, default)).split(",")]
+    eco = DEFAULT_ECONOMY
+    opts = {"buy": many("--buy", "advisor"), "prestige": many("--prestige", "gain:1"),
+            "cps_bonus": many("--cps-bonus", eco.shard_cps_bonus, float), "tap_bonus": many("--tap-bonus", eco.shard_tap_bonus, float),
+            "base_exp": many("--base-exp", eco.prestige_base_exp, int), "tps": many("--tps", 5.0, float),
+            "upgrades": [p or None for p in many("--upgrades", "")],
+            "runs": int(opt("--runs", 1000)), "hours": float(opt("--hours", 24)), "step": float(opt("--step", 10)),
+            "sample": float(opt("--sample", 600)), "seed": int(opt("--seed", 0)), "max_shards": int(opt("--max-shards", MAX_SHARDS))}
+    plugins = [p for p in str(opt("--plugin", "")).split(",") if p]
+    for mod in plugins: importlib.import_module(mod)
+    for spec in opts["buy"]: _strategy(BUY_STRATEGIES, spec)
+    for spec in opts["prestige"]: _strategy(PRESTIGE_STRATEGIES, spec)
+    workers = int(opt("--workers", 0)) or None; out = opt("--out", OUT_DIR)
+    res = sweep(opts, workers, int(opt("--shard-size", SHARD_SIZE)), out, plugins)
+    print(f"{res['runs']} parties en {res['seconds']:.1f} s sur {res['workers']} processus : {res['sims_per_s']:,.1f} sims/s")
+    for cfg in res["configs"]:
+        st = res["stats"][cfg["index"]]; t1 = _median(st["t_shard_1"])
+        label = " ".join(f"{k}={cfg[k]}" for k in ("buy", "prestige", "cps_bonus", "tap_bonus", "base_exp", "tps", "upgrades") if len(opts[k]) > 1)
+        shard = f"1er shard médian {t1 / 3600:.2f} h" if t1 == t1 else "pas de shard"
+        print(f"  [{cfg['index']}] {label or 'défaut':40s} total médian 10^{_median(st['total_log10']):.2f}  {shard}")
+    print(f"colonnes : {out}/")
+    return 0
+
+
+if __name__ == "__main__":
+    import idle_sim   # run as the importable module: --plugin registrations and pickled work units see one registry
+    sys.exit(idle_sim.main(sys.argv[1:]))
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Idle Clicker — sauvegarde journalisée (aucune dépendance Tkinter)
+- Snapshot binaire compact (`.snap`) : en-tête + CRC32 + JSON compressé zlib, écrit par tmp + rename.
+- Journal en ajout seul (`.journal`) : petits enregistrements delta (achats, prestige, or périodique),
+  chacun avec longueur + CRC32 + numéro de séquence ; une fin de fichier déchirée est ignorée au chargement.
+- `SaveStore` : le thread Tk ne fait que déposer un dict (submit) ; un thread d'écriture fusionne
+  les dépôts en attente, écrit, compacte le journal en snapshot et applique la politique fsync.
+- `SqliteStore` : même API, plusieurs profils + historique de snapshots horodatés dans une base SQLite (WAL).
+Bench latence côté UI : python idle_storage.py --bench   |   Profils : python idle_storage.py --profiles [base.db]   |   Vérifications : python idle_storage.py --check
+"""
+import json, os, sqlite3, struct, sys, threading, time, zlib
+
+SNAP_MAGIC = b"IDLS"
+JOURNAL_MAGIC = b"IDLJ"
+FORMAT_VERSION = 1
+FSYNC_POLICIES = ("always", "interval", "never")
+COMPACT_BYTES = 64 * 1024   # journal size that triggers a snapshot
+KEEP_CHECKPOINTS = 50       # autosave rows kept per SQLite profile (manual snapshots are all kept)
+
+_SNAP_HEAD = struct.Struct("<4sBQII")   # magic, version, seq, payload length, crc32
+_REC_HEAD = struct.Struct("<IIQ")       # payload length, crc32, seq
+_JSON_SEP = (",", ":")
+
+
+def _delta(old: dict, new: dict) -> dict:
+    """Top-level keys whose value changed; nested dicts (upgrades) only carry their changed entries."""
+    d = {}
+    for k, v in new.items():
+        o = old.get(k)
+        if o != v:
+            if isinstance(v, dict) and isinstance(o, dict):
+                d[k] = {kk: vv for kk, vv in v.items() if o.get(kk) != vv}
+            else:
+                d[k] = v
+    return d
+
+
+def _apply(data: dict, delta: dict):
+    for k, v in delta.items():
+        if isinstance(v, dict) and isinstance(data.get(k), dict): data[k].update(v)
+        else: data[k] = v
+
+
+def _pack(data: dict) -> bytes:
+    return zlib.compress(json.dumps(data, separators=_JSON_SEP).encode("utf-8"), 6)
+
+
+def _unpack(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob))
+
+
+def read_snapshot(path: str):
+    """Return (data, seq). Raises ValueError on a bad header, length or checksum."""
+    with open(path, "rb") as f: blob = f.read()
+    if len(blob) < _SNAP_HEAD.size: raise ValueError("snapshot tronqué")
+    magic, version, seq, length, crc = _SNAP_HEAD.unpack_from(blob)
+    if magic != SNAP_MAGIC or version != FORMAT_VERSION: raise ValueError("snapshot : format inconnu")
+    payload = blob[_SNAP_HEAD.size:_SNAP_HEAD.size + length]
+    if len(payload) != length or zlib.crc32(payload) != crc: raise ValueError("snapshot : somme de contrôle invalide")
+    return _unpack(payload), seq
+
+
+def read_journal(path: str):
+    """Return ([(seq, delta), ...], valid_bytes). Stops at the first torn or corrupt record."""
+    try:
+        with open(path, "rb") as f: blob = f.read()
+    except FileNotFoundError:
+        return [], 0
+    if blob[:4] != JOURNAL_MAGIC: return [], 0
+    recs = []; pos = 4; n = len(blob)
+    while pos + _REC_HEAD.size <= n:
+        length, crc, seq = _REC_HEAD.unpack_from(blob, pos)
+        start = pos + _REC_HEAD.size; end = start + length
+        if end > n or zlib.crc32(blob[start:end]) != crc: break
+        try: recs.append((seq, json.loads(blob[start:end])))
+        except ValueError: break
+        pos = end
+    return recs, pos
+
+
+class _BackgroundWriter:
+    """Coalescing writer thread. The UI thread calls submit(); the latest dict per key wins and
+    _write_batch() gets everything pending at once. Subclasses may use _idle_wait()/_idle() for deferred syncs."""
+    def __init__(self):
+        self._cv = threading.Condition(); self._thread = None
+        self._pending = {}; self._busy = False; self._stop = False
+        self.error = None   # last writer exception, for the UI to report
+        self.submitted = self.coalesced = 0
+
+    def submit(self, data: dict, snapshot: bool = False, key=None):
+        """Hand a `GameState.to_dict()` to the writer. Never blocks on I/O; a newer dict replaces an unwritten one."""
+        with self._cv:
+            prev = self._pending.get(key)
+            if prev is not None: self.coalesced += 1; snapshot = snapshot or prev[1]
+            self._pending[key] = (data, snapshot); self.submitted += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="idle-save", daemon=True); self._thread.start()
+            self._cv.notify()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until everything submitted so far is written. False on timeout."""
+        with self._cv:
+            return self._cv.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Write what is pending, sync and stop the writer."""
+        with self._cv:
+            self._stop = True; self._cv.notify()
+            thread = self._thread
+        if thread is not None: thread.join(timeout)
+        else: self._shutdown()
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while not self._pending and not self._stop:
+                    wait = self._idle_wait()
+                    if wait is not None and wait <= 0: break
+                    self._cv.wait(wait)
+                items = list(self._pending.items()); self._pending.clear(); self._busy = True
+                stop = self._stop and not items
+            try:
+                if items: self._write_batch(items)
+                self._idle(stop)
+                if stop: self._shutdown()
+            except Exception as e:
+                self.error = e; self._on_error()
+            finally:
+                with self._cv:
+                    self._busy = False; self._cv.notify_all()
+            if stop: return
+
+    def _idle_wait(self):
+        return None   # seconds until _idle() is due; None = sleep until submit()
+    def _idle(self, stopping: bool): pass
+    def _shutdown(self): pass
+    def _on_error(self): pass
+    def _write_batch(self, items): raise NotImplementedError
+
+
+class SaveStore(_BackgroundWriter):
+    """Snapshot + journal pair `<base>.snap` / `<base>.journal` fed by a background writer.
+    fsync: "always" after every record, "interval" at most every `fsync_interval` s, "never" (left to the OS)."""
+    def __init__(self, base: str, fsync: str = "interval", fsync_interval: float = 2.0, compact_bytes: int = COMPACT_BYTES):
+        if fsync not in FSYNC_POLICIES: raise ValueError(f"politique fsync inconnue : {fsync!r}")
+        super().__init__()
+        self.snap_path = base + ".snap"; self.journal_path = base + ".journal"
+        self.fsync = fsync; self.fsync_interval = float(fsync_interval); self.compact_bytes = int(compact_bytes)
+        self._base = None; self._seq = 0; self._jf = None; self._jbytes = 0
+        self._unsynced = False; self._last_fsync = time.monotonic()
+        self.records = self.snapshots = self.fsyncs = self.bytes_written = 0
+
+    def exists(self) -> bool:
+        return os.path.exists(self.snap_path) or os.path.exists(self.journal_path)
+
+    # ---------------- UI thread ----------------
+    def load(self):
+        """Replay snapshot + journal tail; returns the state dict or None. Raises ValueError if the snapshot is corrupt."""
+        data, seq = read_snapshot(self.snap_path) if os.path.exists(self.snap_path) else (None, 0)
+        recs, valid = read_journal(self.journal_path)
+        for s, delta in recs:
+            if s <= seq or data is None: continue   # already folded into the snapshot
+            _apply(data, delta); seq = s
+        if os.path.exists(self.journal_path) and valid != os.path.getsize(self.journal_path):
+            with open(self.journal_path, "r+b") as f: f.truncate(valid)   # drop a torn tail before appending
+        with self._cv:
+            self._base = data; self._seq = seq; self._jbytes = valid if data is not None else 0
+        return data
+
+    def wipe(self):
+        """Drop pending work and delete both files (new game)."""
+        with self._cv:
+            self._pending.clear()
+            self._cv.wait_for(lambda: not self._busy)
+            self._close_journal()
+            for p in (self.snap_path, self.journal_path):
+                try: os.remove(p)
+                except FileNotFoundError: pass
+            self._base = None; self._seq = 0; self._jbytes = 0
+
+    def backup(self) -> str:
+        """Move an unreadable snapshot aside (`.bak`); the stale journal is dropped on the next write."""
+        with self._cv:
+            self._cv.wait_for(lambda: not self._busy)
+            bad = self.snap_path + ".bak"; os.replace(self.snap_path, bad); self._base = None
+        return bad
+
+    # ---------------- writer thread ----------------
+    def _idle_wait(self):
+        return self._last_fsync + self.fsync_interval - time.monotonic() if self._unsynced else None
+
+    def _idle(self, stopping: bool):
+        if self._unsynced and (stopping or time.monotonic() - self._last_fsync >= self.fsync_interval): self._sync()
+
+    def _shutdown(self):
+        self._close_journal()
+
+    def _on_error(self):
+        self._base = None   # next write starts over with a full snapshot
+        self._close_journal()
+
+    def _write_batch(self, items):
+        for _, (data, snap) in items: self._write(data, snap)
+
+    def _write(self, data: dict, snap: bool):
+        if snap or self._base is None or self._jbytes >= self.compact_bytes:
+            self._write_snapshot(data); return
+        delta = _delta(self._base, data)
+        if not delta: return
+        payload = json.dumps(delta, separators=_JSON_SEP).encode("utf-8")
+        if self._jf is None:
+            fresh = not os.path.exists(self.journal_path) or os.path.getsize(self.journal_path) == 0
+            self._jf = open(self.journal_path, "ab")
+            if fresh: self._jf.write(JOURNAL_MAGIC); self._jbytes = len(JOURNAL_MAGIC)
+        self._seq += 1
+        rec = _REC_HEAD.pack(len(payload), zlib.crc32(payload), self._seq) + payload
+        self._jf.write(rec); self._jf.flush()
+        self._jbytes += len(rec); self.bytes_written += len(rec); self.records += 1
+        self._base = data
+        if self.fsync == "always": self._sync()
+        elif self.fsync == "interval": self._unsynced = True
+
+    def _write_snapshot(self, data: dict):
+        payload = _pack(data)
+        self._seq += 1
+        blob = _SNAP_HEAD.pack(SNAP_MAGIC, FORMAT_VERSION, self._seq, len(payload), zlib.crc32(payload)) + payload
+        tmp = self.snap_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob); f.flush()
+            if self.fsync != "never": os.fsync(f.fileno()); self.fsyncs += 1
+        os.replace(tmp, self.snap_path)
+        # Records up to this seq are now in the snapshot; a crash before the truncate only leaves stale ones, which load() skips.
+        self._close_journal()
+        with open(self.journal_path, "wb") as f: f.write(JOURNAL_MAGIC)
+        self._jbytes = len(JOURNAL_MAGIC); self._unsynced = False
+        self._base = data; self.snapshots += 1; self.bytes_written += len(blob)
+
+    def _sync(self):
+        if self._jf is not None: os.fsync(self._jf.fileno()); self.fsyncs += 1
+        self._unsynced = False; self._last_fsync = time.monotonic()
+
+    def _close_journal(self):
+        if self._jf is not None:
+            try: self._jf.close()
+            finally: self._jf = None
+
+
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS profiles(
+    id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE,
+    created REAL NOT NULL, updated REAL NOT NULL, head INTEGER);
+CREATE TABLE IF NOT EXISTS snapshots(
+    id INTEGER PRIMARY KEY, profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+    ts REAL NOT NULL, kind TEXT NOT NULL, schema_version INTEGER NOT NULL, data BLOB NOT NULL);
+CREATE INDEX IF NOT EXISTS snapshots_by_profile ON snapshots(profile_id, id);
+"""
+# Fixed statement texts: sqlite3 keeps them prepared in its per-connection statement cache.
+_SQL_UPSERT_PROFILE = ("INSERT INTO profiles(name, created, updated) VALUES(?, ?, ?) "
+                       "ON CONFLICT(name) DO UPDATE SET updated = excluded.updated")
+_SQL_INSERT_SNAPSHOT = ("INSERT INTO snapshots(profile_id, ts, kind, schema_version, data) "
+                        "SELECT id, ?, ?, ?, ? FROM profiles WHERE name = ?")
+_SQL_SET_HEAD = "UPDATE profiles SET head = (SELECT MAX(id) FROM snapshots WHERE profile_id = profiles.id) WHERE name = ?"
+_SQL_PRUNE = ("DELETE FROM snapshots WHERE kind = 'checkpoint' AND profile_id = (SELECT id FROM profiles WHERE name = ?) "
+              "AND id < (SELECT MIN(id) FROM (SELECT id FROM snapshots WHERE kind = 'checkpoint' "
+              "AND profile_id = (SELECT id FROM profiles WHERE name = ?) ORDER BY id DESC LIMIT ?))")
+_SQL_LOAD_HEAD = "SELECT s.id, s.data FROM profiles p JOIN snapshots s ON s.id = p.head WHERE p.name = ?"
+_SQL_HISTORY = ("SELECT s.id, s.ts, s.kind FROM snapshots s JOIN profiles p ON p.id = s.profile_id "
+                "WHERE p.name = ? ORDER BY s.id DESC LIMIT ?")
+_SQL_LOAD_ONE = "SELECT s.id, s.data FROM snapshots s JOIN profiles p ON p.id = s.profile_id WHERE p.name = ? AND s.id = ?"
+_SQL_OLDER = ("SELECT s.id, s.data FROM snapshots s JOIN profiles p ON p.id = s.profile_id "
+              "WHERE p.name = ? AND s.id < ? ORDER BY s.id DESC")
+_SYNCHRONOUS = {"always": "FULL", "interval": "NORMAL", "never": "OFF"}
+
+
+class SqliteStore(_BackgroundWriter):
+    """Many profiles with timestamped snapshot history in one SQLite file (WAL). Same API as SaveStore,
+    bound to `profile`; submit(..., key=name) saves another profile in the same transaction.
+    Rows are "snapshot" (manual save / quit, all kept) or "checkpoint" (autosave, last `keep_checkpoints` kept)."""
+    def __init__(self, path: str, profile: str = "default", fsync: str = "interval", keep_checkpoints: int = KEEP_CHECKPOINTS):
+        if fsync not in FSYNC_POLICIES: raise ValueError(f"politique fsync inconnue : {fsync!r}")
+        super().__init__()
+        self.path = path; self.profile = profile; self.keep_checkpoints = int(keep_checkpoints)
+        self._synchronous = _SYNCHRONOUS[fsync]
+        self._conn = None; self._wconn = None   # UI-thread reader / writer-thread connection
+        self.transactions = self.rows = 0
+        self.recovered_from = None   # id of a corrupt head skipped by the last load()
+
+    def _connect(self):
+        d = os.path.dirname(self.path)
+        if d: os.makedirs(d, exist_ok=True)
+        c = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)   # access is serialised by _cv/_busy
+        c.execute("PRAGMA journal_mode=WAL"); c.execute(f"PRAGMA synchronous={self._synchronous}")
+        c.execute("PRAGMA foreign_keys=ON"); c.executescript(_SCHEMA_SQL)
+        return c
+
+    def _reader(self):
+        if self._conn is None: self._conn = self._connect()
+        return self._conn
+
+    # ---------------- UI thread ----------------
+    def submit(self, data: dict, snapshot: bool = False, key=None):
+        super().submit(data, snapshot, self.profile if key is None else key)
+
+    def exists(self) -> bool:
+        if not os.path.exists(self.path): return False
+        return self._reader().execute(_SQL_LOAD_HEAD, (self.profile,)).fetchone() is not None
+
+    def load(self, snapshot_id: int = None, profile: str = None):
+        """Head snapshot of the profile (or `snapshot_id` from history); None if the profile is empty.
+        A head that no longer decodes is skipped for the newest older one (`recovered_from` tells which).
+        `profile` reads another profile than the bound one (idle_server: one store for every session)."""
+        c = self._reader(); self.recovered_from = None; name = self.profile if profile is None else profile
+        row = c.execute(_SQL_LOAD_HEAD if snapshot_id is None else _SQL_LOAD_ONE,
+                        (name,) if snapshot_id is None else (name, snapshot_id)).fetchone()
+        if row is None: return None
+        try:
+            return _unpack(row[1])
+        except (zlib.error, ValueError):
+            if snapshot_id is not None: raise
+            self.recovered_from = row[0]
+        for _, blob in c.execute(_SQL_OLDER, (name, row[0])):
+            try: return _unpack(blob)
+            except (zlib.error, ValueError): continue
+        raise ValueError(f"profil {name!r} : aucun snapshot lisible")
+
+    def profiles(self):
+        """[(name, created, updated), ...], most recently played first."""
+        if not os.path.exists(self.path): return []
+        return self._reader().execute("SELECT name, created, updated FROM profiles ORDER BY updated DESC").fetchall()
+
+    def history(self, limit: int = 20):
+        """[(snapshot_id, ts, kind), ...] of the profile, newest first."""
+        if not os.path.exists(self.path): return []
+        return self._reader().execute(_SQL_HISTORY, (self.profile, int(limit))).fetchall()
+
+    def import_json(self, path: str, profile: str = None) -> dict:
+        """Write a schema-670 JSON save (idle_save.json) as a snapshot of `profile` (default: this one).
+        Waits for the writer (one-off migration), so a save submitted right after is not coalesced with it:
+        the UI imports the file once it has loaded, then saves the state with offline gains on top."""
+        with open(path, "r", encoding="utf-8") as f: data = json.load(f)
+        if not isinstance(data, dict) or "schema_version" not in data: raise ValueError(f"{path} : pas une sauvegarde v670")
+        self.submit(data, snapshot=True, key=profile); self.flush(timeout=5.0)
+        return data
+
+    def wipe(self):
+        """Delete the profile and its history (new game)."""
+        with self._cv:
+            self._pending.pop(self.profile, None)
+            self._cv.wait_for(lambda: not self._busy)
+            if os.path.exists(self.path):
+                c = self._reader()
+                with c: c.execute("DELETE FROM profiles WHERE name = ?", (self.profile,))
+
+    def backup(self) -> str:
+        """Move an unreadable database aside (`.bak`); a fresh one is created on the next write."""
+        with self._cv:
+            self._cv.wait_for(lambda: not self._busy)
+            for c in (self._conn, self._wconn):
+                if c is not None: c.close()
+            self._conn = self._wconn = None
+            bad = self.path + ".bak"; os.replace(self.path, bad)
+            for ext in ("-wal", "-shm"):
+                try: os.remove(self.path + ext)
+                except FileNotFoundError: pass
+        return bad
+
+    def close(self, timeout: float = 5.0):
+        super().close(timeout)
+        if self._conn is not None: self._conn.close(); self._conn = None
+
+    # ---------------- writer thread ----------------
+    def _write_batch(self, items):
+        if self._wconn is None: self._wconn = self._connect()
+        c = self._wconn; now = time.time(); names = [(name,) for name, _ in items]
+        with c:   # one transaction for the whole batch
+            c.executemany(_SQL_UPSERT_PROFILE, [(name, now, now) for name, _ in items])
+            c.executemany(_SQL_INSERT_SNAPSHOT, [(now, "snapshot" if snap else "checkpoint", int(data.get("schema_version", 0)), _pack(data), name)
+                                                 for name, (data, snap) in items])
+            c.executemany(_SQL_SET_HEAD, names)
+            c.executemany(_SQL_PRUNE, [(name, name, self.keep_checkpoints) for name, _ in items])
+        self.transactions += 1; self.rows += len(items)
+
+    def _shutdown(self):
+        if self._wconn is not None: self._wconn.close(); self._wconn = None
+
+    def _on_error(self):
+        self._shutdown()
+
+
+def bench_save(n: int = 300, fsync: str = "interval", backend: str = "journal"):
+    """Time spent on the calling (UI) thread per save: legacy synchronous JSON write + rename
+    vs store.submit (backend "journal" = SaveStore, "sqlite" = SqliteStore).
+    Returns ((legacy_mean_us, legacy_max_us), (store_mean_us, store_max_us), store)."""
+    import random, tempfile
+    from idle_core import GameState
+    rng = random.Random(0)
+    g = GameState(); g.gold = 1e6
+    with tempfile.TemporaryDirectory() as d:
+        legacy = []; path = os.path.join(d, "legacy.json")
+        for _ in range(n):
+            g.tap(); g.buy(rng.choice(g.economy.names), 1); g.advance(1.0)
+            t0 = time.perf_counter()
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(g.to_dict(), f); f.flush()
+                if fsync != "never": os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+            legacy.append(time.perf_counter() - t0)
+        store = (SqliteStore(os.path.join(d, "store.db"), fsync=fsync) if backend == "sqlite"
+                 else SaveStore(os.path.join(d, "store"), fsync=fsync))
+        store.load(); queued = []
+        for _ in range(n):
+            g.tap(); g.buy(rng.choice(g.economy.names), 1); g.advance(1.0)
+            t0 = time.perf_counter()
+            store.submit(g.to_dict())
+            queued.append(time.perf_counter() - t0)
+        store.submit(g.to_dict(), snapshot=True); store.close()
+    stat = lambda xs: (sum(xs) / len(xs) * 1e6, max(xs) * 1e6)
+    return stat(legacy), stat(queued), store
+
+
+def check_import_json() -> list:
+    """SqliteStore.import_json: a v670 file lands as a snapshot that loads back identical; anything else
+    is refused and leaves the profile empty. Returns the failures."""
+    import tempfile
+    from idle_core import GameState
+    fails = []
+    g = GameState(); g.gold = 1234.5; g.buy(g.economy.names[0], 3); saved = g.to_dict()
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "idle_save.json"); bad = os.path.join(d, "other.json")
+        with open(path, "w", encoding="utf-8") as f: json.dump(saved, f)
+        with open(bad, "w", encoding="utf-8") as f: json.dump({"gold": 1.0}, f)
+        store = SqliteStore(os.path.join(d, "saves.db"), fsync="never")
+        try:
+            store.import_json(bad, profile="other"); fails.append("import_json accepted a file without schema_version")
+        except ValueError: pass
+        if store.import_json(path) != saved: fails.append("import_json returned other data than the file")
+        if store.load() != saved: fails.append("imported snapshot does not load back identical")
+        g.advance(60.0); store.submit(g.to_dict(), snapshot=True); store.flush()   # the UI's first save right after
+        if [kind for _, _, kind in store.history()] != ["snapshot", "snapshot"]: fails.append(f"history after import + save: {store.history()}")
+        if store.load(profile="other") is not None: fails.append("refused file still created a snapshot")
+        store.close()
+    return fails
+
+
+if __name__ == "__main__":
+    if "--check" in sys.argv[1:]:
+        fails = check_import_json()
+        for f in fails: print("FAIL", f)
+        print("import_json:", "ok" if not fails else f"{len(fails)} failure(s)")
+        sys.exit(1 if fails else 0)
+    if "--bench" in sys.argv[1:]:
+        for policy in FSYNC_POLICIES:
+            (lm, lx), (sm, sx), st = bench_save(fsync=policy)
+            print(f"journal fsync={policy:8s} legacy save: {lm:8.1f} µs (max {lx:8.1f})   submit: {sm:6.1f} µs (max {sx:7.1f})"
+                  f"   records={st.records} coalesced={st.coalesced} snapshots={st.snapshots} fsyncs={st.fsyncs}")
+            (lm, lx), (sm, sx), st = bench_save(fsync=policy, backend="sqlite")
+            print(f"sqlite  fsync={policy:8s} legacy save: {lm:8.1f} µs (max {lx:8.1f})   submit: {sm:6.1f} µs (max {sx:7.1f})"
+                  f"   rows={st.rows} transactions={st.transactions} coalesced={st.coalesced}")
+    if "--profiles" in sys.argv[1:]:
+        rest = [a for a in sys.argv[1:] if not a.startswith("--")]
+        store = SqliteStore(rest[0] if rest else os.path.join(os.path.expanduser("~"), ".idle_clicker", "idle_saves.db"))
+        for name, created, updated in store.profiles():
+            store.profile = name; hist = store.history(5)
+            print(f"{name}: {len(hist)}+ snapshot(s), dernier {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(updated))}")
+            for sid, ts, kind in hist: print(f"    #{sid} {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))} {kind}")
+        store.close()